@@ -0,0 +1,98 @@
+import timeit
+import numpy as np
+import cv2
+from mss import mss
+from mss.screenshot import ScreenShot
+
+
+def screenshot_view(screenshot):
+    """
+    Parameters:
+        screenshot(mss.screenshot.ScreenShot): screenshot made by mss
+    Returns:
+        frame(numpy.ndarray): BGRA pixels of the screenshot as a (height, width, 4) view, nothing is copied
+    """
+    return np.frombuffer(screenshot.raw, dtype=np.uint8).reshape(screenshot.height, screenshot.width, 4)
+
+
+class ScreenCapture:
+    """
+    Captures an area of the screen as BGRA NumPy arrays without converting the whole frame.
+    The recognizer converts only the regions it reads (see utils.to_bgr)
+    """
+
+    def __init__(self, monitor, reuse_buffer=False):
+        """
+        Parameters:
+            monitor(dict): area of the screen in {'top': y, 'left': x, 'width': w, 'height': h} format
+            reuse_buffer(bool): copy every frame into one preallocated array instead of returning
+            a view of the new screenshot, use it when the frame must stay valid until the next grab
+        """
+        self.monitor = monitor
+        self.sct = mss()
+        self.buffer = np.empty((monitor['height'], monitor['width'], 4), dtype=np.uint8) if reuse_buffer else None
+
+    def grab(self):
+        """
+        Returns:
+            frame(numpy.ndarray): (height, width, 4) BGRA image of the area
+        """
+        frame = screenshot_view(self.sct.grab(self.monitor))
+        if self.buffer is None:
+            return frame
+        np.copyto(self.buffer, frame)
+        return self.buffer
+
+
+def legacy_frame(screenshot):
+    """
+    the conversion that grab_table.py used before: mss RGB bytes -> PIL image -> numpy array -> BGR
+    """
+    from PIL import Image
+    img = Image.frombytes('RGB', screenshot.size, screenshot.rgb)
+    return cv2.cvtColor(np.array(img), cv2.COLOR_BGR2RGB)
+
+
+def roi_frame(screenshot, cfg):
+    """
+    the current conversion: a view of the BGRA screenshot, only the regions with colors are converted to BGR
+    """
+    frame = screenshot_view(screenshot)
+    for name in ('hero_step_define', 'hero_cards', 'table_cards'):
+        region = cfg[name]
+        cv2.cvtColor(frame[region['y_0']:region['y_1'], region['x_0']:region['x_1']], cv2.COLOR_BGRA2BGR)
+    return frame
+
+
+def benchmark(cfg, number=200):
+    """
+    compare the time that the old and the new capture paths spend on copying and converting one frame
+    Parameters:
+        cfg(dict): config file
+        number(int): how many frames to convert
+    Returns:
+        timings(dict): key - path name, value - milliseconds per frame
+    """
+    width, height = cfg['table_size']['width'], cfg['table_size']['height']
+    raw = bytearray(np.random.randint(0, 256, width * height * 4, dtype=np.uint8).tobytes())
+    monitor = {'top': 0, 'left': 0, 'width': width, 'height': height}
+    buffer = np.empty((height, width, 4), dtype=np.uint8)
+
+    def legacy():
+        # the screenshot caches its rgb bytes, so a new one is made as mss does on every grab
+        legacy_frame(ScreenShot(raw, monitor))
+
+    def view():
+        roi_frame(ScreenShot(raw, monitor), cfg)
+
+    def preallocated():
+        np.copyto(buffer, roi_frame(ScreenShot(raw, monitor), cfg))
+
+    return {name: timeit.timeit(func, number=number) / number * 1000
+            for name, func in (('legacy', legacy), ('view', view), ('preallocated_buffer', preallocated))}
+
+
+if __name__ == '__main__':
+    from scripts.utils import read_config_file
+    for path_name, milliseconds in benchmark(read_config_file()).items():
+        print('{0}: {1:.3f} ms per frame'.format(path_name, milliseconds))
@@ -0,0 +1,159 @@
+import threading
+import time
+from collections import deque
+
+
+class TableSchedule:
+    """
+    when the table has to be captured next and how often it was captured
+    """
+
+    def __init__(self, period, now, window):
+        self.period = period
+        self.due = now
+        # a table that was never served goes first
+        self.started = float('-inf')
+        self.busy = False
+        self.frames = 0
+        self.dropped = 0
+        # end times of the last frames, the achieved fps is measured over them
+        self.finished = deque(maxlen=window)
+
+    def fps(self):
+        if len(self.finished) < 2 or self.finished[-1] == self.finished[0]:
+            return 0.0
+        return (len(self.finished) - 1) / (self.finished[-1] - self.finished[0])
+
+
+class CaptureScheduler:
+    """
+    Decides which table is captured next. A table where hero is to act is captured at active_fps.
+    After hero has acted the period grows by backoff on every frame until the table is polled at idle_fps.
+    Of the due tables the one served the longest time ago goes first, so with too many tables every table gets
+    the same share of the time, and the frames that could not be captured in time are counted as dropped
+    """
+
+    def __init__(self, tables_count, active_fps=10, idle_fps=2, backoff=1.5, window=50, clock=time.monotonic):
+        """
+        Parameters:
+            tables_count(int): number of tables
+            active_fps(float): frames per second of a table where hero is to act
+            idle_fps(float): the lowest frames per second of a table where hero is not to act
+            backoff(float): the period of a table where hero is not to act is multiplied by it after every frame
+            window(int): number of the last frames of a table over which the achieved fps is measured
+            clock(callable): returns the current time in seconds
+        """
+        self.active_period = 1 / active_fps
+        self.idle_period = 1 / idle_fps
+        self.backoff = backoff
+        self.clock = clock
+        now = clock()
+        self.tables = [TableSchedule(self.active_period, now, window) for _ in range(tables_count)]
+        self.condition = threading.Condition()
+
+    def pick(self, now):
+        """
+        Parameters:
+            now(float): current time
+        Returns:
+            index(int): number of the table which is due first, None if all tables are being processed
+            delay(float): seconds until the table is due, 0 if it is already due
+        """
+        free = [index for index, table in enumerate(self.tables) if not table.busy]
+        if not free:
+            return None, None
+        due = [index for index in free if self.tables[index].due <= now]
+        if due:
+            # the table that was served the longest time ago goes first
+            return min(due, key=lambda number: self.tables[number].started), 0.0
+        index = min(free, key=lambda number: self.tables[number].due)
+        return index, self.tables[index].due - now
+
+    def start(self, index, now):
+        """
+        the table is captured now. If it is late by more than one period, the missed frames are dropped
+        instead of being captured one after another
+        """
+        table = self.tables[index]
+        late = now - table.due
+        if late >= table.period:
+            dropped = int(late / table.period)
+            table.dropped += dropped
+            table.due += dropped * table.period
+        table.started = now
+        table.busy = True
+
+    def finish(self, index, hero_to_act, now):
+        """
+        Parameters:
+            index(int): number of the table
+            hero_to_act(bool): hero is to act on the processed frame
+            now(float): current time
+        """
+        table = self.tables[index]
+        table.busy = False
+        table.frames += 1
+        table.finished.append(now)
+        table.period = self.active_period if hero_to_act else min(table.period * self.backoff, self.idle_period)
+        table.due += table.period
+
+    def wait(self):
+        """
+        blocks until a table is due and not being processed
+        Returns:
+            index(int): number of the table to capture
+        """
+        with self.condition:
+            while True:
+                index, delay = self.pick(self.clock())
+                if index is not None and delay == 0:
+                    self.start(index, self.clock())
+                    return index
+                # a finished table may be due earlier than the one we are waiting for
+                self.condition.wait(delay)
+
+    def wait_due(self):
+        """
+        blocks until a table is due and not being processed, the other tables that are due at the same time
+        are started too, so one grab of the screen serves all of them
+        Returns:
+            indexes(list of int): numbers of the tables to capture, the one served the longest time ago first
+        """
+        with self.condition:
+            while True:
+                index, delay = self.pick(self.clock())
+                if index is not None and delay == 0:
+                    now = self.clock()
+                    indexes = sorted((number for number, table in enumerate(self.tables)
+                                      if not table.busy and table.due <= now),
+                                     key=lambda number: self.tables[number].started)
+                    for number in indexes:
+                        self.start(number, now)
+                    return indexes
+                self.condition.wait(delay)
+
+    def done(self, index, hero_to_act):
+        """
+        called from the thread which has processed the frame of the table
+        """
+        with self.condition:
+            self.finish(index, hero_to_act, self.clock())
+            self.condition.notify()
+
+    def stats(self):
+        """
+        Returns:
+            stats(list of dict): fps, frames, dropped frames and current period of every table
+        """
+        with self.condition:
+            return [{'fps': table.fps(), 'frames': table.frames, 'dropped': table.dropped, 'period': table.period}
+                    for table in self.tables]
+
+    def report(self):
+        """
+        Returns:
+            text(str): achieved fps and dropped frames of every table in one line per table
+        """
+        return '\n'.join('table {0}: fps={1:.1f} frames={2} dropped={3}'.format(
+            number, table['fps'], table['frames'], table['dropped'])
+            for number, table in enumerate(self.stats(), start=1))
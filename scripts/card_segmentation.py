@@ -0,0 +1,58 @@
+from collections import namedtuple
+import cv2
+import numpy as np
+from scripts.profiling import profiled
+
+# the suit and up to two glyphs of the value, a ten is drawn as '1' and '0'
+MAX_GLYPHS = 3
+
+# boxes(numpy.ndarray): (cards, MAX_GLYPHS, 4) boxes of the glyphs of every card slot in [x_0, y_0, x_1, y_1]
+# format, the suit is the first one, unused rows are -1; counts(numpy.ndarray): number of glyphs in every slot;
+# cards(int): number of dealt cards, they always take the first slots
+CardSlots = namedtuple('CardSlots', ['boxes', 'counts', 'cards'])
+
+
+@profiled('card_segmentation.segment_cards')
+def segment_cards(binary_img, separators, min_height, min_width, suit_at_bottom=False):
+    """
+    find the glyphs of the cards with one pass of connectedComponentsWithStats and assign them to the card slots
+    with searchsorted against the separators
+    Parameters:
+        binary_img(numpy.ndarray): binarized region with the cards
+        separators(numpy.ndarray): increasing x coordinates where the cards end
+        min_height(int): smaller glyphs are noise
+        min_width(int): narrower glyphs are noise
+        suit_at_bottom(bool): the suit is below the value (hero's cards), otherwise above it (the table cards)
+    Returns:
+        slots(CardSlots): glyphs of every card slot, None if the region is too noisy to be read:
+        a slot has more than MAX_GLYPHS glyphs or there is an empty slot between the cards
+    """
+    _, _, stats, _ = cv2.connectedComponentsWithStats(binary_img, connectivity=8)
+    # the first component is the background
+    x, y, width, height = stats[1:, cv2.CC_STAT_LEFT], stats[1:, cv2.CC_STAT_TOP], \
+        stats[1:, cv2.CC_STAT_WIDTH], stats[1:, cv2.CC_STAT_HEIGHT]
+    keep = (height >= min_height) & (width >= min_width)
+    boxes = np.stack([x - 1, y - 1, x + width + 1, y + height + 1], axis=1)[keep]
+    boxes = np.clip(boxes, 0, [binary_img.shape[1], binary_img.shape[0]] * 2)
+    # a component inside another one (e.g. in the loop of a glyph) is a part of that glyph
+    inside = ((boxes[None, :, :2] <= boxes[:, None, :2]).all(axis=2) &
+              (boxes[:, None, 2:] <= boxes[None, :, 2:]).all(axis=2))
+    np.fill_diagonal(inside, False)
+    same = (boxes[:, None] == boxes[None, :]).all(axis=2)
+    # of two identical boxes the first one is kept
+    inside &= ~same | np.tri(len(boxes), k=-1, dtype=bool)
+    boxes = boxes[~inside.any(axis=1)]
+    slots = np.searchsorted(separators, boxes[:, 2], side='right')
+    boxes, slots = boxes[slots < len(separators)], slots[slots < len(separators)]
+    # within a slot the suit goes first, the overlapping glyphs are ordered by y and then by x
+    order = np.lexsort((boxes[:, 0], -boxes[:, 1] if suit_at_bottom else boxes[:, 1], slots))
+    boxes, slots = boxes[order], slots[order]
+    counts = np.bincount(slots, minlength=len(separators))
+    cards = int(np.count_nonzero(counts))
+    if counts.max(initial=0) > MAX_GLYPHS or counts[:cards].min(initial=1) == 0:
+        return None
+    # position of every glyph in its slot
+    ranks = np.arange(len(slots)) - np.searchsorted(slots, slots)
+    slot_boxes = np.full((len(separators), MAX_GLYPHS, 4), -1, dtype=np.int32)
+    slot_boxes[slots, ranks] = boxes
+    return CardSlots(slot_boxes, counts, cards)
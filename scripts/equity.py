@@ -1,5 +1,109 @@
+import os
+import threading
+from collections import OrderedDict, namedtuple
+from itertools import combinations, combinations_with_replacement, permutations
 import numpy as np
-import eval7
+from scripts.utils import remove_cards, read_yaml
+
+RANKS = '23456789TJQKA'
+SUITS = 'cdhs'
+CARDS = [rank + suit for rank in RANKS for suit in SUITS]
+CARD_INDEX = {card: index for index, card in enumerate(CARDS)}
+PREFLOP_TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'preflop_equity.yaml')
+# lookup tables of HandEvaluator are built on the first run and saved here
+EVALUATOR_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache')
+# how many tables are scored with one call of HandEvaluator.evaluate by enumeration and calc_equity
+EVALUATION_BATCH = 100000
+
+# equity and its standard error are in percent, samples - the number of generated tables
+EquityResult = namedtuple('EquityResult', ['equity', 'std_error', 'samples'])
+
+
+def build_evaluator_tables():
+    """
+    score every 7-card hand without a flush and every flush with eval7, so the tables give the same values
+    Returns:
+        rank_keys(numpy.ndarray): sorted keys of all sets of 7 ranks, the key is the sum of 5 ** rank over the cards
+        rank_values(numpy.ndarray): eval7 value of the hand with these ranks and no flush
+        flush_values(numpy.ndarray): eval7 value of the flush with the ranks of the 13-bit mask, 0 if the mask
+        has less than 5 ranks
+    """
+    # eval7 takes a while to import, it is needed only when the tables are built and for the ranges
+    import eval7
+    eval7_cards = [eval7.Card(card) for card in CARDS]
+    keys, values = [], []
+    for ranks in combinations_with_replacement(range(len(RANKS)), 7):
+        if max(ranks.count(rank) for rank in set(ranks)) > 4:
+            continue
+        keys.append(sum(5 ** rank for rank in ranks))
+        # neighbouring cards get different suits, so there are no more than 2 cards of one suit
+        values.append(eval7.evaluate([eval7_cards[rank * 4 + i % 4] for i, rank in enumerate(ranks)]))
+    order = np.argsort(keys)
+    flush_values = np.zeros(1 << len(RANKS), dtype=np.int32)
+    for mask in range(len(flush_values)):
+        ranks = [rank for rank in range(len(RANKS)) if mask >> rank & 1]
+        # with 5 cards of one suit the other 2 cards can't make a full house or quads
+        if len(ranks) >= 5:
+            flush_values[mask] = eval7.evaluate([eval7_cards[rank * 4] for rank in ranks])
+    return np.array(keys, dtype=np.int64)[order], np.array(values, dtype=np.int32)[order], flush_values
+
+
+class HandEvaluator:
+    """
+    Scores many 7-card hands with one NumPy call: hands without a flush are found by the key of their ranks
+    in a sorted table, flushes by the 13-bit mask of the ranks of the suit.
+    The values are the same as eval7.evaluate gives. The tables are memory-mapped from .npy files
+    """
+    _shared = None
+    _shared_lock = threading.Lock()
+    TABLES = ('rank_keys', 'rank_values', 'flush_values')
+    # the sum over the cards of a hand is the key of its ranks
+    CARD_KEYS = np.array([5 ** (card >> 2) for card in range(len(CARDS))], dtype=np.int64)
+    # the sum over the cards of a hand has the 13-bit mask of the ranks of every suit in its own 13 bits
+    CARD_BITS = np.array([1 << (card >> 2) << len(RANKS) * (card & 3) for card in range(len(CARDS))],
+                         dtype=np.int64)
+    SUIT_SHIFTS = len(RANKS) * np.arange(len(SUITS))
+
+    def __init__(self, directory=EVALUATOR_CACHE_DIR):
+        """
+        Parameters:
+            directory(str): where the tables are saved, they are built if the files don't exist
+        """
+        paths = [os.path.join(directory, name + '.npy') for name in self.TABLES]
+        if not all(os.path.exists(path) for path in paths):
+            os.makedirs(directory, exist_ok=True)
+            for path, table in zip(paths, build_evaluator_tables()):
+                # another process may read the file while it is written
+                temp_path = '{0}.{1}.tmp'.format(path, os.getpid())
+                with open(temp_path, 'wb') as stream:
+                    np.save(stream, table)
+                os.replace(temp_path, path)
+        self.rank_keys, self.rank_values, self.flush_values = [np.load(path, mmap_mode='r') for path in paths]
+
+    @classmethod
+    def shared(cls):
+        """
+        Returns:
+            evaluator(HandEvaluator): one evaluator for the whole process
+        """
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def evaluate(self, cards):
+        """
+        Parameters:
+            cards(numpy.ndarray): (..., 7) indices of the cards of every hand, see CARDS
+        Returns:
+            values(numpy.ndarray): (...) eval7 value of every hand, the bigger the better
+        """
+        cards = np.asarray(cards)
+        values = self.rank_values[np.searchsorted(self.rank_keys, self.CARD_KEYS[cards].sum(axis=-1))]
+        suit_masks = self.CARD_BITS[cards].sum(axis=-1)[..., None] >> self.SUIT_SHIFTS & (1 << len(RANKS)) - 1
+        # only one suit of 7 cards can have 5 cards
+        flush_values = self.flush_values[suit_masks].max(axis=-1)
+        return np.where(flush_values > 0, flush_values, values)
 
 
 def calc_equity(deck, hero_cards, table_cards, iters=100000):
@@ -10,26 +114,456 @@ def calc_equity(deck, hero_cards, table_cards, iters=100000):
         table_cards(list of str): cards that are on the table
         iters(int): the amount that the table generates
     Returns:
-
+        win_prob(float): probability in percent that hero wins against one random opponent
     """
-    deck = [eval7.Card(card) for card in deck]
-    table_cards = [eval7.Card(card) for card in table_cards]
-    hero_cards = [eval7.Card(card) for card in hero_cards]
-    max_table_cards = 5
+    evaluator = HandEvaluator.shared()
+    deck = np.array([CARD_INDEX[card] for card in deck], dtype=np.int64)
+    known_cards = np.array([CARD_INDEX[card] for card in hero_cards + table_cards], dtype=np.int64)
+    num_remaining = 5 - len(table_cards)
     win_count = 0
-    for _ in range(iters):
-        np.random.shuffle(deck)
-        num_remaining = max_table_cards - len(table_cards)
-        draw = deck[:num_remaining+2]
-        opp_hole, remaining_comm = draw[:2], draw[2:]
-        player_hand = hero_cards + table_cards + remaining_comm
-        opp_hand = opp_hole + table_cards + remaining_comm
-        player_strength = eval7.evaluate(player_hand)
-        opp_strength = eval7.evaluate(opp_hand)
-
-        if player_strength > opp_strength:
-            win_count += 1
+    for start in range(0, iters, EVALUATION_BATCH):
+        batch_size = min(EVALUATION_BATCH, iters - start)
+        draws = deck[np.argsort(np.random.random((batch_size, len(deck))), axis=1)[:, :num_remaining + 2]]
+        board = np.concatenate([np.broadcast_to(known_cards[2:], (batch_size, len(table_cards))), draws[:, 2:]],
+                               axis=1)
+        player_strength = evaluator.evaluate(
+            np.concatenate([np.broadcast_to(known_cards[:2], (batch_size, 2)), board], axis=1))
+        opp_strength = evaluator.evaluate(np.concatenate([draws[:, :2], board], axis=1))
+        win_count += np.count_nonzero(player_strength > opp_strength)
 
     win_prob = (win_count / iters) * 100
     return round(win_prob, 2)
 
+
+def enumerate_outcomes(hero_cards, table_cards):
+    """
+    go through all possible runouts and all opponent's hands
+    Parameters:
+        hero_cards(list of str): cards that belong to the hero
+        table_cards(list of str): cards that are on the table
+    Returns:
+        win_count(int): the number of outcomes that hero wins
+        tie_count(int): the number of outcomes with a split pot
+        total_count(int): the number of all outcomes
+    """
+    evaluator = HandEvaluator.shared()
+    deck = np.array([CARD_INDEX[card] for card in remove_cards(hero_cards, table_cards)])
+    hero_cards = [CARD_INDEX[card] for card in hero_cards]
+    table_cards = np.array([CARD_INDEX[card] for card in table_cards], dtype=np.int64)
+    runouts = list(combinations(deck, 5 - len(table_cards)))
+    runouts = np.array(runouts, dtype=np.int64).reshape(len(runouts), 5 - len(table_cards))
+    opp_holes = np.array(list(combinations(deck, 2)), dtype=np.int64)
+    boards = np.concatenate([np.broadcast_to(table_cards, (len(runouts), len(table_cards))), runouts], axis=1)
+    player_strengths = evaluator.evaluate(np.concatenate([np.broadcast_to(hero_cards, (len(boards), 2)), boards],
+                                                         axis=1))
+    win_count, tie_count, total_count = 0, 0, 0
+    # every chunk of runouts with all opponent's hands is scored at once
+    chunk_size = max(EVALUATION_BATCH // len(opp_holes), 1)
+    for start in range(0, len(boards), chunk_size):
+        chunk = slice(start, start + chunk_size)
+        overlaps = (opp_holes[None, :, :, None] == runouts[chunk, None, None, :]).any(axis=(2, 3))
+        board_rows, hole_rows = np.nonzero(~overlaps)
+        board_rows += start
+        opp_strengths = evaluator.evaluate(np.concatenate([opp_holes[hole_rows], boards[board_rows]], axis=1))
+        player_strength = player_strengths[board_rows]
+        win_count += np.count_nonzero(player_strength > opp_strengths)
+        tie_count += np.count_nonzero(player_strength == opp_strengths)
+        total_count += len(board_rows)
+    return win_count, tie_count, total_count
+
+
+def enumerate_equity(hero_cards, table_cards):
+    """
+    exact equity against one random opponent, a split pot counts as half of a win
+    Parameters:
+        hero_cards(list of str): cards that belong to the hero
+        table_cards(list of str): cards that are on the table
+    Returns:
+        equity(float): hero's share of the pot in percent
+    """
+    win_count, tie_count, total_count = enumerate_outcomes(hero_cards, table_cards)
+    return round((win_count + tie_count / 2) / total_count * 100, 2)
+
+
+def range_combos(hand_range, dead_cards):
+    """
+    Parameters:
+        hand_range(str): range in eval7 format, for example 'QQ+, AKs, AsKd'
+        dead_cards(set of int): indices of the cards that are already known
+    Returns:
+        combos(numpy.ndarray): (N, 2) indices of the cards of every hand in the range
+        probabilities(numpy.ndarray): probability to choose every hand
+    """
+    import eval7
+    combos, weights = [], []
+    for (first_card, second_card), weight in eval7.HandRange(hand_range).hands:
+        combo = [CARD_INDEX[str(first_card)], CARD_INDEX[str(second_card)]]
+        if combo[0] not in dead_cards and combo[1] not in dead_cards:
+            combos.append(combo)
+            weights.append(weight)
+    if not combos:
+        raise ValueError("The range '%s' has no hands without the known cards" % hand_range)
+    weights = np.array(weights, dtype=np.float64)
+    return np.array(combos), weights / weights.sum()
+
+
+def can_be_dealt(opponents_combos):
+    """
+    Parameters:
+        opponents_combos(list): result of range_combos for every opponent with a range, None for a random hand
+    Returns:
+        dealt(bool): every opponent with a range can get a hand from it without sharing a card with the others
+    """
+    # the narrowest ranges first, they fail sooner
+    ranged = sorted((combos[0].tolist() for combos in opponents_combos if combos is not None), key=len)
+
+    def deal(opponent, used_cards):
+        if opponent == len(ranged):
+            return True
+        return any(first not in used_cards and second not in used_cards and
+                   deal(opponent + 1, used_cards | {first, second}) for first, second in ranged[opponent])
+
+    return deal(0, frozenset())
+
+
+def sample_deals(rng, batch_size, known_cards, opponents_combos, num_board_cards):
+    """
+    draw opponents' hands and the rest of the board for the whole batch at once
+    Parameters:
+        rng(numpy.random.Generator): random generator
+        batch_size(int): the number of tables to generate
+        known_cards(list of int): indices of hero's cards and cards on the table
+        opponents_combos(list): result of range_combos for every opponent with a range, None for a random hand
+        num_board_cards(int): how many cards are missing on the table
+    Returns:
+        holes(numpy.ndarray): (M, opponents, 2) indices of opponents' cards
+        boards(numpy.ndarray): (M, num_board_cards) indices of the missing cards on the table.
+        M <= batch_size, because tables where the hands from the ranges overlap are dropped
+    """
+    rows = np.arange(batch_size)
+    used = np.zeros((batch_size, len(CARDS)), dtype=bool)
+    used[:, known_cards] = True
+    valid = np.ones(batch_size, dtype=bool)
+    holes = np.empty((batch_size, len(opponents_combos), 2), dtype=np.int64)
+    for opponent, combos in enumerate(opponents_combos):
+        if combos is None:
+            continue
+        chosen = combos[0][rng.choice(len(combos[0]), size=batch_size, p=combos[1])]
+        valid &= ~used[rows, chosen[:, 0]] & ~used[rows, chosen[:, 1]]
+        used[rows[:, None], chosen] = True
+        holes[:, opponent] = chosen
+    # random permutation of the cards that are left in the deck of every table
+    keys = rng.random((batch_size, len(CARDS)))
+    keys[used] = 2
+    random_opponents = [opponent for opponent, combos in enumerate(opponents_combos) if combos is None]
+    drawn = np.argsort(keys, axis=1)[:, :2 * len(random_opponents) + num_board_cards]
+    for position, opponent in enumerate(random_opponents):
+        holes[:, opponent] = drawn[:, 2 * position:2 * position + 2]
+    boards = drawn[:, 2 * len(random_opponents):]
+    return holes[valid], boards[valid]
+
+
+def pot_shares(hero_cards, table_cards, holes, boards):
+    """
+    Parameters:
+        hero_cards(list of int): indices of the cards that belong to the hero
+        table_cards(list of int): indices of the cards that are on the table
+        holes(numpy.ndarray): (M, opponents, 2) indices of opponents' cards
+        boards(numpy.ndarray): (M, missing cards) indices of the missing cards on the table
+    Returns:
+        shares(numpy.ndarray): part of the pot that hero gets on every table
+    """
+    evaluator = HandEvaluator.shared()
+    table_cards = np.asarray(table_cards, dtype=np.int64)
+    full_boards = np.concatenate([np.broadcast_to(table_cards, (len(boards), len(table_cards))), boards], axis=1)
+    player_strengths = evaluator.evaluate(
+        np.concatenate([np.broadcast_to(hero_cards, (len(boards), 2)), full_boards], axis=1))
+    opp_boards = np.broadcast_to(full_boards[:, None, :], (len(boards), holes.shape[1], full_boards.shape[1]))
+    opp_strengths = evaluator.evaluate(np.concatenate([holes, opp_boards], axis=2))
+    best_opp_strengths = opp_strengths.max(axis=1)
+    ties = np.count_nonzero(opp_strengths == player_strengths[:, None], axis=1)
+    shares = np.where(player_strengths > best_opp_strengths, 1.0, 0.0)
+    split = player_strengths == best_opp_strengths
+    shares[split] = 1 / (1 + ties[split])
+    return shares
+
+
+def iter_equity(hero_cards, table_cards, opponents=1, ranges=None, iters=100000, batch_size=5000, seed=None):
+    """
+    Monte Carlo equity against several opponents, a split pot gives hero the equal part of the pot
+    Parameters:
+        hero_cards(list of str): cards that belong to the hero
+        table_cards(list of str): cards that are on the table
+        opponents(int): the number of opponents
+        ranges(list of str): range in eval7 format or None (any hand) for every opponent
+        iters(int): the maximum amount of generated tables
+        batch_size(int): how many tables are generated at once
+        seed(int): seed of the random generator
+    Returns:
+        generator of EquityResult: the estimate after every batch
+    """
+    ranges = [None] * opponents if ranges is None else list(ranges)
+    if len(ranges) != opponents:
+        raise ValueError("Expected a range for each of %s opponents" % opponents)
+    rng = np.random.default_rng(seed)
+    known_cards = [CARD_INDEX[card] for card in hero_cards + table_cards]
+    opponents_combos = [None if hand_range is None else range_combos(hand_range, set(known_cards))
+                        for hand_range in ranges]
+    # otherwise every generated table would be dropped and the sampling would never end
+    if not can_be_dealt(opponents_combos):
+        raise ValueError("The ranges %s can't be dealt together with the known cards" % ranges)
+    hero_cards, table_cards = known_cards[:2], known_cards[2:]
+    shares_sum, shares_square_sum, samples = 0.0, 0.0, 0
+    while samples < iters:
+        holes, boards = sample_deals(rng, min(batch_size, iters - samples), known_cards,
+                                     opponents_combos, 5 - len(table_cards))
+        shares = pot_shares(hero_cards, table_cards, holes, boards)
+        shares_sum += shares.sum()
+        shares_square_sum += np.square(shares).sum()
+        samples += len(shares)
+        if samples == 0:
+            continue
+        mean = shares_sum / samples
+        variance = max(shares_square_sum / samples - mean ** 2, 0)
+        yield EquityResult(mean * 100, np.sqrt(variance / samples) * 100, samples)
+
+
+def combine_results(first, second):
+    """
+    Parameters:
+        first(EquityResult): estimate from one part of the generated tables
+        second(EquityResult): estimate from another part of the generated tables
+    Returns:
+        result(EquityResult): estimate over all generated tables
+    """
+    samples = first.samples + second.samples
+    if samples == 0:
+        return first
+    shares_sum, shares_square_sum = 0.0, 0.0
+    for result in (first, second):
+        mean, std_error = result.equity / 100, result.std_error / 100
+        shares_sum += mean * result.samples
+        shares_square_sum += (std_error ** 2 * result.samples + mean ** 2) * result.samples
+    mean = shares_sum / samples
+    variance = max(shares_square_sum / samples - mean ** 2, 0)
+    return EquityResult(mean * 100, np.sqrt(variance / samples) * 100, samples)
+
+
+def simulate_equity(hero_cards, table_cards, opponents=1, ranges=None, iters=100000, target_error=None,
+                    batch_size=5000, seed=None):
+    """
+    Monte Carlo equity that stops as soon as the standard error reaches target_error
+    Parameters:
+        target_error(float): the desired standard error in percent, None to generate all iters tables
+        other parameters are the same as in iter_equity
+    Returns:
+        result(EquityResult): equity, its standard error and the number of generated tables
+    """
+    result = EquityResult(0.0, 100.0, 0)
+    for result in iter_equity(hero_cards, table_cards, opponents, ranges, iters, batch_size, seed):
+        if target_error is not None and result.samples > 1 and result.std_error <= target_error:
+            break
+    return result
+
+
+def hand_class(hero_cards):
+    """
+    Parameters:
+        hero_cards(list of str): two cards that belong to the hero
+    Returns:
+        name(str): one of the 169 starting hands, for example 'AKs', 'T9o' or '77'
+    """
+    high, low = sorted(hero_cards, key=lambda card: RANKS.index(card[0]), reverse=True)
+    if high[0] == low[0]:
+        return high[0] + low[0]
+    return high[0] + low[0] + ('s' if high[1] == low[1] else 'o')
+
+
+def hand_class_cards(name):
+    """
+    Parameters:
+        name(str): one of the 169 starting hands, for example 'AKs', 'T9o' or '77'
+    Returns:
+        hero_cards(list of str): one of the hands that belong to the class
+    """
+    if len(name) == 2:
+        return [name[0] + 'c', name[1] + 'd']
+    return [name[0] + 'c', name[1] + ('c' if name[2] == 's' else 'd')]
+
+
+def all_hand_classes():
+    """
+    Returns:
+        names(list of str): all 169 starting hands
+    """
+    names = []
+    for i, high in enumerate(reversed(RANKS)):
+        for low in reversed(RANKS[:len(RANKS) - i]):
+            names += [high + low] if high == low else [high + low + 's', high + low + 'o']
+    return names
+
+
+def canonical_key(hero_cards, table_cards):
+    """
+    hands that differ only by renaming the suits have the same equity,
+    so all of them get the same key
+    Parameters:
+        hero_cards(list of str): cards that belong to the hero
+        table_cards(list of str): cards that are on the table
+    Returns:
+        key(tuple): the smallest (hero_cards, table_cards) over all renamings of the suits
+    """
+    keys = []
+    for suits in permutations(SUITS):
+        rename = dict(zip(SUITS, suits))
+        keys.append((tuple(sorted(card[0] + rename[card[1]] for card in hero_cards)),
+                     tuple(sorted(card[0] + rename[card[1]] for card in table_cards))))
+    return min(keys)
+
+
+def build_preflop_table(iters=100000, filename=PREFLOP_TABLE_PATH):
+    """
+    calculate win and tie probabilities of every starting hand against one random opponent
+    and save them to the yaml file
+    Parameters:
+        iters(int): the amount that the table generates for every starting hand
+        filename(str): where to save the table
+    Returns:
+        table(dict): key - starting hand, value - [win probability, tie probability] in percent
+    """
+    evaluator = HandEvaluator.shared()
+    table = {}
+    for name in all_hand_classes():
+        hero_cards = [CARD_INDEX[card] for card in hand_class_cards(name)]
+        deck = np.array([CARD_INDEX[card] for card in remove_cards(hand_class_cards(name), [])])
+        draws = deck[np.argsort(np.random.random((iters, len(deck))), axis=1)[:, :7]]
+        board = draws[:, 2:]
+        player_strength = evaluator.evaluate(np.concatenate([np.broadcast_to(hero_cards, (iters, 2)), board],
+                                                            axis=1))
+        opp_strength = evaluator.evaluate(np.concatenate([draws[:, :2], board], axis=1))
+        win_count = np.count_nonzero(player_strength > opp_strength)
+        tie_count = np.count_nonzero(player_strength == opp_strength)
+        table[name] = [round(win_count / iters * 100, 2), round(tie_count / iters * 100, 2)]
+    import yaml
+    with open(filename, 'w') as stream:
+        yaml.safe_dump(table, stream, sort_keys=False, default_flow_style=None)
+    return table
+
+
+def read_preflop_table(filename=PREFLOP_TABLE_PATH):
+    """
+    Returns:
+        table(dict): key - starting hand, value - [win probability, tie probability] in percent
+    """
+    return read_yaml(filename)
+
+
+def has_ranges(ranges):
+    """
+    Returns:
+        has_ranges(bool): at least one opponent has a range, a list of None is the same as no ranges
+    """
+    return ranges is not None and any(hand_range is not None for hand_range in ranges)
+
+
+class EquityEngine:
+    """
+    Chooses how to calculate hero's equity depending on the street:
+    preflop - lookup table of the 169 starting hands, flop - Monte Carlo,
+    turn and river - exact enumeration of all runouts and opponent's hands.
+    Against several opponents or opponents with ranges Monte Carlo is always used.
+    Results without ranges are memoized by the suit-isomorphic key of the hand
+    """
+
+    def __init__(self, iters=100000, target_error=0.25, cache_size=10000, preflop_table=None):
+        """
+        Parameters:
+            iters(int): the maximum amount that the table generates for Monte Carlo
+            target_error(float): Monte Carlo stops when the standard error (in percent) is not bigger than this
+            cache_size(int): how many results to keep
+            preflop_table(dict): starting hand equities, by default read from preflop_equity.yaml
+        """
+        self.iters = iters
+        self.target_error = target_error
+        self.cache_size = cache_size
+        self.preflop_table = preflop_table if preflop_table is not None else read_preflop_table()
+        self.cache = OrderedDict()
+        # the equity worker remembers results in the callback threads of its executor
+        # while the recognition thread looks them up
+        self.lock = threading.Lock()
+
+    def cache_key(self, hero_cards, table_cards, opponents=1, ranges=None):
+        """
+        Returns:
+            key(tuple): suit-isomorphic key of the hand, None if the result can't be memoized
+        """
+        if has_ranges(ranges):
+            return None
+        return canonical_key(hero_cards, table_cards) + (opponents,)
+
+    def is_exact(self, table_cards, opponents=1, ranges=None):
+        """
+        Returns:
+            Boolean Value(True or False): True, if the equity is calculated by enumeration
+        """
+        return opponents == 1 and not has_ranges(ranges) and len(table_cards) in (4, 5)
+
+    def lookup(self, hero_cards, table_cards, opponents=1, ranges=None):
+        """
+        Returns:
+            equity(float): the memoized equity or the equity from the preflop table,
+            None if the equity has to be calculated
+        """
+        key = self.cache_key(hero_cards, table_cards, opponents, ranges)
+        if key is None:
+            return None
+        with self.lock:
+            equity = self.cache.get(key)
+            if equity is not None:
+                self.cache.move_to_end(key)
+                return equity
+        if opponents == 1 and len(table_cards) == 0:
+            win_prob, tie_prob = self.preflop_table[hand_class(hero_cards)]
+            return self.remember(key, round(win_prob + tie_prob / 2, 2))
+        return None
+
+    def remember(self, key, equity):
+        """
+        Parameters:
+            key(tuple): result of cache_key, nothing is stored if it is None
+            equity(float): hero's share of the pot in percent
+        Returns:
+            equity(float): the same equity
+        """
+        if key is not None:
+            with self.lock:
+                self.cache[key] = equity
+                self.cache.move_to_end(key)
+                if len(self.cache) > self.cache_size:
+                    self.cache.popitem(last=False)
+        return equity
+
+    def equity(self, hero_cards, table_cards, opponents=1, ranges=None):
+        """
+        Parameters:
+            hero_cards(list of str): cards that belong to the hero
+            table_cards(list of str): cards that are on the table
+            opponents(int): the number of opponents
+            ranges(list of str): range in eval7 format or None (any hand) for every opponent
+        Returns:
+            equity(float): hero's share of the pot in percent, None if hero has no cards
+        """
+        if len(hero_cards) != 2 or opponents < 1:
+            return None
+        equity = self.lookup(hero_cards, table_cards, opponents, ranges)
+        if equity is not None:
+            return equity
+        key = self.cache_key(hero_cards, table_cards, opponents, ranges)
+        if key is not None:
+            hero_cards, table_cards = list(key[0]), list(key[1])
+        if self.is_exact(table_cards, opponents, ranges):
+            equity = enumerate_equity(hero_cards, table_cards)
+        else:
+            equity = round(simulate_equity(hero_cards, table_cards, opponents, ranges, self.iters,
+                                           self.target_error).equity, 2)
+        return self.remember(key, equity)
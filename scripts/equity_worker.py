@@ -0,0 +1,144 @@
+import multiprocessing
+import queue
+import threading
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from scripts.equity import EquityEngine, EquityResult, enumerate_equity, simulate_equity, combine_results
+
+# state_id - which table state the equity belongs to, final - True when the calculation is finished
+EquityUpdate = namedtuple('EquityUpdate', ['state_id', 'result', 'final'])
+
+
+def exact_job(hero_cards, table_cards):
+    """
+    Returns:
+        result(EquityResult): the exact equity, calculated in a worker process
+    """
+    return EquityResult(enumerate_equity(hero_cards, table_cards), 0.0, 0)
+
+
+def monte_carlo_job(hero_cards, table_cards, opponents, ranges, iters, seed):
+    """
+    Returns:
+        result(EquityResult): Monte Carlo estimate from one chunk of tables, calculated in a worker process
+    """
+    return simulate_equity(hero_cards, table_cards, opponents, ranges, iters, seed=seed)
+
+
+def create_executor(max_workers=None):
+    """
+    Returns:
+        executor(ProcessPoolExecutor): pool for equity jobs
+    """
+    # worker processes are started clean, the capture thread and the window are not forked
+    return ProcessPoolExecutor(max_workers, mp_context=multiprocessing.get_context('spawn'))
+
+
+class EquityWorker:
+    """
+    Calculates equity in a process pool, so the capture loop is never blocked.
+    Monte Carlo is split into chunks and every finished chunk puts a refined estimate into the queue.
+    When a new table state is submitted, the jobs of the old state are cancelled and their results dropped
+    """
+
+    def __init__(self, engine=None, max_workers=None, chunk_iters=10000, executor=None):
+        """
+        Parameters:
+            engine(EquityEngine): the engine whose cache, preflop table and precision are used
+            max_workers(int): the number of worker processes, by default the number of processors
+            chunk_iters(int): the amount of generated tables in one Monte Carlo job
+            executor(ProcessPoolExecutor): pool shared with other workers, by default the worker creates its own
+        """
+        self.engine = engine if engine is not None else EquityEngine()
+        self.own_executor = executor is None
+        self.executor = executor if executor is not None else create_executor(max_workers)
+        self.chunk_iters = chunk_iters
+        self.updates = queue.Queue()
+        self.lock = threading.RLock()
+        self.state_id = 0
+        self.futures = []
+        self.result = None
+
+    def submit(self, hero_cards, table_cards, opponents=1, ranges=None):
+        """
+        start calculating equity for the new table state
+        Returns:
+            state_id(int): the id of the state that the updates of this calculation have
+        """
+        with self.lock:
+            self.cancel()
+            self.state_id += 1
+            state_id = self.state_id
+            self.result = EquityResult(0.0, 100.0, 0)
+        if len(hero_cards) != 2 or opponents < 1:
+            self.updates.put(EquityUpdate(state_id, None, True))
+            return state_id
+        equity = self.engine.lookup(hero_cards, table_cards, opponents, ranges)
+        if equity is not None:
+            self.updates.put(EquityUpdate(state_id, EquityResult(equity, 0.0, 0), True))
+            return state_id
+        key = self.engine.cache_key(hero_cards, table_cards, opponents, ranges)
+        if self.engine.is_exact(table_cards, opponents, ranges):
+            jobs = [(exact_job, hero_cards, table_cards)]
+        else:
+            jobs = [(monte_carlo_job, hero_cards, table_cards, opponents, ranges, self.chunk_iters, None)
+                    for _ in range(-(-self.engine.iters // self.chunk_iters))]
+        with self.lock:
+            if state_id != self.state_id:
+                return state_id
+            self.futures = [self.executor.submit(*job) for job in jobs]
+            for future in self.futures:
+                future.add_done_callback(lambda done, key=key: self.on_done(done, state_id, key))
+        return state_id
+
+    def on_done(self, future, state_id, key):
+        """
+        combine the result of a finished job with the results of the other jobs of the same state
+        """
+        if future.cancelled():
+            return
+        with self.lock:
+            if state_id != self.state_id or future not in self.futures:
+                return
+            if future.exception() is not None:
+                self.cancel()
+                self.updates.put(EquityUpdate(state_id, None, True))
+                return
+            if future.result().samples == 0:
+                self.result = future.result()
+                final = True
+            else:
+                self.result = combine_results(self.result, future.result())
+                final = all(job.done() for job in self.futures) \
+                    or self.result.std_error <= self.engine.target_error
+            if final:
+                self.cancel()
+                self.engine.remember(key, round(self.result.equity, 2))
+            self.updates.put(EquityUpdate(state_id, self.result, final))
+
+    def cancel(self):
+        """
+        cancel the jobs that haven't started yet, results of the running jobs will be dropped
+        """
+        for future in self.futures:
+            future.cancel()
+        self.futures = []
+
+    def latest(self):
+        """
+        Returns:
+            update(EquityUpdate): the newest update of the current state, None if there are no new updates
+        """
+        update = None
+        while True:
+            try:
+                candidate = self.updates.get_nowait()
+            except queue.Empty:
+                return update
+            if candidate.state_id == self.state_id:
+                update = candidate
+
+    def shutdown(self):
+        self.cancel()
+        if self.own_executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
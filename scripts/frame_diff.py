@@ -0,0 +1,111 @@
+import hashlib
+from collections import Counter
+
+# config sections with the regions of the table which are watched for changes
+REGIONS = ('hero_step_define', 'hero_cards', 'table_cards', 'pot', 'players_bet', 'players_coordinates')
+
+
+class RegionChangeDetector:
+    """
+    Keeps a hash of every region of the table from the config and reuses recognition results
+    for the regions that have not changed since the result was computed
+    """
+
+    def __init__(self, cfg, regions=REGIONS):
+        """
+        Parameters:
+            cfg(dict): config file
+            regions(tuple of str): config sections with region coordinates
+        """
+        self.bboxes = {name: region_bboxes(cfg[name]) for name in regions}
+        self.hashes = {}
+        self.results = {}
+        self.hits = Counter()
+        self.misses = Counter()
+
+    def update(self, img, regions=None):
+        """
+        calculate hashes of the regions of a new frame, the hashes of the other regions stay as they were
+        Parameters:
+            img(numpy.ndarray): image of the whole table
+            regions(tuple of str): regions to hash, by default all regions
+        Returns:
+            changed_regions(list of str): regions that differ from the previous frame
+        """
+        hashes = {name: region_hash(img, self.bboxes[name]) for name in (regions or self.bboxes)}
+        changed_regions = [name for name, value in hashes.items() if self.hashes.get(name) != value]
+        self.hashes.update(hashes)
+        return changed_regions
+
+    def cached(self, key, func, regions=None):
+        """
+        Parameters:
+            key(str): name of the result, by default it is also the name of the region it depends on
+            func(callable): function that recognizes the result from the current frame
+            regions(tuple of str): regions on which the result depends
+        Returns:
+            result: the cached result if none of the regions changed, otherwise the new result of func()
+        """
+        signature = tuple(self.hashes[name] for name in (regions or (key,)))
+        cached_result = self.results.get(key)
+        if cached_result is not None and cached_result[0] == signature:
+            self.hits[key] += 1
+            return cached_result[1]
+        self.misses[key] += 1
+        result = func()
+        self.results[key] = (signature, result)
+        return result
+
+    def reset(self):
+        """
+        forget all cached results and counters
+        """
+        self.hashes = {}
+        self.results = {}
+        self.hits.clear()
+        self.misses.clear()
+
+    def stats(self):
+        """
+        Returns:
+            stats(dict): key - result name, value - (hits, misses) tuple
+        """
+        return {key: (self.hits[key], self.misses[key]) for key in sorted(set(self.hits) | set(self.misses))}
+
+    def report(self):
+        """
+        Returns:
+            text(str): hit/miss counters of every result in one line per result
+        """
+        lines = []
+        for key, (hits, misses) in self.stats().items():
+            hit_rate = 100 * hits / (hits + misses)
+            lines.append('{0}: hits={1} misses={2} hit_rate={3:.1f}%'.format(key, hits, misses, hit_rate))
+        return '\n'.join(lines)
+
+
+def region_bboxes(region):
+    """
+    Parameters:
+        region(dict): config section, either with x_0, y_0, x_1, y_1 keys
+        or with player number keys and [x_0, y_0, x_1, y_1] values
+    Returns:
+        bboxes(list of lists of int): bounding boxes in [x_0, y_0, x_1, y_1] format
+    """
+    if 'x_0' in region:
+        return [[region['x_0'], region['y_0'], region['x_1'], region['y_1']]]
+    return [region[key] for key in sorted(region)]
+
+
+def region_hash(img, bboxes):
+    """
+    Parameters:
+        img(numpy.ndarray): image of the whole table
+        bboxes(list of lists of int): bounding boxes in [x_0, y_0, x_1, y_1] format
+    Returns:
+        digest(bytes): hash of the pixels inside all bounding boxes
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for bbox in bboxes:
+        digest.update(img[bbox[1]:bbox[3], bbox[0]:bbox[2]].tobytes())
+    return digest.digest()
@@ -0,0 +1,162 @@
+import multiprocessing
+import time
+from multiprocessing import shared_memory
+import numpy as np
+
+# fields of the header of the ring, the arrays of the slots and of the readers follow them
+WRITE_SEQ, LATEST, CLOSED = range(3)
+HEADER_FIELDS = 3
+# the frames start at a cache line boundary
+FRAMES_ALIGNMENT = 64
+
+
+def ring_layout(shape, slots, readers):
+    """
+    Returns:
+        header_size(int): number of int64 fields: the header, sequence numbers of the slots,
+        the slots pinned by the readers, frames read and skipped by every reader
+        frames_offset(int): where the frames start in the shared memory, the capture times of the slots come before
+        size(int): size of the shared memory in bytes
+    """
+    header_size = HEADER_FIELDS + slots + 3 * readers
+    times_end = header_size * 8 + slots * 8
+    frames_offset = -(-times_end // FRAMES_ALIGNMENT) * FRAMES_ALIGNMENT
+    return header_size, frames_offset, frames_offset + slots * int(np.prod(shape))
+
+
+def attach_frame_ring(name, shape, slots, readers, condition):
+    return FrameRing(shape, slots, readers, name=name, condition=condition)
+
+
+class FrameRing:
+    """
+    Ring of frames of one table in shared memory. The capture process writes every frame once into a free slot,
+    the recognition thread of the table in the main process reads the newest frame as a NumPy view of its slot
+    without copying. A reader that falls behind gets the newest frame and the frames in between are counted
+    as skipped.
+    The writer never writes into the newest slot or into a slot pinned by a reader, so a frame stays valid
+    until its reader asks for the next one. The ring needs at least readers + 2 slots
+    """
+
+    def __init__(self, shape, slots=3, readers=1, name=None, condition=None):
+        """
+        Parameters:
+            shape(tuple): shape of a uint8 frame, e.g. (height, width, 4) of a BGRA screenshot
+            slots(int): number of frames in the ring
+            readers(int): number of readers that read the ring at the same time
+            name(str): name of an existing ring to attach to, None - create a new ring, the creator unlinks it
+            condition(multiprocessing.Condition): condition of the ring being attached to
+        """
+        if slots < readers + 2:
+            raise ValueError("A ring for %s readers needs at least %s slots" % (readers, readers + 2))
+        self.shape = tuple(shape)
+        self.slots = slots
+        self.readers = readers
+        header_size, frames_offset, size = ring_layout(self.shape, slots, readers)
+        self.owner = name is None
+        self.shm = shared_memory.SharedMemory(name=name, create=self.owner, size=size)
+        self.condition = multiprocessing.Condition() if condition is None else condition
+        self.header = np.ndarray((header_size,), dtype=np.int64, buffer=self.shm.buf)
+        self.sequences = self.header[HEADER_FIELDS:HEADER_FIELDS + slots]
+        self.pins, self.reads, self.skipped = self.header[HEADER_FIELDS + slots:].reshape(3, readers)
+        self.times = np.ndarray((slots,), dtype=np.float64, buffer=self.shm.buf, offset=header_size * 8)
+        self.frames = np.ndarray((slots,) + self.shape, dtype=np.uint8, buffer=self.shm.buf, offset=frames_offset)
+        if self.owner:
+            self.header[:] = 0
+            self.header[LATEST] = -1
+            self.pins[:] = -1
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def __reduce__(self):
+        # another process attaches to the same shared memory, the condition can only be passed to a new process
+        return attach_frame_ring, (self.name, self.shape, self.slots, self.readers, self.condition)
+
+    def write(self, frame, capture_time=None):
+        """
+        copy the frame into a free slot and make it the newest one
+        Parameters:
+            frame(numpy.ndarray): frame of the ring's shape
+            capture_time(float): unix time of the capture, None - now
+        Returns:
+            seq(int): sequence number of the frame, the first frame is 1
+        """
+        with self.condition:
+            busy = set(self.pins.tolist()) | {int(self.header[LATEST])}
+            # the oldest of the free slots
+            slot = min((slot for slot in range(self.slots) if slot not in busy), key=lambda i: self.sequences[i])
+        np.copyto(self.frames[slot], frame)
+        with self.condition:
+            self.header[WRITE_SEQ] += 1
+            seq = int(self.header[WRITE_SEQ])
+            self.sequences[slot] = seq
+            self.times[slot] = time.time() if capture_time is None else capture_time
+            self.header[LATEST] = slot
+            self.condition.notify_all()
+        return seq
+
+    def read(self, last_seq=0, reader=0, timeout=None):
+        """
+        wait for a frame newer than last_seq and pin its slot until the next read of the reader
+        Parameters:
+            last_seq(int): sequence number of the frame the reader has processed, 0 - none
+            reader(int): number of the reader
+            timeout(float): how long to wait for a new frame, None - until a frame comes or the ring is closed
+        Returns:
+            seq(int): sequence number of the newest frame, None if there is no new frame
+            frame(numpy.ndarray): read-only view of the frame in the shared memory, None if there is no new frame
+            capture_time(float): unix time of the capture, None if there is no new frame
+        """
+        with self.condition:
+            self.condition.wait_for(lambda: self.header[WRITE_SEQ] > last_seq or self.header[CLOSED], timeout)
+            if self.header[WRITE_SEQ] <= last_seq:
+                return None, None, None
+            slot = int(self.header[LATEST])
+            seq = int(self.sequences[slot])
+            self.pins[reader] = slot
+            self.reads[reader] += 1
+            if last_seq:
+                self.skipped[reader] += seq - last_seq - 1
+            capture_time = float(self.times[slot])
+        frame = self.frames[slot].view()
+        frame.flags.writeable = False
+        return seq, frame, capture_time
+
+    def release(self, reader=0):
+        """
+        unpin the frame of the reader, the writer may reuse its slot
+        """
+        with self.condition:
+            self.pins[reader] = -1
+
+    def stop(self):
+        """
+        wake up the readers, read() doesn't wait for new frames anymore
+        """
+        with self.condition:
+            self.header[CLOSED] = 1
+            self.condition.notify_all()
+
+    def stats(self):
+        """
+        Returns:
+            stats(dict): frames written, read and skipped by every reader
+        """
+        with self.condition:
+            return {'written': int(self.header[WRITE_SEQ]), 'read': self.reads.tolist(),
+                    'skipped': self.skipped.tolist()}
+
+    def close(self):
+        """
+        detach from the shared memory, the creator of the ring also removes it
+        """
+        self.header = self.sequences = self.pins = self.reads = self.skipped = self.times = self.frames = None
+        try:
+            self.shm.close()
+        except BufferError:
+            # a reader still holds a view of a frame, the memory is unmapped when the view is gone
+            pass
+        if self.owner:
+            self.shm.unlink()
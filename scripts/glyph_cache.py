@@ -0,0 +1,97 @@
+import hashlib
+import threading
+from collections import Counter, OrderedDict
+
+
+def glyph_key(binary_img):
+    """
+    Parameters:
+        binary_img(numpy.ndarray): binarized crop of a glyph
+    Returns:
+        digest(bytes): hash of the size and the pixels of the crop
+    """
+    digest = hashlib.blake2b(repr(binary_img.shape).encode(), digest_size=16)
+    digest.update(binary_img.tobytes())
+    return digest.digest()
+
+
+class GlyphCache:
+    """
+    Results of glyph classification keyed by the hash of the binarized crop.
+    Hero's cards stay the same for the whole hand and the cards on the table don't change once dealt,
+    so most glyphs are taken from here without resizing and comparing them with the templates.
+    Every category of glyphs (the template folder) has its own namespace with the last max_size glyphs
+    """
+
+    def __init__(self, max_size=1024):
+        """
+        Parameters:
+            max_size(int): how many glyphs to keep in every namespace
+        """
+        self.max_size = max_size
+        self.namespaces = {}
+        self.hits = Counter()
+        self.misses = Counter()
+        self.lock = threading.Lock()
+
+    def classify(self, namespace, classifier, imgs, binary_imgs):
+        """
+        Parameters:
+            namespace(str): category of the glyphs, e.g. 'hero_cards_suits'
+            classifier(GlyphClassifier): classifier of the category, it gets only the glyphs that are not cached
+            imgs(list of numpy.ndarray): images of glyphs
+            binary_imgs(list of numpy.ndarray): binarized crops of the same glyphs
+        Returns:
+            labels(list of str): the name of the closest template for every glyph
+        """
+        keys = [glyph_key(binary_img) for binary_img in binary_imgs]
+        labels = [None] * len(keys)
+        with self.lock:
+            entries = self.namespaces.setdefault(namespace, OrderedDict())
+            for i, key in enumerate(keys):
+                label = entries.get(key)
+                if label is not None:
+                    entries.move_to_end(key)
+                    labels[i] = label
+            missed = [i for i, label in enumerate(labels) if label is None]
+            self.hits[namespace] += len(keys) - len(missed)
+            self.misses[namespace] += len(missed)
+        if not missed:
+            return labels
+        new_labels, _ = classifier.classify([imgs[i] for i in missed])
+        with self.lock:
+            for i, label in zip(missed, new_labels):
+                labels[i] = entries[keys[i]] = label
+                if len(entries) > self.max_size:
+                    entries.popitem(last=False)
+        return labels
+
+    def clear(self, namespaces=None):
+        """
+        forget the glyphs, for example after the templates were reloaded
+        Parameters:
+            namespaces(list of str): which namespaces to clear, all if None
+        """
+        with self.lock:
+            for namespace in list(self.namespaces) if namespaces is None else namespaces:
+                self.namespaces.pop(namespace, None)
+
+    def stats(self):
+        """
+        Returns:
+            stats(dict): key - namespace, value - (hits, misses) tuple
+        """
+        with self.lock:
+            return {namespace: (self.hits[namespace], self.misses[namespace])
+                    for namespace in sorted(set(self.hits) | set(self.misses))}
+
+    def report(self):
+        """
+        Returns:
+            text(str): hit/miss counters of every namespace in one line per namespace
+        """
+        lines = []
+        for namespace, (hits, misses) in self.stats().items():
+            hit_rate = 100 * hits / (hits + misses) if hits + misses else 0.0
+            lines.append('{0}: hits={1} misses={2} hit_rate={3:.1f}%'.format(namespace, hits, misses, hit_rate))
+        return '\n'.join(lines)
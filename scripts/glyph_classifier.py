@@ -0,0 +1,76 @@
+import cv2
+import numpy as np
+from scripts.profiling import profiled, profiler
+
+
+class GlyphClassifier:
+    """
+    Recognition of glyphs (suits, card values, pot digits) against all templates of one category at once.
+    All templates are resized to one common size and stacked into a single (N, H*W) matrix,
+    so every glyph is resized only once and compared with all templates by one matrix product
+    """
+
+    def __init__(self, templates, color_of_img):
+        """
+        Parameters:
+            templates(dict): key - template name, value - template image (see TemplateBank)
+            color_of_img(int): cv2.IMREAD_COLOR or cv2.IMREAD_GRAYSCALE
+        """
+        colors = [cv2.IMREAD_COLOR, cv2.IMREAD_GRAYSCALE]
+        if color_of_img not in colors:
+            raise ValueError("Invalid method. Expected one of: %s" % colors)
+        self.color_of_img = color_of_img
+        self.names = sorted(templates)
+        self.height = max(templates[name].shape[0] for name in self.names)
+        self.width = max(templates[name].shape[1] for name in self.names)
+        stacked = np.stack([cv2.resize(templates[name], (self.width, self.height)) for name in self.names])
+        self.templates = stacked.reshape(len(self.names), -1).astype(np.float64)
+        self.templates_norm = np.einsum('ij,ij->i', self.templates, self.templates)
+
+    def prepare(self, img):
+        """
+        Parameters:
+            img(numpy.ndarray): image of a glyph in BGR format
+        Returns:
+            vector(numpy.ndarray): the glyph resized to the size of the templates as a flat vector
+        """
+        res_img = cv2.resize(img, (self.width, self.height))
+        if self.color_of_img == cv2.IMREAD_GRAYSCALE:
+            res_img = cv2.cvtColor(res_img, cv2.COLOR_BGR2GRAY)
+        return res_img.reshape(-1)
+
+    def errors(self, imgs):
+        """
+        Parameters:
+            imgs(list of numpy.ndarray): images of glyphs
+        Returns:
+            err(numpy.ndarray): (len(imgs), number of templates) matrix
+            with 'Mean Squared Error' between every glyph and every template
+        """
+        vectors = np.stack([self.prepare(img) for img in imgs]).astype(np.float64)
+        vectors_norm = np.einsum('ij,ij->i', vectors, vectors)
+        err = vectors_norm[:, None] - 2 * vectors @ self.templates.T + self.templates_norm[None, :]
+        return np.maximum(err, 0) / (self.height * self.width)
+
+    @profiled('glyph_classifier.classify')
+    def classify(self, imgs):
+        """
+        Parameters:
+            imgs(list of numpy.ndarray): images of glyphs
+        Returns:
+            labels(list of str): the name of the closest template for every glyph
+            margins(numpy.ndarray): difference between the errors of the second and the first
+            closest templates, the bigger it is, the more confident the recognition
+        """
+        if len(imgs) == 0:
+            return [], np.empty(0)
+        err = self.errors(imgs)
+        profiler.add_comparisons('glyph_classifier.classify', err.size)
+        best = np.argmin(err, axis=1)
+        if len(self.names) > 1:
+            two_smallest = np.partition(err, 1, axis=1)[:, :2]
+            margins = two_smallest[:, 1] - two_smallest[:, 0]
+        else:
+            margins = np.full(len(imgs), np.inf)
+        labels = [self.names[i] for i in best]
+        return labels, margins
@@ -1,42 +1,195 @@
-from PIL import Image
-import numpy as np
-import cv2
-from mss import mss
-from pokerstars_recognition import PokerStarsTableRecognizer
-from utils import read_config_file, set_window_size, remove_cards, data_concatenate
-from equity import calc_equity
-from info_box import update_label
-
-sct = mss()
-config = read_config_file()
-set_window_size()
-
-table_data = []
-while True:
-    updated_table_data = []
-    monitor = {'top': 80, 'left': 70, 'width': config['table_size']['width'],
-               'height': config['table_size']['height']}
-    img = Image.frombytes('RGB', (config['table_size']['width'], config['table_size']['height']),
-                          sct.grab(monitor).rgb)
-    img = cv2.cvtColor(np.array(img), cv2.COLOR_BGR2RGB)
-    recognizer = PokerStarsTableRecognizer(img, config)
-    hero_step = recognizer.detect_hero_step()
-    if hero_step:
-        hero_cards = recognizer.detect_hero_cards()
-        table_cards = recognizer.detect_table_cards()
-        total_pot = recognizer.find_total_pot()
-        updated_table_data.append([hero_cards, table_cards, total_pot])
-        if table_data == updated_table_data:
-            pass
+import multiprocessing
+import signal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from scripts.capture import ScreenCapture
+from scripts.capture_scheduler import CaptureScheduler
+from scripts.frame_ring import FrameRing
+from scripts.utils import set_window_size
+from scripts.startup_cache import load_startup
+from scripts.equity import EquityEngine, read_preflop_table
+from scripts.equity_worker import EquityWorker, create_executor
+from scripts.table_session import TableSession
+from scripts.profiling import profiler
+from scripts.hand_history import HandHistoryStore, HandRecorder
+from scripts.output_sinks import OutputHub, JsonLinesSink, SocketSink
+
+
+def table_rect(config, rect):
+    """
+    Parameters:
+        config(dict): config file
+        rect(dict): position of the table on the screen, the size is optional
+    Returns:
+        rect(dict): position and size of the table, by default the size is table_size of the config
+    """
+    return {'top': rect['top'], 'left': rect['left'],
+            'width': rect.get('width', config['table_size']['width']),
+            'height': rect.get('height', config['table_size']['height'])}
+
+
+def screen_area(rects):
+    """
+    Parameters:
+        rects(list of dict): position and size of every table on the screen
+    Returns:
+        monitor(dict): the smallest area of the screen that contains all tables
+    """
+    top = min(rect['top'] for rect in rects)
+    left = min(rect['left'] for rect in rects)
+    return {'top': top, 'left': left,
+            'width': max(rect['left'] + rect['width'] for rect in rects) - left,
+            'height': max(rect['top'] + rect['height'] for rect in rects) - top}
+
+
+def capture_loop(rects, rings, hero_flags, capture_config, stop):
+    """
+    runs in the capture process: grab the area of all tables once when the scheduler says a table is due
+    and write the views of the due tables into their rings. Recognition reads the newest frames from the rings
+    in the main process, so neither the grabs nor the copies of the frames wait for recognition or take the GIL
+    from it
+    Parameters:
+        rects(list of dict): position and size of every table on the screen
+        rings(list of FrameRing): ring of every table
+        hero_flags(multiprocessing.Array): hero is to act on the last recognized frame of the table
+        capture_config(dict): capture section of the config
+        stop(multiprocessing.Event): stops the capture
+    """
+    # Ctrl+C is handled by the main process, it stops the capture with the event
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    area = screen_area(rects)
+    capture = ScreenCapture(area)
+    # place of every table in the grabbed area
+    views = [(slice(rect['top'] - area['top'], rect['top'] - area['top'] + rect['height']),
+              slice(rect['left'] - area['left'], rect['left'] - area['left'] + rect['width'])) for rect in rects]
+    scheduler = CaptureScheduler(len(rects), **capture_config)
+    while not stop.is_set():
+        indexes = scheduler.wait_due()
+        frame = capture.grab()
+        capture_time = time.time()
+        for index in indexes:
+            # the view is copied only once, into the shared memory of the ring
+            rings[index].write(frame[views[index]], capture_time)
+            # the rate of the table follows its last recognized frame
+            scheduler.done(index, bool(hero_flags[index]))
+    print(scheduler.report())
+
+
+def recognition_loop(session, ring, hero_flags, index):
+    """
+    runs in a thread of the main process: recognize the newest frame of the table until the ring is stopped.
+    The frame is a view of the ring's shared memory, a thread that is slower than the capture skips the frames
+    it had no time for
+    """
+    seq = 0
+    while True:
+        seq, frame, _ = ring.read(seq)
+        if seq is None:
+            break
+        session.process(frame)
+        hero_flags[index] = bool(session.tracker.hero_step)
+        profiler.end_frame()
+
+
+def create_sinks(config, tables_count):
+    """
+    Returns:
+        sinks(list of OutputSink): sinks from the output section of the config
+        tk_sink(TkSink): the sink with the windows, None if the program runs without windows
+    """
+    sinks, tk_sink = [], None
+    for name in config['output']['sinks']:
+        if name == 'tk':
+            # tkinter is imported only when the windows are shown
+            from scripts.info_box import TkSink
+            tk_sink = TkSink(tables_count, config['info_box_size'])
+            sinks.append(tk_sink)
+        elif name == 'json':
+            sinks.append(JsonLinesSink(config['output']['json_path']))
+        elif name == 'socket':
+            sinks.append(SocketSink(port=config['output']['socket_port']))
+        else:
+            raise ValueError("Unknown output sink: %s" % name)
+    return sinks, tk_sink
+
+
+def publish_loop(config, sessions, hub):
+    """
+    send the new states of the tables to the sinks, the sinks drop the states they had no time to show
+    """
+    last_export = time.monotonic()
+    while True:
+        for number, session in enumerate(sessions, start=1):
+            update = session.next_update(number)
+            if update is not None:
+                hub.publish(update)
+        if profiler.enabled and time.monotonic() - last_export > config['profiling']['export_interval']:
+            profiler.write_prometheus(config['profiling']['prometheus_file'])
+            last_export = time.monotonic()
+        time.sleep(config['output']['interval'])
+
+
+def main():
+    config, templates = load_startup()
+    # with one table of the default size the active window is moved to its place,
+    # several tables and tables of other sizes should be arranged by hand
+    if len(config['tables']) == 1 and 'width' not in config['tables'][0]:
+        set_window_size(config['window']['title'], config['window']['timeout'])
+    rects = [table_rect(config, rect) for rect in config['tables']]
+    rings = [FrameRing((rect['height'], rect['width'], 4), config['frame_ring']['slots']) for rect in rects]
+    hero_flags = multiprocessing.Array('b', len(rects), lock=False)
+    stop = multiprocessing.Event()
+    # the capture process is started before any thread of this process
+    capture = multiprocessing.Process(target=capture_loop, args=(rects, rings, hero_flags, config['capture'], stop),
+                                      daemon=True)
+    capture.start()
+    preflop_table = read_preflop_table()
+    equity_pool = create_executor()
+    # the independent recognition stages of every table run in parallel
+    stage_pool = ThreadPoolExecutor(config['recognition']['stage_threads'])
+    history = HandHistoryStore(config['hand_history']['path']) if config['hand_history']['enabled'] else None
+    sessions = [TableSession(config, templates, EquityWorker(EquityEngine(preflop_table=preflop_table),
+                                                             executor=equity_pool), rect,
+                             HandRecorder(history, number) if history is not None else None, stage_pool)
+                for number, rect in enumerate(rects, start=1)]
+    if config['profiling']['enabled']:
+        profiler.enable()
+    signal.signal(signal.SIGUSR1, lambda signum, frame: profiler.toggle())
+    for index, (session, ring) in enumerate(zip(sessions, rings)):
+        threading.Thread(target=recognition_loop, args=(session, ring, hero_flags, index), daemon=True).start()
+    sinks, tk_sink = create_sinks(config, len(sessions))
+    hub = OutputHub(sinks)
+    hub.start()
+    threading.Thread(target=publish_loop, args=(config, sessions, hub), daemon=True).start()
+    try:
+        if tk_sink is not None:
+            tk_sink.mainloop()
         else:
-            table_data = updated_table_data
-            deck = remove_cards(hero_cards, table_cards)
-            equity = calc_equity(deck, hero_cards, table_cards)
-            players_info = recognizer.get_dealer_button_position()
-            players_info = recognizer.get_empty_seats(players_info)
-            players_info = recognizer.get_so_players(players_info)
-            players_info = recognizer.assign_positions(players_info)
-            players_info = recognizer.find_players_bet(players_info)
-            text = data_concatenate(hero_cards, table_cards, total_pot, equity, players_info)
-            update_label(text)
+            while True:
+                time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        capture.join(1)
+        for ring in rings:
+            ring.stop()
+        hub.close()
+        equity_pool.shutdown(wait=False, cancel_futures=True)
+        stage_pool.shutdown(wait=False, cancel_futures=True)
+        if history is not None:
+            history.close()
+        for number, session in enumerate(sessions, start=1):
+            # how many recognitions were skipped because the regions did not change
+            print('Table {0}:\n{1}\n{2}'.format(number, session.detector.report(), session.graph.report()))
+        for number, ring in enumerate(rings, start=1):
+            # frames that recognition had no time for
+            print('Table {0} frames: {1}'.format(number, ring.stats()))
+            ring.close()
+        print('Glyphs:\n{0}'.format(templates.glyph_cache.report()))
+        print('Stale updates dropped by the sinks: {0}'.format(hub.dropped()))
+
 
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,318 @@
+import queue
+import sqlite3
+import threading
+import time
+from collections import namedtuple, defaultdict
+from scripts.hand_state import NewHand, StreetChanged, BoardCardsDealt, PotChanged, PlayersChanged, HandFinished, \
+    PREFLOP
+from scripts.numeric_reader import parse_amount
+
+# one finished hand. hero_cards and board are stored as 'AsKd' strings, street - the last street of the hand,
+# equity - hero's equity on the last street in percent, players - list of HandPlayer.
+# The result of the hand is not stored: neither hero's stack nor hero's bets nor the winner of the pot are recognized
+HandRecord = namedtuple('HandRecord', ['table_id', 'started', 'hero_cards', 'hero_position', 'board',
+                                       'street', 'total_pot', 'equity', 'players'])
+# preflop_bet - the biggest bet of the player before the flop,
+# vpip - the player voluntarily put money in the pot, None for hero whose bets are not recognized
+HandPlayer = namedtuple('HandPlayer', ['position', 'is_hero', 'preflop_bet', 'vpip'])
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS hands (
+    hand_id INTEGER PRIMARY KEY,
+    table_id INTEGER NOT NULL,
+    started REAL NOT NULL,
+    hero_cards TEXT NOT NULL,
+    hero_position TEXT,
+    board TEXT NOT NULL,
+    board_texture TEXT NOT NULL,
+    street TEXT NOT NULL,
+    total_pot REAL,
+    equity REAL
+);
+CREATE TABLE IF NOT EXISTS players (
+    hand_id INTEGER NOT NULL REFERENCES hands(hand_id),
+    position TEXT NOT NULL,
+    is_hero INTEGER NOT NULL,
+    preflop_bet REAL,
+    vpip INTEGER
+);
+CREATE INDEX IF NOT EXISTS players_hand ON players(hand_id);
+CREATE INDEX IF NOT EXISTS players_position ON players(position, is_hero);
+CREATE INDEX IF NOT EXISTS hands_position ON hands(hero_position);
+CREATE INDEX IF NOT EXISTS hands_texture ON hands(board_texture);
+-- totals that are updated with every batch, so the aggregates don't depend on the number of hands,
+-- position_totals are the opponents' only
+CREATE TABLE IF NOT EXISTS position_totals (
+    position TEXT PRIMARY KEY,
+    hands INTEGER NOT NULL,
+    vpip_hands INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS equity_totals (
+    equity_percent INTEGER PRIMARY KEY,
+    hands INTEGER NOT NULL,
+    equity_sum REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS texture_totals (
+    board_texture TEXT PRIMARY KEY,
+    hands INTEGER NOT NULL,
+    equity_hands INTEGER NOT NULL,
+    equity_sum REAL NOT NULL
+);
+"""
+
+
+def board_texture(board):
+    """
+    Parameters:
+        board(list of str): cards on the table
+    Returns:
+        texture(str): texture of the flop, e.g. 'rainbow', 'two_tone_paired', 'monotone', 'preflop' if there is no flop
+    """
+    if len(board) < 3:
+        return 'preflop'
+    flop = board[:3]
+    suits = len({card[1] for card in flop})
+    texture = {1: 'monotone', 2: 'two_tone', 3: 'rainbow'}[suits]
+    if len({card[0] for card in flop}) < 3:
+        texture += '_paired'
+    return texture
+
+
+def connect(path):
+    connection = sqlite3.connect(path, check_same_thread=False)
+    # readers don't block the writer and the writer doesn't block readers
+    connection.execute('PRAGMA journal_mode=WAL')
+    connection.execute('PRAGMA synchronous=NORMAL')
+    return connection
+
+
+class HandHistoryStore:
+    """
+    Append-only storage of finished hands in SQLite.
+    Hands are written by a background thread in batches, so append() never waits for the disk
+    """
+
+    def __init__(self, path, batch_size=500):
+        """
+        Parameters:
+            path(str): SQLite database file
+            batch_size(int): the biggest number of hands written in one transaction
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.connection = connect(path)
+        self.connection.executescript(SCHEMA)
+        self.next_hand_id = (self.connection.execute('SELECT MAX(hand_id) FROM hands').fetchone()[0] or 0) + 1
+        self.read_lock = threading.Lock()
+        self.hands = queue.Queue()
+        self.writer = threading.Thread(target=self.write_loop, daemon=True)
+        self.writer.start()
+
+    def append(self, hand):
+        """
+        Parameters:
+            hand(HandRecord): finished hand, it is written in the background
+        """
+        self.hands.put(hand)
+
+    def flush(self):
+        """
+        wait until all appended hands are written
+        """
+        self.hands.join()
+
+    def close(self):
+        self.hands.put(None)
+        self.writer.join()
+        self.connection.close()
+
+    def write_loop(self):
+        writer_connection = connect(self.path)
+        while True:
+            # everything that was appended while the previous batch was written goes to the next batch
+            batch = [self.hands.get()]
+            while batch[-1] is not None and len(batch) < self.batch_size:
+                try:
+                    batch.append(self.hands.get_nowait())
+                except queue.Empty:
+                    break
+            closing = batch[-1] is None
+            hands = [hand for hand in batch if hand is not None]
+            if hands:
+                self.write(writer_connection, hands)
+            for _ in batch:
+                self.hands.task_done()
+            if closing:
+                writer_connection.close()
+                return
+
+    def write(self, connection, hands):
+        """
+        write the hands and update the totals in one transaction
+        """
+        hand_rows, player_rows = [], []
+        positions = defaultdict(lambda: [0, 0])
+        equities = defaultdict(lambda: [0, 0.0])
+        textures = defaultdict(lambda: [0, 0, 0.0])
+        for hand in hands:
+            hand_id = self.next_hand_id
+            self.next_hand_id += 1
+            board = hand.board or []
+            texture = board_texture(board)
+            hand_rows.append((hand_id, hand.table_id, hand.started, ''.join(hand.hero_cards), hand.hero_position,
+                              ''.join(board), texture, hand.street, hand.total_pot, hand.equity))
+            for player in hand.players:
+                vpip = None if player.vpip is None else int(player.vpip)
+                player_rows.append((hand_id, player.position, int(player.is_hero), player.preflop_bet, vpip))
+                if vpip is not None:
+                    totals = positions[player.position]
+                    totals[0] += 1
+                    totals[1] += vpip
+            if hand.equity is not None:
+                totals = equities[min(int(hand.equity), 99)]
+                totals[0] += 1
+                totals[1] += hand.equity
+            totals = textures[texture]
+            totals[0] += 1
+            totals[1] += hand.equity is not None
+            totals[2] += hand.equity if hand.equity is not None else 0
+        with connection:
+            connection.executemany('INSERT INTO hands VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', hand_rows)
+            connection.executemany('INSERT INTO players VALUES (?, ?, ?, ?, ?)', player_rows)
+            connection.executemany(
+                'INSERT INTO position_totals VALUES (?, ?, ?) ON CONFLICT(position) DO UPDATE SET '
+                'hands = hands + excluded.hands, vpip_hands = vpip_hands + excluded.vpip_hands',
+                [(key, *values) for key, values in positions.items()])
+            connection.executemany(
+                'INSERT INTO equity_totals VALUES (?, ?, ?) ON CONFLICT(equity_percent) DO UPDATE SET '
+                'hands = hands + excluded.hands, equity_sum = equity_sum + excluded.equity_sum',
+                [(key, *values) for key, values in equities.items()])
+            connection.executemany(
+                'INSERT INTO texture_totals VALUES (?, ?, ?, ?) ON CONFLICT(board_texture) DO UPDATE SET '
+                'hands = hands + excluded.hands, equity_hands = equity_hands + excluded.equity_hands, '
+                'equity_sum = equity_sum + excluded.equity_sum',
+                [(key, *values) for key, values in textures.items()])
+
+    def query(self, sql, parameters=()):
+        with self.read_lock:
+            return self.connection.execute(sql, parameters).fetchall()
+
+    def hands_count(self):
+        return self.query('SELECT COUNT(*) FROM hands')[0][0]
+
+    def vpip_by_position(self):
+        """
+        Returns:
+            vpip(dict): key - position, value - (percent of hands with voluntarily put money, number of hands)
+            of the opponents, hero's bets are not recognized
+        """
+        rows = self.query('SELECT position, vpip_hands, hands FROM position_totals')
+        return {position: (vpip_hands * 100 / hands, hands) for position, vpip_hands, hands in rows}
+
+    def hands_by_equity(self, buckets=10):
+        """
+        Parameters:
+            buckets(int): the number of equity ranges, the equity is summed up by whole percents
+        Returns:
+            rows(list of tuples): (the lowest equity of the range, number of hands, average equity)
+        """
+        size = 100 / buckets
+        totals = defaultdict(lambda: [0, 0.0])
+        for percent, hands, equity_sum in self.query('SELECT * FROM equity_totals'):
+            bucket_totals = totals[min(int(percent / size), buckets - 1)]
+            bucket_totals[0] += hands
+            bucket_totals[1] += equity_sum
+        return [(bucket * size, hands, equity_sum / hands) for bucket, (hands, equity_sum) in sorted(totals.items())]
+
+    def hands_by_texture(self):
+        """
+        Returns:
+            texture(dict): key - board texture, value - (number of hands, average equity or None if it is unknown)
+        """
+        rows = self.query('SELECT * FROM texture_totals')
+        return {texture: (hands, equity_sum / equity_hands if equity_hands else None)
+                for texture, hands, equity_hands, equity_sum in rows}
+
+    def hand(self, hand_id):
+        """
+        Returns:
+            hand(tuple): row of the hand, None if there is no such hand
+            players(list of tuples): (position, is_hero, preflop_bet, vpip) rows of the players of the hand
+        """
+        rows = self.query('SELECT * FROM hands WHERE hand_id = ?', (hand_id,))
+        players = self.query('SELECT position, is_hero, preflop_bet, vpip FROM players WHERE hand_id = ?',
+                             (hand_id,))
+        return (rows[0] if rows else None), players
+
+
+class HandRecorder:
+    """
+    Collects the events of the hand state tracker of one table and appends every finished hand to the store
+    """
+
+    def __init__(self, store, table_id=1):
+        """
+        Parameters:
+            store(HandHistoryStore): where the hands are written
+            table_id(int): number of the table
+        """
+        self.store = store
+        self.table_id = table_id
+        self.hand = None
+        # key - equity state id, value - final equity, filled by the window thread
+        self.equities = {}
+        self.state_id = None
+
+    def attach(self, tracker):
+        """
+        Parameters:
+            tracker(HandStateTracker): tracker of the table
+        """
+        tracker.subscribe((NewHand, StreetChanged, BoardCardsDealt, PotChanged, PlayersChanged, HandFinished),
+                          self.on_event)
+
+    def on_event(self, event):
+        if isinstance(event, NewHand):
+            self.equities.clear()
+            self.hand = {'started': time.time(), 'hero_cards': event.hero_cards, 'hero_position': None,
+                         'board': [], 'street': PREFLOP, 'total_pot': None, 'preflop_bets': {}, 'blinds': {}}
+        elif self.hand is None:
+            return
+        elif isinstance(event, StreetChanged):
+            self.hand['street'] = event.street
+        elif isinstance(event, BoardCardsDealt):
+            self.hand['board'] = event.table_cards
+        elif isinstance(event, PotChanged):
+            self.hand['total_pot'] = parse_amount(event.amount)
+        elif isinstance(event, PlayersChanged):
+            self.players_changed(event.players_info)
+        elif isinstance(event, HandFinished):
+            self.store.append(self.record())
+            self.hand = None
+
+    def players_changed(self, players_info):
+        self.hand['hero_position'] = players_info.get('Hero')
+        if self.hand['street'] != PREFLOP:
+            return
+        for position, bet in players_info.items():
+            if isinstance(position, int) or position == 'Hero':
+                continue
+            value = parse_amount(bet) or 0
+            bets = self.hand['preflop_bets']
+            bets[position] = max(bets.get(position, 0), value)
+            # the first bet of the blinds is the blind itself
+            if position in ('SB', 'BB') and value > 0:
+                self.hand['blinds'].setdefault(position, value)
+
+    def record(self):
+        """
+        Returns:
+            hand(HandRecord): the finished hand, hero's vpip is unknown because hero's bets are not recognized
+        """
+        hand = self.hand
+        players = [HandPlayer(position, False, bet, bet > hand['blinds'].get(position, 0))
+                   for position, bet in sorted(hand['preflop_bets'].items())]
+        if hand['hero_position'] is not None:
+            players.append(HandPlayer(hand['hero_position'], True, None, None))
+        return HandRecord(self.table_id, hand['started'], hand['hero_cards'], hand['hero_position'], hand['board'],
+                          hand['street'], hand['total_pot'], self.equities.get(self.state_id), players)
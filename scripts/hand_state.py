@@ -0,0 +1,137 @@
+from collections import namedtuple, defaultdict
+
+WAITING = 'waiting'
+PREFLOP = 'preflop'
+FLOP = 'flop'
+TURN = 'turn'
+RIVER = 'river'
+SHOWDOWN = 'showdown'
+
+# street by the number of cards on the table
+STREETS = {0: PREFLOP, 3: FLOP, 4: TURN, 5: RIVER}
+# streets on which the hand is played
+PLAYED_STREETS = (PREFLOP, FLOP, TURN, RIVER)
+
+# what was recognized on one frame, None - the value was not recognized on this frame and stays as it was.
+# hero_step(bool), hero_cards(list of str), table_cards(list of str), total_pot(str),
+# players_info(dict) - see PokerStarsTableRecognizer.find_players_bet, bets(dict): key - player number, value - bet,
+# shown_cards(dict): key - player number, value - hole cards the opponent has shown
+TableObservation = namedtuple('TableObservation', ['hero_step', 'hero_cards', 'table_cards', 'total_pot',
+                                                   'players_info', 'bets', 'shown_cards'])
+TableObservation.__new__.__defaults__ = (None,) * len(TableObservation._fields)
+
+NewHand = namedtuple('NewHand', ['hand_number', 'hero_cards'])
+StreetChanged = namedtuple('StreetChanged', ['street'])
+BoardCardsDealt = namedtuple('BoardCardsDealt', ['street', 'cards', 'table_cards'])
+PotChanged = namedtuple('PotChanged', ['amount'])
+BetChanged = namedtuple('BetChanged', ['seat', 'amount'])
+PlayersChanged = namedtuple('PlayersChanged', ['players_info'])
+HeroToAct = namedtuple('HeroToAct', [])
+HeroActed = namedtuple('HeroActed', [])
+HandFinished = namedtuple('HandFinished', ['hand_number', 'street'])
+
+
+class HandStateTracker:
+    """
+    State machine of the current hand: waiting -> preflop -> flop -> turn -> river -> showdown.
+    Every frame is compared with the state, and only the differences are sent to the subscribers as events
+    """
+
+    def __init__(self):
+        self.street = WAITING
+        self.hand_number = 0
+        self.hero_step = False
+        self.hero_cards = []
+        self.table_cards = []
+        self.total_pot = None
+        self.players_info = None
+        self.bets = {}
+        self.subscribers = defaultdict(list)
+
+    def subscribe(self, event_types, callback):
+        """
+        Parameters:
+            event_types(type or tuple of types): events the callback is interested in
+            callback(callable): it is called with every such event
+        """
+        for event_type in event_types if isinstance(event_types, tuple) else (event_types,):
+            self.subscribers[event_type].append(callback)
+
+    def update(self, observation):
+        """
+        Parameters:
+            observation(TableObservation): recognition results of the new frame
+        Returns:
+            events(list): what changed since the previous frame, in the order it happened
+        """
+        events = []
+        if observation.hero_cards is not None and observation.hero_cards != self.hero_cards:
+            if self.street in PLAYED_STREETS:
+                events += self.finish_hand(observation)
+            else:
+                self.street = WAITING
+            self.hero_cards = observation.hero_cards
+            if self.hero_cards:
+                events += self.start_hand()
+        if self.street in PLAYED_STREETS:
+            if observation.table_cards is not None and observation.table_cards != self.table_cards:
+                events += self.deal_board(observation.table_cards)
+            if observation.total_pot is not None and observation.total_pot != self.total_pot:
+                self.total_pot = observation.total_pot
+                events.append(PotChanged(self.total_pot))
+            if observation.players_info is not None and observation.players_info != self.players_info:
+                self.players_info = observation.players_info
+                events.append(PlayersChanged(self.players_info))
+            if observation.bets is not None:
+                for seat in sorted(observation.bets):
+                    if observation.bets[seat] != self.bets.get(seat, ''):
+                        self.bets[seat] = observation.bets[seat]
+                        events.append(BetChanged(seat, self.bets[seat]))
+        if observation.hero_step is not None and observation.hero_step != self.hero_step:
+            self.hero_step = observation.hero_step
+            if self.street in PLAYED_STREETS:
+                events.append(HeroToAct() if self.hero_step else HeroActed())
+        for event in events:
+            for callback in self.subscribers[type(event)]:
+                callback(event)
+        return events
+
+    def start_hand(self):
+        self.hand_number += 1
+        self.street = PREFLOP
+        self.table_cards = []
+        self.total_pot = None
+        self.players_info = None
+        self.bets = {}
+        return [NewHand(self.hand_number, self.hero_cards), StreetChanged(PREFLOP)]
+
+    def finish_hand(self, observation):
+        """
+        the hero's cards are gone or changed. The hand goes to the showdown only if an opponent has shown
+        their cards on the river, a hand folded on the river looks the same otherwise. Without such evidence
+        hero has folded, the hand was won without a showdown or the next hand has started
+        """
+        if self.street == RIVER and observation.shown_cards:
+            self.street = SHOWDOWN
+            return [StreetChanged(SHOWDOWN), HandFinished(self.hand_number, SHOWDOWN)]
+        street, self.street = self.street, WAITING
+        return [HandFinished(self.hand_number, street)]
+
+    def deal_board(self, table_cards):
+        """
+        Parameters:
+            table_cards(list of str): cards on the table on the new frame
+        Returns:
+            events(list): the new street and the new cards, nothing if the number of cards is not possible
+        """
+        street = STREETS.get(len(table_cards))
+        if street is None or table_cards[:len(self.table_cards)] != self.table_cards:
+            # the cards are being dealt or are covered on this frame
+            return []
+        new_cards = table_cards[len(self.table_cards):]
+        self.table_cards = table_cards
+        events = [BoardCardsDealt(street, new_cards, table_cards)]
+        if street != self.street:
+            self.street = street
+            events.append(StreetChanged(street))
+        return events
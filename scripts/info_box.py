@@ -1,15 +1,60 @@
-from tkinter import *
-from scripts.utils import read_config_file
+from tkinter import Tk, Toplevel, Label, LEFT
+from scripts.output_sinks import OutputSink
 
-cfg = read_config_file()
-root = Tk()
-root.geometry('{0}x{1}'.format(cfg['info_box_size']['width'], cfg['info_box_size']['height']))
-root.title('PokerStarsHelper')
-root.configure(background='ivory3')
-lab = Label(root, anchor="w", justify=LEFT, font=("Arial", 18))
-lab.pack(fill="both", expand=True)
 
+class TkSink(OutputSink):
+    """
+    One window per table. The windows are created by start() and are shown by mainloop(),
+    both have to be called from the main thread. The event loop takes the updates from the queue
+    with after(), so neither rendering nor window events ever wait for recognition or stall it
+    """
 
-def update_label(text):
-    lab.configure(text=text)
-    root.update()
\ No newline at end of file
+    def __init__(self, tables_count, size, interval=50):
+        """
+        Parameters:
+            tables_count(int): number of tables
+            size(dict): size of every window in {'width': w, 'height': h} format
+            interval(int): how often to take the updates from the queue in milliseconds
+        """
+        super().__init__()
+        self.tables_count = tables_count
+        self.size = size
+        self.interval = interval
+        self.root = None
+        self.labels = {}
+
+    def start(self):
+        self.root = Tk()
+        for number in range(1, self.tables_count + 1):
+            window = self.root if number == 1 else Toplevel(self.root)
+            window.geometry('{0}x{1}'.format(self.size['width'], self.size['height']))
+            window.title('PokerStarsHelper' if number == 1 else 'PokerStarsHelper #{0}'.format(number))
+            window.configure(background='ivory3')
+            label = Label(window, anchor="w", justify=LEFT, font=("Arial", 18))
+            label.pack(fill="both", expand=True)
+            self.labels[number] = label
+
+    def poll(self):
+        while True:
+            update = self.queue.get(timeout=0)
+            if update is None:
+                break
+            self.write(update)
+        if self.queue.closed:
+            self.root.quit()
+        else:
+            self.root.after(self.interval, self.poll)
+
+    def write(self, update):
+        # called by poll() in the thread of the event loop, tkinter can't be used from other threads
+        self.labels[update.table].configure(text=update.text)
+
+    def mainloop(self):
+        """
+        run the window event loop in the current thread until the windows are closed or close() is called
+        """
+        self.root.after(self.interval, self.poll)
+        self.root.mainloop()
+
+    def close(self, timeout=1):
+        self.queue.close()
@@ -0,0 +1,78 @@
+from collections import namedtuple
+import cv2
+import numpy as np
+from scripts.utils import thresholding, convert_contours_to_bboxes, sort_bboxes
+from scripts.profiling import profiled
+
+# text - recognized symbols as they are shown on the table, e.g. '1,550';
+# value - the parsed number, None if the region is empty or the text is not a number;
+# confidences - margin of the classifier for every symbol, the bigger it is, the more confident the recognition
+Amount = namedtuple('Amount', ['text', 'value', 'confidences'])
+
+
+def parse_amount(text):
+    """
+    Parameters:
+        text(str): amount in chips as it is shown on the table, e.g. '17,450',
+        the templates of the pot numbers have only the digits and the thousands separator
+    Returns:
+        value(float): the number, None if the text is empty or it is not a number
+    """
+    try:
+        return float(text.replace(',', ''))
+    except ValueError:
+        return None
+
+
+class NumericReader:
+    """
+    Reads amounts (pot, bets) from several regions of the table at once.
+    Every region is split into symbols and the symbols of all regions are recognized in one batch
+    """
+
+    def __init__(self, classifier, threshold=105, min_height=3, min_width=1):
+        """
+        Parameters:
+            classifier(GlyphClassifier): classifier of the digits and separators
+            threshold(int): brightness that separates the symbols from the background
+            min_height(int): smaller contours are noise
+            min_width(int): narrower contours are noise
+        """
+        self.classifier = classifier
+        self.threshold = threshold
+        self.min_height = min_height
+        self.min_width = min_width
+
+    def segment(self, img):
+        """
+        Parameters:
+            img(numpy.ndarray): image of one amount in BGR or BGRA format
+        Returns:
+            symbols_imgs(list of numpy.ndarray): images of the symbols from left to right
+        """
+        binary_img = thresholding(img, self.threshold, 255)
+        contours, _ = cv2.findContours(binary_img, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        bounding_boxes = convert_contours_to_bboxes(contours, self.min_height, self.min_width)
+        bounding_boxes = sort_bboxes(bounding_boxes, method='left-to-right')
+        return [img[max(bbox[1], 0):bbox[3], max(bbox[0], 0):bbox[2]] for bbox in bounding_boxes]
+
+    @profiled('numeric_reader.read')
+    def read(self, imgs):
+        """
+        Parameters:
+            imgs(dict): key - name of the region, value - image of the amount
+        Returns:
+            amounts(dict): key - name of the region, value - Amount
+        """
+        symbols_imgs, owners = [], []
+        for key, img in imgs.items():
+            region_symbols = self.segment(img)
+            symbols_imgs += region_symbols
+            owners += [key] * len(region_symbols)
+        symbols, margins = self.classifier.classify(symbols_imgs)
+        amounts = {}
+        for key in imgs:
+            indexes = [i for i, owner in enumerate(owners) if owner == key]
+            text = ''.join(symbols[i] for i in indexes)
+            amounts[key] = Amount(text, parse_amount(text), np.asarray(margins)[indexes])
+        return amounts
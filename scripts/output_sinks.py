@@ -0,0 +1,211 @@
+import json
+import socket
+import sys
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict, namedtuple
+
+# what is shown for one table. table(int): number of the table, time(float): unix time of the update,
+# equity(str): see format_equity, text(str): the text of the table's window, other fields - see TableSession
+TableUpdate = namedtuple('TableUpdate', ['table', 'time', 'hero_cards', 'table_cards', 'total_pot', 'equity',
+                                         'players_info', 'text'])
+
+
+class LatestUpdates:
+    """
+    Bounded queue between the capture loop and a sink. Only the newest update of every table is kept,
+    an update that was not taken before the next one of the same table is dropped as stale,
+    so put() never blocks however slow the sink is
+    """
+
+    def __init__(self):
+        self.updates = OrderedDict()
+        self.condition = threading.Condition()
+        self.dropped = 0
+        self.closed = False
+
+    def put(self, update):
+        with self.condition:
+            if self.updates.pop(update.table, None) is not None:
+                self.dropped += 1
+            self.updates[update.table] = update
+            self.condition.notify()
+
+    def get(self, timeout=None):
+        """
+        Parameters:
+            timeout(float): how long to wait for an update, None - until an update comes or the queue is closed,
+            0 - don't wait
+        Returns:
+            update(TableUpdate): the oldest of the newest updates of the tables, None if there is nothing
+        """
+        with self.condition:
+            if not self.updates and not self.closed and timeout != 0:
+                self.condition.wait(timeout)
+            if not self.updates:
+                return None
+            return self.updates.popitem(last=False)[1]
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+
+class OutputSink(ABC):
+    """
+    Shows the updates somewhere. publish() only puts the update into the sink's own queue,
+    the sink writes it in its own thread
+    """
+
+    def __init__(self):
+        self.queue = LatestUpdates()
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def publish(self, update):
+        self.queue.put(update)
+
+    def run(self):
+        while True:
+            update = self.queue.get()
+            if update is None:
+                if self.queue.closed:
+                    break
+                continue
+            self.write(update)
+
+    @abstractmethod
+    def write(self, update):
+        """
+        show one update, called from the thread of the sink
+        """
+        pass
+
+    def close(self, timeout=1):
+        self.queue.close()
+        if self.thread is not None:
+            self.thread.join(timeout)
+
+
+def update_json(update):
+    """
+    Returns:
+        line(str): the update as one line of JSON
+    """
+    return json.dumps(update._asdict(), separators=(',', ':')) + '\n'
+
+
+class JsonLinesSink(OutputSink):
+    """
+    Writes every update as a line of JSON to the standard output or to a file
+    """
+
+    def __init__(self, path='-'):
+        """
+        Parameters:
+            path(str): file to append the updates to, '-' - the standard output
+        """
+        super().__init__()
+        self.path = path
+        self.stream = sys.stdout if path == '-' else open(path, 'a')
+
+    def write(self, update):
+        self.stream.write(update_json(update))
+        self.stream.flush()
+
+    def close(self, timeout=1):
+        super().close(timeout)
+        if self.stream is not sys.stdout:
+            self.stream.close()
+
+
+class SocketSink(OutputSink):
+    """
+    Local TCP server, every connected client gets the updates as lines of JSON.
+    A client that doesn't read them is disconnected
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, send_timeout=1.0):
+        """
+        Parameters:
+            host(str): address to listen on
+            port(int): port to listen on, 0 - any free port, see self.port
+            send_timeout(float): seconds to wait for a slow client
+        """
+        super().__init__()
+        self.server = socket.create_server((host, port))
+        self.port = self.server.getsockname()[1]
+        self.send_timeout = send_timeout
+        self.clients = []
+        self.clients_lock = threading.Lock()
+
+    def start(self):
+        super().start()
+        threading.Thread(target=self.accept_clients, daemon=True).start()
+
+    def accept_clients(self):
+        while True:
+            try:
+                client, _ = self.server.accept()
+            except OSError:
+                # the server was closed
+                break
+            client.settimeout(self.send_timeout)
+            with self.clients_lock:
+                self.clients.append(client)
+
+    def write(self, update):
+        data = update_json(update).encode()
+        with self.clients_lock:
+            clients = list(self.clients)
+        for client in clients:
+            try:
+                client.sendall(data)
+            except OSError:
+                with self.clients_lock:
+                    self.clients.remove(client)
+                client.close()
+
+    def close(self, timeout=1):
+        super().close(timeout)
+        self.server.close()
+        with self.clients_lock:
+            for client in self.clients:
+                client.close()
+            self.clients = []
+
+
+class OutputHub:
+    """
+    Sends every update to all sinks
+    """
+
+    def __init__(self, sinks):
+        """
+        Parameters:
+            sinks(list of OutputSink): where to show the updates
+        """
+        self.sinks = sinks
+
+    def start(self):
+        for sink in self.sinks:
+            sink.start()
+
+    def publish(self, update):
+        for sink in self.sinks:
+            sink.publish(update)
+
+    def dropped(self):
+        """
+        Returns:
+            dropped(dict): key - name of the sink class, value - how many stale updates the sink has skipped
+        """
+        return {type(sink).__name__: sink.queue.dropped for sink in self.sinks}
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
@@ -1,21 +1,37 @@
 import cv2
 from scripts.table_recognition import PokerTableRecognizer
-from scripts.utils import sort_bboxes, thresholding, card_separator, table_part_recognition, \
-    convert_contours_to_bboxes, find_by_template, find_closer_point, read_config_file
-import numpy as np
+from scripts.utils import thresholding, find_by_template, find_closer_point, to_bgr
+from scripts.card_segmentation import segment_cards
+from scripts.template_bank import TemplateBank
+from scripts.table_layout import compile_layout
+from scripts.seat_state import SeatStateCache, SEAT_FLAGS
+from scripts.numeric_reader import NumericReader
+from scripts.profiling import profiled
 
 
 class PokerStarsTableRecognizer(PokerTableRecognizer):
 
-    def __init__(self, img, cfg):
+    def __init__(self, img, cfg, templates=None, seat_cache=None):
         """
         Parameters:
-            img(numpy.ndarray): image of the whole table
-            cfg (dict): config file
+            img(numpy.ndarray): image of the whole table in BGR format
+            or in BGRA format as it is captured from the screen, only the regions that need color are converted
+            cfg (TableLayout or dict): compiled layout of the table or the config file it is compiled from
+            templates(TemplateBank): preloaded template images,
+            by default the bank shared by all recognizers with the same config paths
+            seat_cache(SeatStateCache): seat states of the previous frames of the same table,
+            by default the seats are classified from scratch
         """
         self.img = img
-        self.cfg = cfg
+        self.layout = compile_layout(cfg)
+        self.templates = templates if templates is not None else TemplateBank.shared({'paths': self.layout.paths})
+        self.seat_cache = seat_cache if seat_cache is not None else SeatStateCache()
+        self.seats_state = None
+        self.amounts = None
+        self.dealer_button_player = None
+        self.dealer_button_score = None
 
+    @profiled('recognizer.detect_hero_step')
     def detect_hero_step(self):
         """
         Based on the area under hero's cards,
@@ -23,159 +39,236 @@ class PokerStarsTableRecognizer(PokerTableRecognizer):
         Returns:
             Boolean Value(True or False): True, if hero step now
         """
-        res_img = self.img[self.cfg['hero_step_define']['y_0']:self.cfg['hero_step_define']['y_1'],
-                           self.cfg['hero_step_define']['x_0']:self.cfg['hero_step_define']['x_1']]
+        res_img = to_bgr(self.img[self.layout.hero_step_roi])
 
         hsv_img = cv2.cvtColor(res_img, cv2.COLOR_BGR2HSV_FULL)
-        mask = cv2.inRange(hsv_img, np.array(self.cfg['hero_step_define']['lower_gray_color']),
-                           np.array(self.cfg['hero_step_define']['upper_gray_color']))
+        mask = cv2.inRange(hsv_img, self.layout.hero_step_lower_color, self.layout.hero_step_upper_color)
         count_of_white_pixels = cv2.countNonZero(mask)
-        return True if count_of_white_pixels > self.cfg['hero_step_define']['min_white_pixels'] else False
+        return True if count_of_white_pixels > self.layout.hero_step_min_white_pixels else False
 
+    @profiled('recognizer.detect_cards')
     def detect_cards(self, separators, sort_bboxes_method, cards_coordinates, path_to_numbers, path_to_suits):
         """
         Parameters:
-            separators(list of int): contains values where the card ends
-            sort_bboxes_method(str): defines how we will sort the contours.
-            It can be left-to-right, bottom-to-top, top-to-bottom
-            cards_coordinates(str): path to cards coordinates
+            separators(numpy.ndarray): contains values where the card ends
+            sort_bboxes_method(str): where the suit is drawn. It can be bottom-to-top (the suit is below the value)
+            or top-to-bottom (the suit is above the value)
+            cards_coordinates(tuple of slice): region with the cards
             path_to_numbers(str): path where located numbers (J, K etc.)
             path_to_suits(str) : path where located suits
         Returns:
-            cards_name(list of str): name of the cards
+            cards_name(list of str): name of the cards, None if the region is too noisy to be read on this frame
         """
-        cards_name = []
-        img = self.img[self.cfg[cards_coordinates]['y_0']:self.cfg[cards_coordinates]['y_1'],
-                       self.cfg[cards_coordinates]['x_0']:self.cfg[cards_coordinates]['x_1']]
+        methods = ['bottom-to-top', 'top-to-bottom']
+        if sort_bboxes_method not in methods:
+            raise ValueError("Invalid method. Expected one of: %s" % methods)
+        img = to_bgr(self.img[cards_coordinates])
         binary_img = thresholding(img, 200, 255)
-        contours, _ = cv2.findContours(binary_img, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        bounding_boxes = convert_contours_to_bboxes(contours, 10, 2)
-        bounding_boxes = sort_bboxes(bounding_boxes, method=sort_bboxes_method)
-        cards_bboxes_dct = card_separator(bounding_boxes, separators)
-        for _, cards_bboxes in cards_bboxes_dct.items():
-            if len(cards_bboxes) == 3:
-                cards_bboxes = [cards_bboxes[0]]
-
-            elif len(cards_bboxes) == 0:
-                return []
-
-            elif len(cards_bboxes) > 3:
-                raise ValueError("The number of bounding boxes should not be more than 3!")
-
-            card_name = ''
-            for key, bbox in enumerate(cards_bboxes):
-                color_of_img, directory = (cv2.IMREAD_COLOR, self.cfg['paths'][path_to_suits]) if key == 0 \
-                    else (cv2.IMREAD_GRAYSCALE, self.cfg['paths'][path_to_numbers])
-                res_img = img[bbox[1]:bbox[3], bbox[0]:bbox[2]]
-                card_part = table_part_recognition(res_img, directory, color_of_img)
-                card_name = card_part + 'T' if len(cards_bboxes) == 1 else card_name + card_part
-            cards_name.append(card_name[::-1])
+        slots = segment_cards(binary_img, separators, max(int(10 * self.layout.scale), 1),
+                              max(int(2 * self.layout.scale), 1), sort_bboxes_method == 'bottom-to-top')
+        if slots is None:
+            return None
+        suits_imgs, numbers_imgs, suits_binary, numbers_binary = [], [], [], []
+        for boxes, count in zip(slots.boxes[:slots.cards], slots.counts[:slots.cards]):
+            # the suit is always the first glyph. A card with only the suit or with the suit and
+            # two glyphs of the value ('1' and '0') is a ten
+            suit_bbox = boxes[0]
+            suits_imgs.append(img[suit_bbox[1]:suit_bbox[3], suit_bbox[0]:suit_bbox[2]])
+            suits_binary.append(binary_img[suit_bbox[1]:suit_bbox[3], suit_bbox[0]:suit_bbox[2]])
+            if count != 2:
+                numbers_imgs.append(None)
+            else:
+                number_bbox = boxes[1]
+                numbers_imgs.append(img[number_bbox[1]:number_bbox[3], number_bbox[0]:number_bbox[2]])
+                numbers_binary.append(binary_img[number_bbox[1]:number_bbox[3], number_bbox[0]:number_bbox[2]])
+
+        # glyphs that were already seen on the previous frames are not classified again
+        glyph_cache = self.templates.glyph_cache
+        suits = glyph_cache.classify(path_to_suits, self.templates.classifier(path_to_suits), suits_imgs, suits_binary)
+        numbers = glyph_cache.classify(path_to_numbers, self.templates.classifier(path_to_numbers),
+                                       [number_img for number_img in numbers_imgs if number_img is not None],
+                                       numbers_binary)
+        numbers = iter(numbers)
+        cards_name = [('T' if number_img is None else next(numbers)) + suit
+                      for suit, number_img in zip(suits, numbers_imgs)]
         return cards_name
 
+    @profiled('recognizer.detect_hero_cards')
     def detect_hero_cards(self):
         """
         Returns:
-            cards_name(list of str): name of the hero's cards
+            cards_name(list of str): name of the hero's cards, None if they can't be read on this frame
         """
-        separators = [self.cfg['hero_cards']['separator_1'], self.cfg['hero_cards']['separator_2']]
+        separators = self.layout.hero_cards_separators
         sort_bboxes_method = 'bottom-to-top'
-        cards_coordinates = 'hero_cards'
+        cards_coordinates = self.layout.hero_cards_roi
         path_to_numbers = 'hero_cards_numbers'
         path_to_suits = 'hero_cards_suits'
         cards_name = self.detect_cards(separators, sort_bboxes_method, cards_coordinates,
                                        path_to_numbers, path_to_suits)
         return cards_name
 
+    @profiled('recognizer.detect_table_cards')
     def detect_table_cards(self):
         """
         Returns:
-            cards_name(list of str): name of the cards on the table
+            cards_name(list of str): name of the cards on the table, None if they can't be read on this frame
         """
-        separators = [self.cfg['table_cards']['separator_1'], self.cfg['table_cards']['separator_2'],
-                      self.cfg['table_cards']['separator_3'], self.cfg['table_cards']['separator_4'],
-                      self.cfg['table_cards']['separator_5']]
+        separators = self.layout.table_cards_separators
         sort_bboxes_method = 'top-to-bottom'
-        cards_coordinates = 'table_cards'
+        cards_coordinates = self.layout.table_cards_roi
         path_to_numbers = 'table_cards_numbers'
         path_to_suits = 'table_cards_suits'
         cards_name = self.detect_cards(separators, sort_bboxes_method, cards_coordinates,
                                        path_to_numbers, path_to_suits)
         return cards_name
 
+    def pot_img(self):
+        """
+        Returns:
+            img(numpy.ndarray): image of the pot amount next to the pot label
+        """
+        layout = self.layout
+        img = self.img[layout.pot_roi]
+        _, max_loc = find_by_template(img, self.templates['pot_image'])
+        return img[max(max_loc[1] - int(round(3 * layout.scale)), 0):max_loc[1] + layout.pot_height,
+                   max_loc[0] + layout.pot_template_width:
+                   max_loc[0] + layout.pot_template_width + layout.pot_width]
+
+    def numeric_reader(self):
+        # interpolation of a resized table fills the gaps between the digits with gray pixels
+        return NumericReader(self.templates.classifier('pot_numbers'),
+                             threshold=105 if self.layout.scale == 1 else 130,
+                             min_height=max(int(3 * self.layout.scale), 1))
+
+    @profiled('recognizer.read_amounts')
+    def read_amounts(self, pot=True):
+        """
+        read the pot and the bets of all players in one batch, the result is reused by
+        find_total_pot and find_players_bet of the same frame
+        Parameters:
+            pot(bool): False - only the bets are read
+        Returns:
+            amounts(dict): key - 'pot' or player number, value - Amount
+        """
+        if self.amounts is None or (pot and 'pot' not in self.amounts):
+            amounts_imgs = {'pot': self.pot_img()} if pot else {}
+            for player, roi in self.layout.players_bet_roi.items():
+                amounts_imgs[player] = self.img[roi]
+            self.amounts = self.numeric_reader().read(amounts_imgs)
+        return self.amounts
+
+    @profiled('recognizer.read_pot')
+    def read_pot(self):
+        """
+        Returns:
+            amount(Amount): the pot, only its region is read if the amounts of this frame are not read yet
+        """
+        if self.amounts is not None and 'pot' in self.amounts:
+            return self.amounts['pot']
+        return self.numeric_reader().read({'pot': self.pot_img()})['pot']
+
+    @profiled('recognizer.find_total_pot')
     def find_total_pot(self):
         """
         Returns:
             number(str): number with total pot
         """
-        img = self.img[self.cfg['pot']['y_0']:self.cfg['pot']['y_1'],
-              self.cfg['pot']['x_0']:self.cfg['pot']['x_1']]
-        _, max_loc = find_by_template(img, self.cfg['paths']['pot_image'])
-        bet_img = img[max_loc[1] - 3:max_loc[1] + self.cfg['pot']['height'],
-                      max_loc[0] + self.cfg['pot']['pot_template_width']:
-                      max_loc[0] + self.cfg['pot']['pot_template_width'] + self.cfg['pot']['width']]
-        binary_img = thresholding(bet_img, 105, 255)
-        contours, _ = cv2.findContours(binary_img, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        bounding_boxes = convert_contours_to_bboxes(contours, 3, 1)
-        bounding_boxes = sort_bboxes(bounding_boxes, method='left-to-right')
-        number = ''
-        for bbox in bounding_boxes:
-            number_img = bet_img[bbox[1]:bbox[3], bbox[0]:bbox[2]]
-            symbol = table_part_recognition(number_img, self.cfg['paths']['pot_numbers'], cv2.IMREAD_GRAYSCALE)
-            number += symbol
-        return number
-
-    def get_dealer_button_position(self):
+        return self.read_pot().text
+
+    @profiled('recognizer.find_dealer_button')
+    def find_dealer_button(self, previous_player=None):
+        """
+        the button can only be in a few places next to the players, so these small areas are checked
+        starting from the player who had the button in the previous hand and then clockwise.
+        The whole image is searched only if no area matches well enough
+        Parameters:
+            previous_player(int): the player who had the button in the previous hand
+        Returns:
+            player_with_button(int): the number of the player with the button
+            max_val(float): the score of the match, the higher it is, the more confident the detection
+        """
+        template_img = self.templates['dealer_button']
+        button_positions = self.layout.dealer_button_positions
+        margin = self.layout.dealer_button_margin
+        players = sorted(button_positions)
+        if previous_player in button_positions:
+            start = players.index(previous_player)
+            players = players[start:] + players[:start]
+        for player in players:
+            x, y = button_positions[player]
+            area_img = self.img[max(y - margin, 0):y + template_img.shape[0] + margin,
+                                max(x - margin, 0):x + template_img.shape[1] + margin]
+            max_val, _ = find_by_template(area_img, template_img)
+            if max_val >= self.layout.dealer_button_min_score:
+                return player, max_val
+        max_val, button_coordinates = find_by_template(self.img, template_img)
+        player_with_button = find_closer_point(self.layout.player_center_coordinates, button_coordinates)
+        return player_with_button, max_val
+
+    @profiled('recognizer.get_dealer_button_position')
+    def get_dealer_button_position(self, previous_player=None):
         """
         determine who is closer to the dealer button
+        Parameters:
+            previous_player(int): the player who had the button in the previous hand, he is checked first
         Returns:
             player_info(dict): here is information about all players as it becomes available
         """
         player_info = {key: value for key in range(1, 7) for value in ['']}
-        players_coordinates = self.cfg['player_center_coordinates']
-        _, button_coordinates = find_by_template(self.img, self.cfg['paths']['dealer_button'])
-        player_with_button = find_closer_point(players_coordinates, button_coordinates)
+        player_with_button, self.dealer_button_score = self.find_dealer_button(previous_player)
+        self.dealer_button_player = player_with_button
         player_info[player_with_button] = 'dealer_button'
         return player_info
 
-    def get_missing_players(self, players_info, path_to_template_img, flag):
+    @profiled('recognizer.get_seats_state')
+    def get_seats_state(self):
+        """
+        classify all seats in one pass, every seat image is compared with the templates of all seat states
+        Returns:
+            seats_state(dict): key - player number, value - SeatStatus
+        """
+        if self.seats_state is None:
+            self.seats_state = {player: self.seat_cache.status(player, self.img, bbox, self.templates)
+                                for player, bbox in self.layout.players_coordinates.items()}
+        return self.seats_state
+
+    @profiled('recognizer.get_missing_players')
+    def get_missing_players(self, players_info, flag):
         """
         find players who are currently absent for various reasons
         Parameters:
             players_info(dict): key - player number, value - '' - if the player is in the game;
             '-' - if a player's seat is available; '-so-' - if the player is absent
-            path_to_template_img(str): the path to the images where the benchmark images are located
             flag(str): It can be - and -so-
         Returns:
            players_info(dict): info about players
         """
-        players_coordinates = self.cfg['players_coordinates']
-        players_for_checking = [key for key, value in players_info.items() if value == '']
-        for player, bbox in players_coordinates.items():
-            if player != 1 and player in players_for_checking:
-                player_img = self.img[bbox[1]:bbox[3], bbox[0]:bbox[2]]
-                max_val, _ = find_by_template(player_img, self.cfg['paths'][path_to_template_img])
-                if max_val > 0.8:
-                    players_info[player] = flag
+        seats_state = self.get_seats_state()
+        for player, status in seats_state.items():
+            if player != 1 and players_info.get(player) == '' and SEAT_FLAGS.get(status.state) == flag:
+                players_info[player] = flag
         return players_info
 
+    @profiled('recognizer.get_empty_seats')
     def get_empty_seats(self, players_info):
         """
         find players whose places are currently vacant
         """
-        path_to_template_img = 'empty_seat'
         flag = '-'
-        players_info = self.get_missing_players(players_info, path_to_template_img, flag)
+        players_info = self.get_missing_players(players_info, flag)
         return players_info
 
+    @profiled('recognizer.get_so_players')
     def get_so_players(self, players_info):
         """
         find players who are not currently in the game
         """
-        path_to_template_img = 'sitting_out'
         flag = '-so-'
-        players_info = self.get_missing_players(players_info, path_to_template_img, flag)
+        players_info = self.get_missing_players(players_info, flag)
         return players_info
 
+    @profiled('recognizer.assign_positions')
     def assign_positions(self, players_info):
         """
         assign each player one of six positions if the player in the game
@@ -197,6 +290,7 @@ class PokerStarsTableRecognizer(PokerTableRecognizer):
                 players_info[player_number] = exist_positions[index]
         return players_info
 
+    @profiled('recognizer.find_players_bet')
     def find_players_bet(self, players_info):
         """
         Parameters:
@@ -204,24 +298,11 @@ class PokerStarsTableRecognizer(PokerTableRecognizer):
         Returns:
             updated_players_info(dict): info about players in {'Hero':'BTN', 'SB':'', 'BB':'50' etc. } format
         """
-        players_bet_location = self.cfg['players_bet']
+        amounts = self.read_amounts()
         updated_players_info = {'Hero': players_info[1]}
-        for i, location_coordinates in players_bet_location.items():
+        for i in self.layout.players_bet:
             if players_info[i] not in ('-so-', '-'):
-                bet_img = self.img[location_coordinates[1]:location_coordinates[3],
-                          location_coordinates[0]:location_coordinates[2]]
-                binary_img = thresholding(bet_img, 105, 255)
-                contours, _ = cv2.findContours(binary_img, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-                bounding_boxes = convert_contours_to_bboxes(contours, 3, 1)
-                bounding_boxes = sort_bboxes(bounding_boxes, method='left-to-right')
-                number = ''
-                for bbox in bounding_boxes:
-                    number_img = bet_img[bbox[1]:bbox[3], bbox[0]:bbox[2]]
-                    symbol = table_part_recognition(number_img, self.cfg['paths']['pot_numbers'], cv2.IMREAD_GRAYSCALE)
-                    number += symbol
-                updated_players_info[players_info[i]] = number
+                updated_players_info[players_info[i]] = amounts[i].text
             else:
                 updated_players_info[i] = players_info[i]
         return updated_players_info
-
-
@@ -0,0 +1,149 @@
+import os
+import threading
+import time
+from collections import Counter, deque
+from functools import wraps
+
+
+class Profiler:
+    """
+    Counts calls, wall time and template comparisons of the recognition functions per frame.
+    It is switched off by default and then costs one attribute check per call
+    """
+
+    def __init__(self, window=100):
+        """
+        Parameters:
+            window(int): the number of last frames in the rolling summary
+        """
+        self.enabled = False
+        self.lock = threading.Lock()
+        self.frame = self.empty_stats()
+        self.total = self.empty_stats()
+        self.frames = deque(maxlen=window)
+        self.frames_count = 0
+
+    @staticmethod
+    def empty_stats():
+        return {'calls': Counter(), 'seconds': Counter(), 'comparisons': Counter()}
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def toggle(self):
+        self.enabled = not self.enabled
+
+    def record(self, name, seconds):
+        with self.lock:
+            self.frame['calls'][name] += 1
+            self.frame['seconds'][name] += seconds
+
+    def add_comparisons(self, name, count):
+        """
+        Parameters:
+            name(str): function that compared the images
+            count(int): the number of compared (image, template) pairs
+        """
+        if self.enabled:
+            with self.lock:
+                self.frame['comparisons'][name] += count
+
+    def end_frame(self):
+        """
+        move the statistics of the current frame to the rolling summary
+        """
+        if not self.enabled:
+            return
+        with self.lock:
+            frame, self.frame = self.frame, self.empty_stats()
+            for key, counter in frame.items():
+                self.total[key].update(counter)
+            self.frames.append(frame)
+            self.frames_count += 1
+
+    def reset(self):
+        with self.lock:
+            self.frame = self.empty_stats()
+            self.total = self.empty_stats()
+            self.frames.clear()
+            self.frames_count = 0
+
+    def summary(self):
+        """
+        Returns:
+            summary(dict): key - function name, value - average calls, milliseconds and
+            template comparisons per frame over the last frames
+        """
+        with self.lock:
+            frames = list(self.frames)
+        if not frames:
+            return {}
+        names = set()
+        for frame in frames:
+            names.update(frame['calls'], frame['comparisons'])
+        return {name: {'calls': sum(frame['calls'][name] for frame in frames) / len(frames),
+                       'ms': sum(frame['seconds'][name] for frame in frames) / len(frames) * 1000,
+                       'comparisons': sum(frame['comparisons'][name] for frame in frames) / len(frames)}
+                for name in sorted(names)}
+
+    def prometheus_text(self):
+        """
+        Returns:
+            text(str): totals and rolling averages in Prometheus text exposition format
+        """
+        lines = ['# HELP pokervision_frames_total Number of profiled frames',
+                 '# TYPE pokervision_frames_total counter',
+                 'pokervision_frames_total {0}'.format(self.frames_count)]
+        metrics = (('calls_total', 'calls', 'counter', 'Number of calls'),
+                   ('seconds_total', 'seconds', 'counter', 'Wall time spent in the function'),
+                   ('template_comparisons_total', 'comparisons', 'counter', 'Number of image-template comparisons'))
+        with self.lock:
+            for metric, key, metric_type, description in metrics:
+                lines += ['# HELP pokervision_{0} {1}'.format(metric, description),
+                          '# TYPE pokervision_{0} {1}'.format(metric, metric_type)]
+                lines += ['pokervision_{0}{{function="{1}"}} {2}'.format(metric, name, value)
+                          for name, value in sorted(self.total[key].items())]
+        summary = self.summary()
+        for metric, key, description in (('frame_calls', 'calls', 'Average calls per frame'),
+                                         ('frame_ms', 'ms', 'Average milliseconds per frame'),
+                                         ('frame_comparisons', 'comparisons', 'Average comparisons per frame')):
+            lines += ['# HELP pokervision_{0} {1}'.format(metric, description),
+                      '# TYPE pokervision_{0} gauge'.format(metric)]
+            lines += ['pokervision_{0}{{function="{1}"}} {2}'.format(metric, name, values[key])
+                      for name, values in summary.items()]
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, filename):
+        """
+        write the metrics to the file that a local Prometheus node exporter can scrape
+        """
+        tmp_filename = filename + '.tmp'
+        with open(tmp_filename, 'w') as stream:
+            stream.write(self.prometheus_text())
+        os.replace(tmp_filename, filename)
+
+
+profiler = Profiler()
+
+
+def profiled(name):
+    """
+    decorator that records calls and wall time of the function while the profiler is enabled
+    Parameters:
+        name(str): name of the function in the statistics
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not profiler.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                profiler.record(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
@@ -0,0 +1,174 @@
+import argparse
+import json
+import os
+import resource
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+import numpy as np
+from scripts.equity import EquityEngine, EquityResult
+from scripts.equity_worker import EquityUpdate
+from scripts.table_session import TableSession
+from scripts.template_bank import TemplateBank
+from scripts.utils import read_config_file
+
+# hero_step and the stages of TableSession.stages, frame - everything that is done with one frame,
+# equity - the calculation that grab_table.py runs in the equity worker
+STAGES = ('hero_step', 'hero_cards', 'table_cards', 'amounts', 'seats', 'dealer_button', 'total_pot',
+          'players_info', 'bets', 'frame', 'equity')
+
+
+def read_frames(path):
+    """
+    Parameters:
+        path(str): directory with images of the table or a video file
+    Returns:
+        generator of numpy.ndarray: frames in BGR format
+    """
+    if os.path.isdir(path):
+        for file_name in sorted(os.listdir(path)):
+            img = cv2.imread(os.path.join(path, file_name))
+            if img is not None:
+                yield img
+    else:
+        video = cv2.VideoCapture(path)
+        if not video.isOpened():
+            raise ValueError("Can't read frames from %s" % path)
+        while True:
+            ok, img = video.read()
+            if not ok:
+                break
+            yield img
+        video.release()
+
+
+class StageTimer:
+    """
+    Measures how long every stage of the pipeline takes, the stages of a level may run in several threads
+    """
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.lock = threading.Lock()
+
+    def run(self, stage, func, *args):
+        start = time.perf_counter()
+        result = func(*args)
+        with self.lock:
+            self.latencies[stage].append(time.perf_counter() - start)
+        return result
+
+    def summary(self):
+        """
+        Returns:
+            summary(dict): key - stage, value - the number of calls and latency percentiles in milliseconds
+        """
+        summary = {}
+        for stage in STAGES:
+            latencies = np.array(self.latencies.get(stage, [])) * 1000
+            if len(latencies) == 0:
+                summary[stage] = {'count': 0}
+                continue
+            summary[stage] = {'count': len(latencies), 'mean_ms': float(latencies.mean()),
+                              'p50_ms': float(np.percentile(latencies, 50)),
+                              'p90_ms': float(np.percentile(latencies, 90)),
+                              'p99_ms': float(np.percentile(latencies, 99)),
+                              'max_ms': float(latencies.max())}
+        return summary
+
+
+class ReplayEquityWorker:
+    """
+    Calculates the equity of a new table state at once in the thread of the replay,
+    so that it is measured apart from recognition
+    """
+
+    def __init__(self, engine, timer):
+        """
+        Parameters:
+            engine(EquityEngine): engine for the equity stage
+            timer(StageTimer): measures the equity stage
+        """
+        self.engine = engine
+        self.timer = timer
+        self.state_id = 0
+        self.update = None
+
+    def submit(self, hero_cards, table_cards, opponents=1, ranges=None):
+        self.state_id += 1
+        equity = self.timer.run('equity', self.engine.equity, hero_cards, table_cards, opponents, ranges)
+        self.update = EquityUpdate(self.state_id, None if equity is None else EquityResult(equity, 0.0, 0), True)
+        return self.state_id
+
+    def latest(self):
+        update, self.update = self.update, None
+        return update
+
+
+def replay(frames, config, use_cache=True, equity_engine=None, stage_executor=None):
+    """
+    run the pipeline of grab_table.py (TableSession) over recorded frames without the window and without wmctrl
+    Parameters:
+        frames(iterable of numpy.ndarray): images of the whole table
+        config(dict): config file
+        use_cache(bool): reuse results of unchanged regions as grab_table.py does,
+        False - every frame is recognized from scratch
+        equity_engine(EquityEngine): engine for the equity stage
+        stage_executor(concurrent.futures.Executor): runs the independent stages in parallel as grab_table.py does,
+        None - the stages run one after another
+    Returns:
+        report(dict): per-stage latencies, frames per second and peak memory
+    """
+    templates = TemplateBank(config['paths'])
+    if not use_cache:
+        # nothing is kept, every glyph is classified
+        templates.glyph_cache.max_size = 0
+    equity_engine = equity_engine if equity_engine is not None else EquityEngine()
+    timer = StageTimer()
+    session = TableSession(config, templates, ReplayEquityWorker(equity_engine, timer),
+                           stage_executor=stage_executor, stage_timer=timer)
+    frames_count = 0
+    start = time.perf_counter()
+    for img in frames:
+        frames_count += 1
+        if not use_cache:
+            session.forget_results()
+        timer.run('frame', session.process, img)
+    elapsed = time.perf_counter() - start
+    return {'frames': frames_count,
+            'seconds': elapsed,
+            'fps': frames_count / elapsed if elapsed > 0 else 0.0,
+            # ru_maxrss is in kilobytes on Linux
+            'peak_memory_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+            'stages': timer.summary(),
+            'regions': {key: {'hits': hits, 'misses': misses}
+                        for key, (hits, misses) in session.detector.stats().items()},
+            'graph': {key: {'hits': hits, 'misses': misses} for key, (hits, misses) in session.graph.stats().items()},
+            'seats': {'hits': session.seat_cache.hits, 'misses': session.seat_cache.misses},
+            'glyphs': {key: {'hits': hits, 'misses': misses}
+                       for key, (hits, misses) in templates.glyph_cache.stats().items()}}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay recorded table frames and measure the pipeline')
+    parser.add_argument('frames', help='directory with images of the table or a video file')
+    parser.add_argument('--config', default='config.yaml', help='path to the config file')
+    parser.add_argument('--output', help='where to save the JSON report, by default it is printed')
+    parser.add_argument('--no-cache', action='store_true', help='run every stage on every frame')
+    args = parser.parse_args()
+    config = read_config_file(args.config)
+    # the stages run in parallel as in grab_table.py
+    with ThreadPoolExecutor(config['recognition']['stage_threads']) as stage_pool:
+        report = replay(read_frames(args.frames), config, use_cache=not args.no_cache, stage_executor=stage_pool)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as stream:
+            stream.write(text)
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+import copy
+import time
+from collections import namedtuple
+import cv2
+import numpy as np
+from scripts.table_layout import compile_layout
+from scripts.template_bank import resize_template
+
+# everything that is needed to recognize a table of one size
+ScaledTable = namedtuple('ScaledTable', ['scale', 'config', 'layout', 'templates'])
+
+# config sections with coordinates in {'x_0': .., 'y_0': .., 'x_1': .., 'y_1': ..} format
+REGIONS = ('hero_step_define', 'hero_cards', 'table_cards', 'pot')
+# config sections with coordinates of every player
+PLAYER_POINTS = ('player_center_coordinates', 'players_coordinates', 'players_bet')
+
+
+def scale_value(value, scale):
+    return int(round(value * scale))
+
+
+def scale_config(cfg, scale):
+    """
+    Parameters:
+        cfg(dict): config file made for the 1090x900 table
+        scale(float): size of the table relative to the size in the config
+    Returns:
+        scaled_cfg(dict): copy of the config with all coordinates and sizes multiplied by the scale
+    """
+    scaled_cfg = copy.deepcopy(cfg)
+    scaled_cfg['scale'] = scale
+    for key in ('width', 'height'):
+        scaled_cfg['table_size'][key] = scale_value(cfg['table_size'][key], scale)
+    for name in REGIONS:
+        for key, value in cfg[name].items():
+            if key in ('x_0', 'y_0', 'x_1', 'y_1', 'width', 'height', 'pot_template_width') \
+                    or key.startswith('separator_'):
+                scaled_cfg[name][key] = scale_value(value, scale)
+    # the number of gray pixels under the hero's cards grows with the area
+    scaled_cfg['hero_step_define']['min_white_pixels'] = scale_value(
+        cfg['hero_step_define']['min_white_pixels'], scale * scale)
+    for name in PLAYER_POINTS:
+        scaled_cfg[name] = {player: [scale_value(value, scale) for value in coordinates]
+                            for player, coordinates in cfg[name].items()}
+    scaled_cfg['dealer_button']['positions'] = {player: [scale_value(value, scale) for value in coordinates]
+                                                for player, coordinates in cfg['dealer_button']['positions'].items()}
+    scaled_cfg['dealer_button']['margin'] = max(scale_value(cfg['dealer_button']['margin'], scale), 1)
+    return scaled_cfg
+
+
+def calibrate_scale(img, cfg, templates, search=0.1, steps=21):
+    """
+    find the scale of the table by the pot label. First the size of the label is found roughly by comparing
+    the resized label with the image, then the scale is measured precisely by the height at which the label is,
+    as the label moves only horizontally
+    Parameters:
+        img(numpy.ndarray): image of the whole table
+        cfg(dict): config file made for the 1090x900 table
+        templates(TemplateBank): templates made for the 1090x900 table
+        search(float): how far from the ratio of the image width to the config width the scale is searched
+        steps(int): the number of checked sizes of the label
+    Returns:
+        scale(float): the scale rounded to 0.01
+        max_val(float): the score of the pot label
+    """
+    guess = img.shape[1] / cfg['table_size']['width']
+    pot = cfg['pot']
+    img_gray = cv2.cvtColor(img, cv2.COLOR_BGRA2GRAY if img.shape[2] == 4 else cv2.COLOR_BGR2GRAY)
+    best_val, best_y = -1.0, None
+    for scale in np.linspace(guess * (1 - search), guess * (1 + search), steps):
+        template_img = resize_template(templates['pot_image'], scale)
+        y_0 = scale_value(pot['y_0'], scale)
+        area_img = img_gray[y_0:scale_value(pot['y_1'], scale),
+                            scale_value(pot['x_0'], scale):scale_value(pot['x_1'], scale)]
+        if area_img.shape[0] < template_img.shape[0] or area_img.shape[1] < template_img.shape[1]:
+            continue
+        _, max_val, _, max_loc = cv2.minMaxLoc(cv2.matchTemplate(area_img, template_img, cv2.TM_CCOEFF_NORMED))
+        if max_val > best_val:
+            best_val, best_y = max_val, y_0 + max_loc[1]
+    if best_y is None:
+        return round(guess, 2), best_val
+    return round(best_y / pot['label_y'], 2), best_val
+
+
+class TableScaler:
+    """
+    Keeps the layout and the templates for every table size that has been seen.
+    A new size is calibrated with the first frame, all later frames of this size reuse the result.
+    While the pot label can't be found, the calibration is tried again only after retry_interval seconds
+    or on the first frame where hero is to act, so the table doesn't pay for it on every frame
+    """
+
+    def __init__(self, cfg, templates, min_score=0.8, retry_interval=5.0, clock=time.monotonic):
+        """
+        Parameters:
+            cfg(dict): config file made for the 1090x900 table
+            templates(TemplateBank): templates made for the 1090x900 table
+            min_score(float): if the pot label matches worse, the frame is not used for the calibration
+            retry_interval(float): seconds between the calibrations of a size while the pot label is not found
+            clock(callable): returns the current time in seconds
+        """
+        self.cfg = cfg
+        self.templates = templates
+        self.min_score = min_score
+        self.retry_interval = retry_interval
+        self.clock = clock
+        self.native = ScaledTable(1.0, cfg, compile_layout(cfg), templates)
+        # key - (height, width) of the image, value - ScaledTable
+        self.tables = {}
+        # tables of the sizes which are not calibrated yet, the scale is guessed by the width of the image
+        self.guesses = {}
+        # key - (height, width) of the image, value - time of the last calibration that didn't find the pot label
+        # and whether hero was to act on that frame
+        self.failed = {}
+
+    def scaled_table(self, scale, size):
+        """
+        Parameters:
+            scale(float): size of the table relative to the table in the config
+            size(tuple of int): (height, width) of the image
+        Returns:
+            scaled_table(ScaledTable): config, layout and templates of the scale
+        """
+        if scale == 1:
+            return self.native
+        scaled_cfg = scale_config(self.cfg, scale)
+        # the scaled table can be a pixel bigger than the image because of rounding
+        scaled_cfg['table_size'] = {'width': max(size[1], scaled_cfg['table_size']['width']),
+                                    'height': max(size[0], scaled_cfg['table_size']['height'])}
+        return ScaledTable(scale, scaled_cfg, compile_layout(scaled_cfg), self.templates.scaled(scale))
+
+    def table(self, img, hero_to_act=False):
+        """
+        the first frame of a new size with the pot label calibrates the scale of this size
+        Parameters:
+            img(numpy.ndarray): image of the whole table
+            hero_to_act(bool): hero is to act, a calibration that failed while hero was not to act
+            is tried again without waiting
+        Returns:
+            scaled_table(ScaledTable): config, layout and templates for the size of the image
+        """
+        size = img.shape[:2]
+        if size == (self.cfg['table_size']['height'], self.cfg['table_size']['width']):
+            return self.native
+        scaled_table = self.tables.get(size)
+        if scaled_table is not None:
+            return scaled_table
+        scaled_table = self.guesses.get(size)
+        if scaled_table is not None:
+            failed_at, failed_on_hero_turn = self.failed[size]
+            if self.clock() - failed_at < self.retry_interval and (failed_on_hero_turn or not hero_to_act):
+                return scaled_table
+        scale, max_val = calibrate_scale(img, self.cfg, self.templates)
+        if max_val >= self.min_score:
+            self.guesses.pop(size, None)
+            self.failed.pop(size, None)
+            scaled_table = self.tables[size] = self.scaled_table(scale, size)
+            return scaled_table
+        # there is no pot label on this frame
+        self.failed[size] = (self.clock(), hero_to_act)
+        if scaled_table is None:
+            scale = round(size[1] / self.cfg['table_size']['width'], 2)
+            scaled_table = self.guesses[size] = self.scaled_table(scale, size)
+        return scaled_table
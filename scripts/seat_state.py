@@ -0,0 +1,86 @@
+from collections import namedtuple
+import cv2
+from scripts.frame_diff import region_hash
+from scripts.utils import find_by_template
+
+OCCUPIED = 'occupied'
+EMPTY = 'empty'
+SITTING_OUT = 'sitting_out'
+
+# flags of players_info for the seats without a player in the game
+SEAT_FLAGS = {EMPTY: '-', SITTING_OUT: '-so-'}
+
+# templates of the seat states in the order they are checked, the first match decides the state
+SEAT_TEMPLATES = ((EMPTY, 'empty_seat'), (SITTING_OUT, 'sitting_out'))
+
+SeatStatus = namedtuple('SeatStatus', ['state', 'confidence'])
+
+
+def seat_gray(seat_img):
+    """
+    Parameters:
+        seat_img(numpy.ndarray): image of a seat in BGR or BGRA format
+    Returns:
+        img_gray(numpy.ndarray): the seat in grayscale
+    """
+    if seat_img.ndim == 2:
+        return seat_img
+    code = cv2.COLOR_BGRA2GRAY if seat_img.shape[2] == 4 else cv2.COLOR_BGR2GRAY
+    return cv2.cvtColor(seat_img, code)
+
+
+def classify_seat(seat_img, templates, min_score=0.8):
+    """
+    the seat is converted to grayscale once and compared with the templates of all seat states
+    Parameters:
+        seat_img(numpy.ndarray): image of a seat
+        templates(TemplateBank): preloaded template images
+        min_score(float): the smallest template score of an empty or sitting out seat
+    Returns:
+        status(SeatStatus): state of the seat, the confidence is the score of the matched template
+        or, for an occupied seat, 1 - the best score of all templates
+    """
+    img_gray = seat_gray(seat_img)
+    scores = [(state, find_by_template(img_gray, templates[name])[0]) for state, name in SEAT_TEMPLATES]
+    for state, score in scores:
+        if score > min_score:
+            return SeatStatus(state, float(score))
+    best_score = max(score for _, score in scores)
+    return SeatStatus(OCCUPIED, float(min(max(1 - best_score, 0), 1)))
+
+
+class SeatStateCache:
+    """
+    Keeps the status of every seat together with the hash of the seat image,
+    the seat is classified again only when its image changed
+    """
+
+    def __init__(self):
+        self.statuses = {}
+        self.hits = 0
+        self.misses = 0
+
+    def status(self, player, img, bbox, templates):
+        """
+        Parameters:
+            player(int): player number
+            img(numpy.ndarray): image of the whole table
+            bbox(list of int): seat of the player in [x_0, y_0, x_1, y_1] format
+            templates(TemplateBank): preloaded template images
+        Returns:
+            status(SeatStatus): state of the seat
+        """
+        digest = region_hash(img, [bbox])
+        cached_status = self.statuses.get(player)
+        if cached_status is not None and cached_status[0] == digest:
+            self.hits += 1
+            return cached_status[1]
+        self.misses += 1
+        status = classify_seat(img[bbox[1]:bbox[3], bbox[0]:bbox[2]], templates)
+        self.statuses[player] = (digest, status)
+        return status
+
+    def reset(self):
+        self.statuses = {}
+        self.hits = 0
+        self.misses = 0
@@ -0,0 +1,146 @@
+from collections import Counter, namedtuple
+
+# name(str): name of the result; func(callable): func(recognizer, *results of the inputs) computes it;
+# inputs(tuple of str): stages whose results the stage needs;
+# regions(tuple of str): regions of RegionChangeDetector the result depends on
+Stage = namedtuple('Stage', ['name', 'func', 'inputs', 'regions'])
+Stage.__new__.__defaults__ = ((), ())
+
+
+def stage_levels(stages):
+    """
+    Parameters:
+        stages(list of Stage): stages in any order
+    Returns:
+        levels(list of lists of Stage): every stage comes after all of its inputs,
+        the stages of one level don't depend on each other
+    """
+    names = {stage.name for stage in stages}
+    for stage in stages:
+        unknown = set(stage.inputs) - names
+        if unknown:
+            raise ValueError("Stage '%s' has unknown inputs: %s" % (stage.name, sorted(unknown)))
+    levels, done = [], set()
+    pending = list(stages)
+    while pending:
+        level = [stage for stage in pending if set(stage.inputs) <= done]
+        if not level:
+            raise ValueError("Stages depend on each other: %s" % [stage.name for stage in pending])
+        levels.append(level)
+        done |= {stage.name for stage in level}
+        pending = [stage for stage in pending if stage.name not in done]
+    return levels
+
+
+class StageGraph:
+    """
+    Runs the recognition of a frame as a graph of stages. The stages of one level are independent
+    and run at the same time on the executor, OpenCV and NumPy release the GIL while they work.
+    The result of a stage is reused while its regions and its inputs stay the same
+    """
+
+    def __init__(self, stages, detector, executor=None, timer=None):
+        """
+        Parameters:
+            stages(list of Stage): all stages of a frame
+            detector(RegionChangeDetector): hashes of the regions of the current frame
+            executor(concurrent.futures.Executor): runs the stages of one level in parallel,
+            None - the stages run one after another
+            timer(StageTimer): measures every computed stage, see replay.py, None - nothing is measured
+        """
+        self.levels = stage_levels(stages)
+        self.detector = detector
+        self.executor = executor
+        self.timer = timer
+        # key - stage name, value - (signature, version, result)
+        self.results = {}
+        self.versions = Counter()
+        self.hits = Counter()
+        self.misses = Counter()
+
+    def signature(self, stage):
+        """
+        Returns:
+            signature(tuple): hashes of the regions of the stage and versions of its inputs
+        """
+        return (tuple(self.detector.hashes[name] for name in stage.regions),
+                tuple(self.results[name][1] for name in stage.inputs))
+
+    def required(self, names):
+        """
+        Returns:
+            required(set of str): the stages and all stages whose results they need
+        """
+        inputs = {stage.name: stage.inputs for level in self.levels for stage in level}
+        required, pending = set(), list(names)
+        while pending:
+            name = pending.pop()
+            if name not in required:
+                required.add(name)
+                pending += inputs[name]
+        return required
+
+    def run(self, recognizer, names=None):
+        """
+        Parameters:
+            recognizer(PokerStarsTableRecognizer): recognizer of the current frame
+            names(tuple of str): stages to run together with their inputs, None - all stages
+        Returns:
+            results(dict): key - stage name, value - its result on this frame, the stages that were not run
+            keep the result of the frame they were run last
+            recomputed(list of str): stages that were not taken from the cache
+        """
+        required = None if names is None else self.required(names)
+        recomputed = []
+        for level in self.levels:
+            stale = []
+            for stage in level:
+                if required is not None and stage.name not in required:
+                    continue
+                signature = self.signature(stage)
+                cached_result = self.results.get(stage.name)
+                if cached_result is not None and cached_result[0] == signature:
+                    self.hits[stage.name] += 1
+                else:
+                    self.misses[stage.name] += 1
+                    stale.append((stage, signature))
+            calls = [(stage.func, [recognizer] + [self.results[name][2] for name in stage.inputs])
+                     for stage, _ in stale]
+            if self.timer is not None:
+                calls = [(self.timer.run, [stage.name, func] + args) for (stage, _), (func, args) in zip(stale, calls)]
+            if self.executor is None or len(stale) < 2:
+                outputs = [func(*args) for func, args in calls]
+            else:
+                futures = [self.executor.submit(func, *args) for func, args in calls]
+                outputs = [future.result() for future in futures]
+            for (stage, signature), output in zip(stale, outputs):
+                self.versions[stage.name] += 1
+                self.results[stage.name] = (signature, self.versions[stage.name], output)
+                recomputed.append(stage.name)
+        return {name: value[2] for name, value in self.results.items()}, recomputed
+
+    def reset(self):
+        """
+        forget all results and counters
+        """
+        self.results = {}
+        self.hits.clear()
+        self.misses.clear()
+
+    def stats(self):
+        """
+        Returns:
+            stats(dict): key - stage name, value - (hits, misses) tuple
+        """
+        return {key: (self.hits[key], self.misses[key]) for key in sorted(set(self.hits) | set(self.misses))}
+
+    def report(self):
+        """
+        Returns:
+            text(str): hit/miss counters of every stage in one line per stage
+        """
+        lines = []
+        for key, (hits, misses) in self.stats().items():
+            hit_rate = 100 * hits / (hits + misses)
+            lines.append('{0}: hits={1} misses={2} hit_rate={3:.1f}%'.format(key, hits, misses, hit_rate))
+        return '\n'.join(lines)
@@ -0,0 +1,140 @@
+import os
+import pickle
+import struct
+import zipfile
+import numpy as np
+from scripts.utils import CONFIG_PATH, read_config_file
+from scripts.template_bank import TemplateBank
+
+# the config and all templates in one file, see load_startup
+STARTUP_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'startup.npz')
+# size of the local file header of a zip archive without the file name and the extra field
+ZIP_LOCAL_HEADER_SIZE = 30
+
+
+def source_files(config_path, paths):
+    """
+    Parameters:
+        config_path(str): path to the config file
+        paths(dict): 'paths' section of the config
+    Returns:
+        files(list of str): the config, the template folders and the template files. A folder changes its
+        modification time when a template is added or removed
+    """
+    files = [config_path]
+    for path in paths.values():
+        files.append(path)
+        if os.path.isdir(path):
+            files += [os.path.join(path, name) for name in sorted(os.listdir(path))]
+    return files
+
+
+def source_signature(files):
+    """
+    Returns:
+        signature(list of tuples): (path, modification time, size) of every file, None if a file doesn't exist
+    """
+    signature = []
+    for path in files:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        signature.append((path, stat.st_mtime_ns, stat.st_size))
+    return signature
+
+
+def save_startup_cache(filename, config_path, config, templates):
+    """
+    save the config and the templates as one uncompressed .npz file
+    Parameters:
+        filename(str): path to the cache file
+        config_path(str): path to the config file the config was read from
+        config(dict): the config
+        templates(dict): TemplateBank.templates of the config
+    """
+    arrays, index = {}, {}
+    for name, value in templates.items():
+        if isinstance(value, dict):
+            index[name] = sorted(value)
+            arrays.update({'{0}/{1}'.format(name, key): value[key] for key in value})
+        else:
+            index[name] = None
+            arrays[name] = value
+    meta = {'signature': source_signature(source_files(config_path, config['paths'])), 'config': config,
+            'index': index}
+    arrays['__meta__'] = np.frombuffer(pickle.dumps(meta), dtype=np.uint8)
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+    temp_filename = '{0}.{1}.tmp'.format(filename, os.getpid())
+    with open(temp_filename, 'wb') as stream:
+        np.savez(stream, **arrays)
+    os.replace(temp_filename, filename)
+
+
+def npz_memmap(filename):
+    """
+    Parameters:
+        filename(str): uncompressed .npz file
+    Returns:
+        arrays(dict): key - name of the array, value - read-only array that is memory-mapped from the file
+    """
+    arrays = {}
+    data = np.memmap(filename, dtype=np.uint8, mode='r')
+    with zipfile.ZipFile(filename) as archive, open(filename, 'rb') as stream:
+        for info in archive.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError("Compressed arrays can't be memory-mapped: %s" % info.filename)
+            stream.seek(info.header_offset + ZIP_LOCAL_HEADER_SIZE - 4)
+            name_length, extra_length = struct.unpack('<HH', stream.read(4))
+            stream.seek(info.header_offset + ZIP_LOCAL_HEADER_SIZE + name_length + extra_length)
+            version = np.lib.format.read_magic(stream)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(stream)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(stream)
+            offset = stream.tell()
+            size = int(np.prod(shape)) * dtype.itemsize
+            array = np.asarray(data[offset:offset + size]).view(dtype)
+            arrays[info.filename[:-len('.npy')]] = array.reshape(shape, order='F' if fortran_order else 'C')
+    return arrays
+
+
+def read_startup_cache(filename, config_path):
+    """
+    Returns:
+        config(dict): the config, None if there is no cache or the config or a template changed after it was saved
+        templates(dict): templates in the format of TemplateBank.templates, memory-mapped from the cache
+    """
+    try:
+        arrays = npz_memmap(filename)
+        meta = pickle.loads(arrays.pop('__meta__').tobytes())
+        files = [path for path, _, _ in meta['signature'] or []]
+    except (OSError, ValueError, zipfile.BadZipFile, KeyError, EOFError, pickle.UnpicklingError):
+        # a cache written by another version or a broken file is written again
+        return None, None
+    if not files or files[0] != config_path or source_signature(files) != meta['signature']:
+        return None, None
+    templates = {name: arrays[name] if keys is None else {key: arrays['{0}/{1}'.format(name, key)] for key in keys}
+                 for name, keys in meta['index'].items()}
+    return meta['config'], templates
+
+
+def load_startup(config_path=CONFIG_PATH, cache_path=STARTUP_CACHE_PATH):
+    """
+    read the config and the templates from the cache, the cache is written again
+    if the config or a template has changed since the last start
+    Parameters:
+        config_path(str): path to the config file
+        cache_path(str): path to the cache file
+    Returns:
+        config(dict): the config
+        templates(TemplateBank): templates of the config
+    """
+    config_path = os.path.abspath(config_path)
+    config, templates = read_startup_cache(cache_path, config_path)
+    if config is not None:
+        return config, TemplateBank(config['paths'], templates=templates)
+    config = read_config_file(config_path)
+    bank = TemplateBank(config['paths'])
+    save_startup_cache(cache_path, config_path, config, bank.templates)
+    return config, bank
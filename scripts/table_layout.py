@@ -0,0 +1,147 @@
+import threading
+from collections import OrderedDict
+from types import MappingProxyType
+import numpy as np
+
+
+def roi_slices(x_0, y_0, x_1, y_1):
+    """
+    Returns:
+        roi(tuple of slice): (rows, columns) slices that cut the region out of the table image
+    """
+    return slice(y_0, y_1), slice(x_0, x_1)
+
+
+class TableLayout:
+    """
+    Coordinates of all regions of one table compiled from the config once.
+    Regions are stored as slices that are applied to the image as they are,
+    separators of the cards are stored as numpy arrays. The layout can't be changed after it is created,
+    so one layout can be shared by all recognizers, threads and tables of the same size and skin
+    """
+    __slots__ = ('width', 'height', 'scale', 'paths',
+                 'hero_step_roi', 'hero_step_lower_color', 'hero_step_upper_color', 'hero_step_min_white_pixels',
+                 'hero_cards_roi', 'hero_cards_separators', 'table_cards_roi', 'table_cards_separators',
+                 'pot_roi', 'pot_width', 'pot_height', 'pot_template_width',
+                 'player_center_coordinates', 'dealer_button_positions', 'dealer_button_margin',
+                 'dealer_button_min_score', 'players_coordinates', 'players_roi', 'players_bet', 'players_bet_roi')
+
+    def __init__(self, cfg):
+        """
+        Parameters:
+            cfg(dict): config file
+        """
+        values = {'width': cfg['table_size']['width'], 'height': cfg['table_size']['height'],
+                  # size of the table relative to the table the templates were made for, see scale_config
+                  'scale': cfg.get('scale', 1.0),
+                  'paths': MappingProxyType(dict(cfg['paths']))}
+        hero_step = cfg['hero_step_define']
+        values.update(hero_step_roi=self.compile_region('hero_step_define', hero_step, cfg),
+                      hero_step_lower_color=read_only(np.array(hero_step['lower_gray_color'])),
+                      hero_step_upper_color=read_only(np.array(hero_step['upper_gray_color'])),
+                      hero_step_min_white_pixels=hero_step['min_white_pixels'])
+        for name in ('hero_cards', 'table_cards'):
+            values[name + '_roi'] = self.compile_region(name, cfg[name], cfg)
+            values[name + '_separators'] = self.compile_separators(name, cfg[name])
+        pot = cfg['pot']
+        values.update(pot_roi=self.compile_region('pot', pot, cfg), pot_width=pot['width'], pot_height=pot['height'],
+                      pot_template_width=pot['pot_template_width'])
+        values.update(player_center_coordinates=frozen_points(cfg['player_center_coordinates']),
+                      dealer_button_positions=frozen_points(cfg['dealer_button']['positions']),
+                      dealer_button_margin=cfg['dealer_button']['margin'],
+                      dealer_button_min_score=cfg['dealer_button']['min_score'])
+        for name, roi_name in (('players_coordinates', 'players_roi'), ('players_bet', 'players_bet_roi')):
+            values[name] = frozen_points(cfg[name])
+            values[roi_name] = MappingProxyType(
+                {player: self.compile_region('%s %s' % (name, player), dict(zip(('x_0', 'y_0', 'x_1', 'y_1'), bbox)),
+                                             cfg)
+                 for player, bbox in values[name].items()})
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+    @staticmethod
+    def compile_region(name, region, cfg):
+        """
+        Parameters:
+            name(str): name of the region for the error message
+            region(dict): coordinates in {'x_0': .., 'y_0': .., 'x_1': .., 'y_1': ..} format
+            cfg(dict): config file
+        Returns:
+            roi(tuple of slice): see roi_slices
+        """
+        width, height = cfg['table_size']['width'], cfg['table_size']['height']
+        x_0, y_0, x_1, y_1 = region['x_0'], region['y_0'], region['x_1'], region['y_1']
+        if not (0 <= x_0 < x_1 <= width and 0 <= y_0 < y_1 <= height):
+            raise ValueError("Region %s [%s, %s, %s, %s] is outside of the table %sx%s"
+                             % (name, x_0, y_0, x_1, y_1, width, height))
+        return roi_slices(x_0, y_0, x_1, y_1)
+
+    @staticmethod
+    def compile_separators(name, region):
+        """
+        Parameters:
+            name(str): name of the region with cards
+            region(dict): config section with separator_1, separator_2 etc. keys
+        Returns:
+            separators(numpy.ndarray): x coordinates where the cards end in increasing order
+        """
+        keys = sorted((key for key in region if key.startswith('separator_')), key=lambda key: int(key[10:]))
+        separators = np.array([region[key] for key in keys])
+        if len(separators) == 0 or (np.diff(separators) <= 0).any() or separators[0] <= 0 \
+                or separators[-1] > region['x_1'] - region['x_0']:
+            raise ValueError("Separators of %s should increase and stay inside the region: %s"
+                             % (name, separators.tolist()))
+        return read_only(separators)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("TableLayout can't be changed, compile a new one from the config")
+
+    def __delattr__(self, name):
+        raise AttributeError("TableLayout can't be changed, compile a new one from the config")
+
+
+def read_only(array):
+    array.setflags(write=False)
+    return array
+
+
+def frozen_points(points):
+    """
+    Parameters:
+        points(dict): key - player number, value - list of coordinates
+    Returns:
+        points(mappingproxy): the same points with tuples of coordinates which can't be changed
+    """
+    return MappingProxyType({player: tuple(coordinates) for player, coordinates in points.items()})
+
+
+# layouts of the last configs, a config that is reloaded or scaled again is compiled again only
+# after LAYOUT_CACHE_SIZE other configs were used
+LAYOUT_CACHE_SIZE = 16
+_compiled = OrderedDict()
+_compiled_lock = threading.Lock()
+
+
+def compile_layout(cfg):
+    """
+    Parameters:
+        cfg(dict or TableLayout): config file or an already compiled layout
+    Returns:
+        layout(TableLayout): the layout of the config, a config is compiled once while it is among
+        the last LAYOUT_CACHE_SIZE configs, so several configs (table sizes, skins) can be used side by side
+    """
+    if isinstance(cfg, TableLayout):
+        return cfg
+    with _compiled_lock:
+        compiled = _compiled.get(id(cfg))
+        # the config is kept together with its layout, so its id can't be reused by another dict
+        if compiled is not None and compiled[0] is cfg:
+            _compiled.move_to_end(id(cfg))
+            return compiled[1]
+    layout = TableLayout(cfg)
+    with _compiled_lock:
+        _compiled[id(cfg)] = (cfg, layout)
+        _compiled.move_to_end(id(cfg))
+        while len(_compiled) > LAYOUT_CACHE_SIZE:
+            _compiled.popitem(last=False)
+    return layout
@@ -23,7 +23,7 @@ class PokerTableRecognizer(ABC):
         pass
 
     @abstractmethod
-    def get_dealer_button_position(self):
+    def get_dealer_button_position(self, previous_player=None):
         """
         determine who is closer to the dealer button
         """
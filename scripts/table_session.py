@@ -0,0 +1,263 @@
+import queue
+import time
+from collections import namedtuple
+from functools import partial
+from scripts.pokerstars_recognition import PokerStarsTableRecognizer
+from scripts.utils import data_concatenate, count_opponents
+from scripts.frame_diff import RegionChangeDetector, REGIONS
+from scripts.stage_graph import Stage, StageGraph
+from scripts.output_sinks import TableUpdate
+from scripts.seat_state import SeatStateCache, OCCUPIED
+from scripts.scaling import TableScaler
+from scripts.hand_state import HandStateTracker, TableObservation, NewHand, BoardCardsDealt, PotChanged, \
+    PlayersChanged, HandFinished
+
+OTHER_REGIONS = tuple(name for name in REGIONS if name != 'hero_step_define')
+# while hero is not to act only the cards and the pot are read, they are enough to follow the hand
+IDLE_STAGES = ('hero_cards', 'table_cards', 'total_pot')
+IDLE_REGIONS = ('hero_cards', 'table_cards', 'pot')
+
+
+# everything that was recognized on one frame of the table. hero_step(bool), hero_cards(list of str),
+# table_cards(list of str), total_pot(str), dealer_button(int): player with the button,
+# seats(dict): key - player number, value - SeatStatus, players_info(dict): see find_players_bet,
+# bets(dict): key - player number, value - bet of the occupied seat, recomputed(list of str): stages that
+# were not taken from the cache. Only hero_step and the cards and the pot are known on the frames
+# where hero is not to act
+FrameResult = namedtuple('FrameResult', ['hero_step', 'hero_cards', 'table_cards', 'total_pot', 'dealer_button',
+                                         'seats', 'players_info', 'bets', 'recomputed'])
+FrameResult.__new__.__defaults__ = (None,) * (len(FrameResult._fields) - 1)
+
+
+def recognize_players(recognizer, dealer_button, seats_state, amounts):
+    """
+    Parameters:
+        recognizer(PokerStarsTableRecognizer): recognizer of the current frame
+        dealer_button(int): the player with the dealer button
+        seats_state(dict): result of get_seats_state, it may be from one of the previous frames
+        amounts(dict): result of read_amounts, it may be from one of the previous frames
+    Returns:
+        players_info(dict): info about players in {'Hero':'BTN', 'SB':'', 'BB':'50' etc. } format
+    """
+    recognizer.seats_state, recognizer.amounts = seats_state, amounts
+    players_info = {player: '' for player in recognizer.layout.players_coordinates}
+    players_info[dealer_button] = 'dealer_button'
+    players_info = recognizer.get_empty_seats(players_info)
+    players_info = recognizer.get_so_players(players_info)
+    players_info = recognizer.assign_positions(players_info)
+    players_info = recognizer.find_players_bet(players_info)
+    return players_info
+
+
+def seat_bets(recognizer, seats_state, amounts):
+    """
+    Returns:
+        bets(dict): key - number of the player in the game, value - his bet, '' if there is no bet
+    """
+    return {seat: amounts[seat].text for seat in recognizer.layout.players_bet
+            if seats_state[seat].state == OCCUPIED}
+
+
+def format_equity(update):
+    """
+    Parameters:
+        update(EquityUpdate): the newest equity of the table state, None if nothing is calculated yet
+    Returns:
+        equity(str): equity in percent, with the standard error while the estimate is being refined
+    """
+    if update is None or update.result is None:
+        return 'calculating...' if update is None or not update.final else None
+    if update.final:
+        return '{0:.2f}%'.format(update.result.equity)
+    return '{0:.2f}% ±{1:.2f}'.format(update.result.equity, update.result.std_error)
+
+
+class TableSession:
+    """
+    Everything that belongs to one table: recognition results of the previous frames,
+    the equity calculation of the current table state and the text for the table's window
+    """
+
+    def __init__(self, config, templates, equity_worker, rect=None, recorder=None, stage_executor=None,
+                 stage_timer=None):
+        """
+        Parameters:
+            config(dict): config file
+            templates(TemplateBank): preloaded template images
+            equity_worker(EquityWorker): calculates equity of this table
+            rect(dict): position of the table on the screen in {'top': y, 'left': x} format
+            recorder(HandRecorder): saves the finished hands of the table, None - hands are not saved
+            stage_executor(concurrent.futures.Executor): runs the independent recognition stages in parallel,
+            None - the stages run one after another
+            stage_timer(StageTimer): measures the recognition stages, see replay.py, None - nothing is measured
+        """
+        self.config = config
+        # tables of another size than in the config are recognized with a scaled layout and templates
+        self.scaler = TableScaler(config, templates)
+        self.table = self.scaler.native
+        self.templates = templates
+        self.equity_worker = equity_worker
+        self.rect = rect
+        self.detector = RegionChangeDetector(config)
+        self.stage_executor = stage_executor
+        self.stage_timer = stage_timer
+        self.graph = StageGraph(self.stages(), self.detector, stage_executor, stage_timer)
+        self.seat_cache = SeatStateCache()
+        self.dealer_button_player = None
+        self.tracker = HandStateTracker()
+        # what has to be done after the events of the current frame
+        self.changed = {}
+        self.tracker.subscribe((NewHand, BoardCardsDealt, PlayersChanged),
+                               lambda event: self.changed.update(equity=True))
+        self.tracker.subscribe((NewHand, BoardCardsDealt, PotChanged, PlayersChanged, HandFinished),
+                               lambda event: self.changed.update(table_state=True))
+        self.recorder = recorder
+        if recorder is not None:
+            recorder.attach(self.tracker)
+        self.equity_inputs = None
+        self.state_id = None
+        self.table_states = queue.Queue()
+        self.shown = {'table_state': None, 'equity': None, 'update': None}
+
+    def stages(self):
+        """
+        Returns:
+            stages(list of Stage): recognition of a frame where hero is to act, IDLE_STAGES of them
+            are run on the other frames
+        """
+        return [Stage('hero_cards', lambda recognizer: recognizer.detect_hero_cards(), regions=('hero_cards',)),
+                Stage('table_cards', lambda recognizer: recognizer.detect_table_cards(), regions=('table_cards',)),
+                Stage('total_pot', lambda recognizer: recognizer.find_total_pot(), regions=('pot',)),
+                Stage('amounts', lambda recognizer: recognizer.read_amounts(pot=False), regions=('players_bet',)),
+                Stage('seats', lambda recognizer: recognizer.get_seats_state(), regions=('players_coordinates',)),
+                # the dealer button only moves together with new hero cards
+                Stage('dealer_button', lambda recognizer: recognizer.find_dealer_button(self.dealer_button_player)[0],
+                      regions=('hero_cards',)),
+                Stage('players_info', recognize_players, inputs=('dealer_button', 'seats', 'amounts')),
+                Stage('bets', seat_bets, inputs=('seats', 'amounts'))]
+
+    def forget_results(self):
+        """
+        the next frame is recognized from scratch, the hit/miss counters stay
+        """
+        self.detector.hashes, self.detector.results = {}, {}
+        self.graph.results = {}
+        self.seat_cache.statuses = {}
+
+    def recognize(self, img):
+        """
+        Parameters:
+            img(numpy.ndarray): image of the whole table
+        Returns:
+            frame(FrameResult): recognition results of the frame
+        """
+        # a table of a new size without the pot label is calibrated again at once when hero was to act
+        table = self.scaler.table(img, bool(self.tracker.hero_step))
+        if table is not self.table:
+            self.table = table
+            self.detector = RegionChangeDetector(table.config)
+            self.graph = StageGraph(self.stages(), self.detector, self.stage_executor, self.stage_timer)
+            self.seat_cache.reset()
+        self.detector.update(img, ('hero_step_define',))
+        recognizer = PokerStarsTableRecognizer(img, table.layout, table.templates, self.seat_cache)
+        detect_hero_step = recognizer.detect_hero_step
+        if self.stage_timer is not None:
+            detect_hero_step = partial(self.stage_timer.run, 'hero_step', recognizer.detect_hero_step)
+        hero_step = self.detector.cached('hero_step_define', detect_hero_step)
+        if not hero_step:
+            # the cards and the pot are enough to follow the hand until hero is to act again
+            self.detector.update(img, IDLE_REGIONS)
+            results, recomputed = self.graph.run(recognizer, IDLE_STAGES)
+            return FrameResult(False, results['hero_cards'], results['table_cards'], results['total_pot'],
+                               recomputed=recomputed)
+        self.detector.update(img, OTHER_REGIONS)
+        results, recomputed = self.graph.run(recognizer)
+        self.dealer_button_player = results['dealer_button']
+        return FrameResult(hero_step, results['hero_cards'], results['table_cards'], results['total_pot'],
+                           results['dealer_button'], results['seats'], results['players_info'], results['bets'],
+                           recomputed)
+
+    def process(self, img):
+        """
+        recognize one frame of the table, only the regions that changed are recognized again and
+        only the changes of the hand are sent to the equity worker and to the window
+        Parameters:
+            img(numpy.ndarray): image of the whole table
+        Returns:
+            events(list): changes of the hand on this frame, see HandStateTracker
+        """
+        frame = self.recognize(img)
+        events = self.tracker.update(TableObservation(frame.hero_step, frame.hero_cards, frame.table_cards,
+                                                      frame.total_pot, frame.players_info, frame.bets))
+        if self.changed.pop('equity', False):
+            self.submit_equity()
+        if self.changed.pop('table_state', False):
+            tracker = self.tracker
+            self.table_states.put((self.state_id, tracker.hero_cards, tracker.table_cards, tracker.total_pot,
+                                   tracker.players_info))
+        return events
+
+    def submit_equity(self):
+        """
+        the equity is calculated again only if the cards or the number of opponents changed. The opponents
+        of a new hand are known from the first frame where hero is to act, until then nothing is calculated
+        """
+        tracker = self.tracker
+        if tracker.players_info is None:
+            equity_inputs = None
+        else:
+            equity_inputs = (tracker.hero_cards, tracker.table_cards, count_opponents(tracker.players_info))
+        if equity_inputs is None:
+            self.equity_inputs = self.state_id = None
+            if self.recorder is not None:
+                self.recorder.state_id = None
+        elif equity_inputs != self.equity_inputs:
+            self.equity_inputs = equity_inputs
+            self.state_id = self.equity_worker.submit(*equity_inputs)
+            if self.recorder is not None:
+                self.recorder.state_id = self.state_id
+
+    def next_text(self):
+        """
+        called by the window, combines the newest table state with the newest equity of this state
+        Returns:
+            text(str): new text for the window, None if nothing changed
+        """
+        changed = False
+        while True:
+            try:
+                self.shown['table_state'], self.shown['equity'] = self.table_states.get_nowait(), None
+                changed = True
+            except queue.Empty:
+                break
+        if self.shown['table_state'] is None:
+            return None
+        state_id, hero_cards, table_cards, total_pot, players_info = self.shown['table_state']
+        update = self.equity_worker.latest()
+        if update is not None:
+            self.shown['update'] = update
+        # the update may come a bit earlier than its table state
+        if self.shown['update'] is not None and self.shown['update'].state_id == state_id \
+                and self.shown['update'] is not self.shown['equity']:
+            self.shown['equity'] = self.shown['update']
+            changed = True
+            if self.recorder is not None and self.shown['equity'].final and self.shown['equity'].result is not None:
+                self.recorder.equities[state_id] = self.shown['equity'].result.equity
+        if not changed:
+            return None
+        return data_concatenate(hero_cards, table_cards, total_pot or '', format_equity(self.shown['equity']),
+                                players_info or {})
+
+    def next_update(self, table):
+        """
+        Parameters:
+            table(int): number of the table
+        Returns:
+            update(TableUpdate): the new state of the table for the output sinks, None if nothing changed
+        """
+        text = self.next_text()
+        if text is None:
+            return None
+        _, hero_cards, table_cards, total_pot, players_info = self.shown['table_state']
+        return TableUpdate(table, time.time(), hero_cards, table_cards, total_pot,
+                           format_equity(self.shown['equity']), players_info, text)
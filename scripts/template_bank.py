@@ -0,0 +1,148 @@
+import os
+import cv2
+import numpy as np
+from scripts.glyph_classifier import GlyphClassifier
+from scripts.glyph_cache import GlyphCache
+
+# template folders that are compared in color, all other templates are compared in grayscale
+COLOR_TEMPLATES = ('hero_cards_suits', 'table_cards_suits')
+
+
+class TemplateBank:
+    """
+    In-memory storage of all template images from the 'paths' section of the config.
+    Every template is read from the disk once and kept ready for comparison:
+    folders are stored as {name: numpy.ndarray} dicts (float32, color or grayscale),
+    single images are stored as grayscale uint8 arrays for cv2.matchTemplate.
+    Templates are drawn for a 1090x900 table, for other table sizes they are resized once per scale
+    """
+    _shared = {}
+
+    def __init__(self, paths, scale=1.0, templates=None):
+        """
+        Parameters:
+            paths(dict): key - template name, value - path to the folder or to the image
+            scale(float): size of the table relative to the table the templates were made for
+            templates(dict): templates that are already loaded in the format of self.templates,
+            e.g. from the startup cache, by default they are read from the disk
+        """
+        self.paths = dict(paths)
+        self.scale = scale
+        self.templates = {}
+        self.classifiers = {}
+        # labels of the glyphs that were already classified with these templates
+        self.glyph_cache = GlyphCache()
+        self.scaled_banks = {}
+        if templates is None:
+            self.reload()
+        else:
+            self.templates = dict(templates)
+
+    @classmethod
+    def shared(cls, cfg):
+        """
+        Parameters:
+            cfg(dict): config file
+        Returns:
+            bank(TemplateBank): bank that is shared by everyone who uses the same paths
+        """
+        key = tuple(sorted(cfg['paths'].items()))
+        bank = cls._shared.get(key)
+        if bank is None:
+            bank = cls._shared[key] = cls(cfg['paths'])
+        return bank
+
+    @staticmethod
+    def color_of_img(name):
+        """
+        Returns:
+            color_of_img(int): cv2.IMREAD_COLOR or cv2.IMREAD_GRAYSCALE
+        """
+        return cv2.IMREAD_COLOR if name in COLOR_TEMPLATES else cv2.IMREAD_GRAYSCALE
+
+    def reload(self, names=None):
+        """
+        read the templates from the disk again, for example after the template folders were changed
+        Parameters:
+            names(list of str): which templates to reload, all templates if None
+        """
+        self.glyph_cache.clear(names)
+        for name in self.paths if names is None else names:
+            path = self.paths[name]
+            self.classifiers.pop(name, None)
+            if os.path.isdir(path):
+                self.templates[name] = {template_name: resize_template(template_img, self.scale)
+                                        for template_name, template_img in
+                                        load_templates(path, self.color_of_img(name)).items()}
+            else:
+                template_img = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+                if template_img is None:
+                    raise FileNotFoundError("Template image not found: %s" % path)
+                self.templates[name] = resize_template(template_img, self.scale)
+        for bank in self.scaled_banks.values():
+            bank.reload(names)
+
+    def scaled(self, scale):
+        """
+        Parameters:
+            scale(float): size of the table relative to the table the templates were made for
+        Returns:
+            bank(TemplateBank): bank with the same templates resized to the scale, it is created once per scale
+        """
+        if scale == self.scale:
+            return self
+        bank = self.scaled_banks.get(scale)
+        if bank is None:
+            bank = self.scaled_banks[scale] = TemplateBank(self.paths, scale)
+        return bank
+
+    def classifier(self, name):
+        """
+        Parameters:
+            name(str): name of the template folder
+        Returns:
+            classifier(GlyphClassifier): classifier over all templates of the folder
+        """
+        classifier = self.classifiers.get(name)
+        if classifier is None:
+            classifier = self.classifiers[name] = GlyphClassifier(self.templates[name], self.color_of_img(name))
+        return classifier
+
+    def __getitem__(self, name):
+        return self.templates[name]
+
+    def __contains__(self, name):
+        return name in self.templates
+
+
+def load_templates(directory, color_of_img):
+    """
+    Parameters:
+        directory(str): path to the template images
+        color_of_img(int): cv2.IMREAD_COLOR or cv2.IMREAD_GRAYSCALE
+    Returns:
+        templates(dict): key - template name without extension, value - image in float32
+    """
+    templates = {}
+    for full_image_name in sorted(os.listdir(directory)):
+        image_name = full_image_name.split('.')[0]
+        template_img = cv2.imread(os.path.join(directory, full_image_name), color_of_img)
+        if template_img is None:
+            continue
+        templates[image_name] = template_img.astype(np.float32)
+    return templates
+
+
+def resize_template(template_img, scale):
+    """
+    Parameters:
+        template_img(numpy.ndarray): template image
+        scale(float): how many times to enlarge or reduce the template
+    Returns:
+        template_img(numpy.ndarray): resized template, the same array if the scale is 1
+    """
+    if scale == 1:
+        return template_img
+    height, width = template_img.shape[:2]
+    size = (max(int(round(width * scale)), 1), max(int(round(height * scale)), 1))
+    return cv2.resize(template_img, size, interpolation=cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR)
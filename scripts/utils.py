@@ -1,20 +1,37 @@
 import cv2
 import numpy as np
-import yaml
 import os
-from time import sleep
+import subprocess
+import time
 from math import sqrt
+from scripts.profiling import profiled, profiler
 
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config.yaml')
 
-def read_config_file(filename='config.yaml'):
+
+def read_yaml(filename):
     """
-    Parameters:
-        filename (str): config file name
-    Returns: loaded_data (dict)
+    Returns:
+        loaded_data: content of the yaml file, parsed with libyaml if PyYAML was built with it
     """
+    import yaml
     with open(filename, 'r') as stream:
-        loaded_data = yaml.safe_load(stream)
-        return loaded_data
+        return yaml.load(stream, Loader=getattr(yaml, 'CSafeLoader', yaml.SafeLoader))
+
+
+def read_config_file(filename=CONFIG_PATH):
+    """
+    Parameters:
+        filename (str): config file name, by default config.yaml next to this module
+    Returns: loaded_data (dict), the paths of its 'paths' section are relative to the directory of the config,
+    so the program can be started from any directory
+    """
+    loaded_data = read_yaml(filename)
+    if 'paths' in loaded_data:
+        directory = os.path.dirname(os.path.abspath(filename))
+        loaded_data['paths'] = {name: os.path.join(directory, path)
+                                for name, path in loaded_data['paths'].items()}
+    return loaded_data
 
 
 def sort_bboxes(bounding_boxes, method):
@@ -62,11 +79,12 @@ def mse(img, benchmark_img):
     return err
 
 
+@profiled('utils.image_comparison')
 def image_comparison(img, benchmark_img, color_of_img):
     """
     Parameters:
         img(numpy.ndarray): image of a part of the table
-        benchmark_img(str): path to benchmark image
+        benchmark_img(str or numpy.ndarray): path to benchmark image or already loaded benchmark image
         color_of_img(int): set in which format to read the image.
         It can be cv2.IMREAD_COLOR or cv2.IMREAD_GRAYSCALE
     Returns:
@@ -75,18 +93,33 @@ def image_comparison(img, benchmark_img, color_of_img):
     colors = [cv2.IMREAD_COLOR, cv2.IMREAD_GRAYSCALE]
     if color_of_img not in colors:
         raise ValueError("Invalid method. Expected one of: %s" % colors)
-    benchmark_img = cv2.imread(benchmark_img, color_of_img)
+    if isinstance(benchmark_img, str):
+        benchmark_img = cv2.imread(benchmark_img, color_of_img)
     res_img = cv2.resize(img, (benchmark_img.shape[1], benchmark_img.shape[0]))
     if color_of_img == cv2.IMREAD_GRAYSCALE:
         res_img = cv2.cvtColor(res_img, cv2.COLOR_BGR2GRAY)
     err = mse(res_img, benchmark_img)
+    profiler.add_comparisons('utils.image_comparison', 1)
     return err
 
 
+def to_bgr(img):
+    """
+    Parameters:
+        img(numpy.ndarray): image in BGR or BGRA (as the screen is captured) format
+    Returns:
+        img(numpy.ndarray): image in BGR format, the same image if it has no alpha channel
+    """
+    if img.ndim == 3 and img.shape[2] == 4:
+        return cv2.cvtColor(img, cv2.COLOR_BGRA2BGR)
+    return img
+
+
+@profiled('utils.thresholding')
 def thresholding(img, value_1, value_2):
     """
     Parameters:
-        img(numpy.ndarray): image of a part of the table
+        img(numpy.ndarray): image of a part of the table in BGR or BGRA format
         value_1(int): threshold value
         value_2(int): the maximum value that is assigned
         to pixel values that exceed the threshold value
@@ -97,21 +130,27 @@ def thresholding(img, value_1, value_2):
     return binary_img
 
 
+@profiled('utils.table_part_recognition')
 def table_part_recognition(img, directory, color_of_img):
     """
     Parameters:
         img(numpy.ndarray): image of a part of the table
-        directory(str): path to the template images
+        directory(str or dict): path to the template images or
+        preloaded templates in {name: numpy.ndarray} format (see TemplateBank)
         color_of_img(int): set in which format to read the image.
         It can be cv2.IMREAD_COLOR or cv2.IMREAD_GRAYSCALE
     Returns:
         table_part(str): recognized suit, value (J, K etc.), pot etc.
     """
     err_dict = {}
-    for full_image_name in os.listdir(directory):
-        image_name = full_image_name.split('.')[0]
-        err = image_comparison(img, directory + full_image_name, color_of_img)
-        err_dict[image_name] = err
+    if isinstance(directory, dict):
+        for image_name, benchmark_img in directory.items():
+            err_dict[image_name] = image_comparison(img, benchmark_img, color_of_img)
+    else:
+        for full_image_name in os.listdir(directory):
+            image_name = full_image_name.split('.')[0]
+            err = image_comparison(img, directory + full_image_name, color_of_img)
+            err_dict[image_name] = err
     table_part = min(err_dict, key=err_dict.get)
     return table_part
 
@@ -139,40 +178,27 @@ def convert_contours_to_bboxes(contours, min_height, min_width):
     return cards_bboxes
 
 
-def card_separator(bboxes, separators):
-    """
-    determine which bounding box belongs to which card
-    Parameters:
-        bboxes(list of lists of int): bounding boxes suits and values (J, K etc.)
-        separators(list of int): contains values where the card ends
-    Returns:
-       sorted_dct(dict) key - card number, value - bounding boxes
-    """
-    dct = {}
-    for bbox in bboxes:
-        for separator in separators:
-            if bbox[2] < separator:
-                dct[separators.index(separator)] = dct.get(separators.index(separator), []) + [bbox]
-                break
-    sorted_dct = {key: value for key, value in sorted(dct.items(), key=lambda item: int(item[0]))}
-    return sorted_dct
-
-
+@profiled('utils.find_by_template')
 def find_by_template(img, path_to_image):
     """
      Object detection using a "template".
      Parameters:
          img(numpy.ndarray): image of a part of the table/of the entire table
-         path_to_image(str): the path to a template image
+         path_to_image(str or numpy.ndarray): the path to a template image or already loaded grayscale template
     Returns:
         max_val(float): largest value with the most likely match
         max_loc(tuple of int): location with the largest value.
         Location is presented in (x, y) format
     """
-    template_img_gray = cv2.imread(path_to_image, 0)
-    img_gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    if isinstance(path_to_image, str):
+        template_img_gray = cv2.imread(path_to_image, 0)
+    else:
+        template_img_gray = path_to_image
+    # an image that is already in grayscale is not converted again
+    img_gray = img if img.ndim == 2 else cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
     result = cv2.matchTemplate(img_gray, template_img_gray,
                                cv2.TM_CCOEFF_NORMED)
+    profiler.add_comparisons('utils.find_by_template', 1)
     (min_val, max_val, min_loc, max_loc) = cv2.minMaxLoc(result)
     return max_val, max_loc
 
@@ -225,13 +251,57 @@ def remove_cards(hero_cards, table_cards):
     return all_cards
 
 
-def set_window_size():
+def count_opponents(players_info):
     """
-    set the application window in the right place and with the right size
+    Parameters:
+        players_info(dict): info about players in {'Hero':'BTN', 'SB':'', 3: '-so-' etc. } format
+    Returns:
+        opponents(int): the number of players in the game except the hero
+    """
+    return len([key for key, value in players_info.items() if key != 'Hero' and value not in ('-', '-so-')])
+
+
+def find_window(title):
+    """
+    Parameters:
+        title(str): part of the window title
+    Returns:
+        window_id(str): id of the first window with this title, None if there is no such window
+    """
+    try:
+        windows = subprocess.run(['wmctrl', '-l'], capture_output=True, text=True).stdout
+    except OSError:
+        return None
+    for line in windows.splitlines():
+        # 0x03c00007  0 host Table title
+        fields = line.split(None, 3)
+        if len(fields) == 4 and title in fields[3]:
+            return fields[0]
+    return None
+
+
+def set_window_size(title, timeout=3, interval=0.05):
+    """
+    set the table window in the right place and with the right size. The window is polled for until it appears,
+    if it doesn't appear within the timeout the active window is moved
+    Parameters:
+        title(str): part of the title of the table window
+        timeout(float): how long to wait for the window in seconds
+        interval(float): how often to look for the window in seconds
+    Returns:
+        window_id(str): id of the moved window, None if the active window was moved
     """
-    sleep(3)
-    cmd = 'wmctrl -r :ACTIVE: -e 0,0,0,1100,900'
-    os.system(cmd)
+    deadline = time.monotonic() + timeout
+    window_id = find_window(title)
+    while window_id is None and time.monotonic() < deadline:
+        time.sleep(interval)
+        window_id = find_window(title)
+    target = ['-i', '-r', window_id] if window_id is not None else ['-r', ':ACTIVE:']
+    try:
+        subprocess.run(['wmctrl'] + target + ['-e', '0,0,0,1100,900'])
+    except OSError:
+        pass
+    return window_id
 
 
 def data_concatenate(hero_hand, table_cards, total_pot, equity, players_info):
@@ -244,9 +314,13 @@ def data_concatenate(hero_hand, table_cards, total_pot, equity, players_info):
         text_players_info += str(key) + ':' + str(value) + '\n'
 
     table_cards = ['no cards on the table'] if table_cards == [] else table_cards
+    if equity is None:
+        equity = '-'
+    elif not isinstance(equity, str):
+        equity = str(equity) + '%'
 
     text = 'Hero hand: ' + ' '.join(hero_hand) + '\n' + 'Board: ' + ' '.join(table_cards) + '\n' + \
-           'Pot: ' + total_pot + '\n' + 'Equity: ' + str(equity) + '%' + '\n' + \
+           'Pot: ' + total_pot + '\n' + 'Equity: ' + equity + '\n' + \
            '------------------------------' + '\n' + text_players_info
     return text
 
@@ -0,0 +1,77 @@
+import threading
+import unittest
+from scripts.capture_scheduler import CaptureScheduler
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestCaptureScheduler(unittest.TestCase):
+
+    def test_backoff_while_hero_is_not_to_act(self):
+        clock = FakeClock()
+        scheduler = CaptureScheduler(1, active_fps=10, idle_fps=2, backoff=2, clock=clock)
+        periods = []
+        for hero_to_act in (True, False, False, False, False, True):
+            index, delay = scheduler.pick(clock.now)
+            clock.now += delay
+            scheduler.start(index, clock.now)
+            scheduler.finish(index, hero_to_act, clock.now)
+            periods.append(scheduler.tables[0].period)
+        self.assertEqual(periods, [0.1, 0.2, 0.4, 0.5, 0.5, 0.1])
+        self.assertEqual(scheduler.tables[0].dropped, 0)
+
+    def test_tables_share_the_time(self):
+        clock = FakeClock()
+        scheduler = CaptureScheduler(3, active_fps=10, clock=clock)
+        served = []
+        for _ in range(30):
+            index, delay = scheduler.pick(clock.now)
+            clock.now += delay
+            scheduler.start(index, clock.now)
+            # recognition of every frame is too slow for three tables at 10 fps
+            clock.now += 0.05
+            scheduler.finish(index, True, clock.now)
+            served.append(index)
+        counts = [served.count(index) for index in range(3)]
+        self.assertLessEqual(max(counts) - min(counts), 1)
+        stats = scheduler.stats()
+        self.assertTrue(all(table['dropped'] > 0 for table in stats))
+        self.assertAlmostEqual(stats[0]['fps'], 1 / 0.15)
+
+    def test_busy_table_is_not_picked(self):
+        clock = FakeClock()
+        scheduler = CaptureScheduler(2, clock=clock)
+        scheduler.start(0, clock.now)
+        self.assertEqual(scheduler.pick(clock.now), (1, 0.0))
+        scheduler.start(1, clock.now)
+        self.assertEqual(scheduler.pick(clock.now), (None, None))
+
+    def test_due_tables_are_started_together(self):
+        clock = FakeClock()
+        scheduler = CaptureScheduler(3, active_fps=10, idle_fps=2, backoff=2, clock=clock)
+        self.assertEqual(scheduler.wait_due(), [0, 1, 2])
+        for index, hero_to_act in enumerate((True, True, False)):
+            scheduler.done(index, hero_to_act)
+        clock.now = 0.1
+        # the third table is due later after hero has acted there
+        self.assertEqual(scheduler.wait_due(), [0, 1])
+        self.assertTrue(scheduler.tables[0].busy and not scheduler.tables[2].busy)
+
+    def test_wait_for_processing_thread(self):
+        scheduler = CaptureScheduler(1, active_fps=1000)
+        self.assertEqual(scheduler.wait(), 0)
+        threading.Timer(0.01, scheduler.done, args=(0, True)).start()
+        self.assertEqual(scheduler.wait(), 0)
+        self.assertEqual(scheduler.stats()[0]['frames'], 1)
+        self.assertIn('table 1: fps=', scheduler.report())
+
+
+if __name__ == '__main__':
+    unittest.main()
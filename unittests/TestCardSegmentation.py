@@ -0,0 +1,79 @@
+import unittest
+import numpy as np
+from scripts.card_segmentation import segment_cards, MAX_GLYPHS
+from scripts.pokerstars_recognition import PokerStarsTableRecognizer
+from scripts.template_bank import TemplateBank
+from scripts.utils import read_config_file, load_images, thresholding, to_bgr
+
+cfg = read_config_file('../scripts/config.yaml')
+test_cfg = read_config_file('test_config.yaml')
+
+SEPARATORS = np.array([10, 20, 30])
+
+
+def draw_glyphs(boxes, shape=(20, 30)):
+    """
+    Parameters:
+        boxes(list of tuples): (x_0, y_0, x_1, y_1) rectangles to fill
+    Returns:
+        binary_img(numpy.ndarray): black image with the white rectangles
+    """
+    binary_img = np.zeros(shape, dtype=np.uint8)
+    for x_0, y_0, x_1, y_1 in boxes:
+        binary_img[y_0:y_1, x_0:x_1] = 255
+    return binary_img
+
+
+class TestCardSegmentation(unittest.TestCase):
+
+    def test_slots_of_the_test_images(self):
+        bank = TemplateBank(cfg['paths'])
+        for name in ('hero_cards', 'table_cards'):
+            images, file_names = load_images(test_cfg['paths'][name])
+            for image, filename in zip(images, file_names):
+                with self.subTest("TestCardSegmentation Incorrect slots of %s" % name, filename=filename):
+                    layout = PokerStarsTableRecognizer(image, cfg, bank).layout
+                    roi = getattr(layout, name + '_roi')
+                    separators = getattr(layout, name + '_separators')
+                    binary_img = thresholding(to_bgr(image[roi]), 200, 255)
+                    slots = segment_cards(binary_img, separators, 10, 2, name == 'hero_cards')
+                    cards = test_cfg[name][filename]
+                    self.assertEqual(slots.cards, len(cards))
+                    self.assertEqual(slots.boxes.shape, (len(separators), MAX_GLYPHS, 4))
+                    tens = [card[0] == 'T' for card in cards]
+                    self.assertTrue(all((count != 2) == ten for count, ten in zip(slots.counts, tens)))
+
+    def test_suit_goes_first(self):
+        # the value on top of the suit and the value below the suit
+        binary_img = draw_glyphs([(1, 1, 8, 8), (1, 10, 8, 18)])
+        top_to_bottom = segment_cards(binary_img, SEPARATORS, 3, 2)
+        bottom_to_top = segment_cards(binary_img, SEPARATORS, 3, 2, suit_at_bottom=True)
+        self.assertEqual(top_to_bottom.cards, 1)
+        self.assertEqual(top_to_bottom.boxes[0, 0].tolist(), [0, 0, 9, 9])
+        self.assertEqual(bottom_to_top.boxes[0, 0].tolist(), [0, 9, 9, 19])
+        self.assertEqual(bottom_to_top.boxes[0, 2].tolist(), [-1, -1, -1, -1])
+
+    def test_noise_is_not_a_glyph(self):
+        # a dot is too small, the hole of a glyph and the glyph inside it belong to the glyph
+        binary_img = draw_glyphs([(1, 1, 8, 8), (1, 10, 8, 18), (15, 2, 16, 3)])
+        binary_img[2:7, 2:7] = 0
+        binary_img[4:6, 4:6] = 255
+        slots = segment_cards(binary_img, SEPARATORS, 2, 2)
+        self.assertEqual(slots.counts.tolist(), [2, 0, 0])
+
+    def test_noisy_frame(self):
+        # four glyphs in one slot
+        binary_img = draw_glyphs([(1, 1, 8, 4), (1, 6, 8, 9), (1, 11, 8, 14), (1, 16, 8, 19)])
+        self.assertIsNone(segment_cards(binary_img, SEPARATORS, 2, 2))
+        # an empty slot between two cards
+        binary_img = draw_glyphs([(1, 1, 8, 8), (21, 1, 28, 8)])
+        self.assertIsNone(segment_cards(binary_img, SEPARATORS, 3, 2))
+
+    def test_no_cards(self):
+        slots = segment_cards(draw_glyphs([]), SEPARATORS, 3, 2)
+        self.assertEqual(slots.cards, 0)
+        self.assertTrue((slots.boxes == -1).all())
+
+
+if __name__ == '__main__':
+    unittest.main()
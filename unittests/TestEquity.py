@@ -0,0 +1,147 @@
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from collections import OrderedDict
+import numpy as np
+import eval7
+from scripts.equity import EquityEngine, HandEvaluator, enumerate_equity, canonical_key, hand_class, \
+    all_hand_classes, read_preflop_table, simulate_equity, calc_equity, CARDS, CARD_INDEX
+from scripts.utils import remove_cards
+
+
+class TestEquity(unittest.TestCase):
+
+    def test_hand_class(self):
+        self.assertEqual(hand_class(['Kd', 'Ad']), 'AKs')
+        self.assertEqual(hand_class(['9c', 'Th']), 'T9o')
+        self.assertEqual(hand_class(['7s', '7h']), '77')
+        self.assertEqual(len(set(all_hand_classes())), 169)
+        self.assertEqual(set(read_preflop_table()), set(all_hand_classes()))
+
+    def test_canonical_key(self):
+        self.assertEqual(canonical_key(['Ah', 'Kh'], ['2c', '7d', 'Th']),
+                         canonical_key(['Ks', 'As'], ['7c', 'Ts', '2d']))
+        self.assertNotEqual(canonical_key(['Ah', 'Kh'], ['2c', '7d', 'Th']),
+                            canonical_key(['Ah', 'Kd'], ['2c', '7d', 'Th']))
+
+    def test_evaluator_matches_eval7(self):
+        hands = np.argsort(np.random.default_rng(0).random((20000, 52)), axis=1)[:, :7]
+        expected = [eval7.evaluate([eval7.Card(CARDS[card]) for card in hand]) for hand in hands.tolist()]
+        self.assertEqual(HandEvaluator.shared().evaluate(hands).tolist(), expected)
+        # straight flush, flush over a full house that is not possible with 5 cards of one suit, wheel
+        for hand in (['9h', 'Th', 'Jh', 'Qh', 'Kh', 'Ks', 'Kd'], ['2h', '5h', '7h', '9h', 'Jh', '2d', '2c'],
+                     ['As', '2d', '3c', '4h', '5s', '9d', 'Tc']):
+            with self.subTest("TestEquity Evaluator differs from eval7", hand=hand):
+                cards = [CARD_INDEX[card] for card in hand]
+                self.assertEqual(HandEvaluator.shared().evaluate([cards])[0],
+                                 eval7.evaluate([eval7.Card(card) for card in hand]))
+
+    def test_evaluator_tables_are_memory_mapped(self):
+        with tempfile.TemporaryDirectory() as directory:
+            HandEvaluator(directory)
+            evaluator = HandEvaluator(directory)
+            self.assertIsInstance(evaluator.rank_keys, np.memmap)
+            self.assertEqual(len(evaluator.rank_keys), 49205)
+
+    def test_calc_equity(self):
+        hero_cards, table_cards = ['Ah', 'Kh'], ['2c', '7d', 'Th', 'Jh']
+        win_prob = calc_equity(remove_cards(hero_cards, table_cards), hero_cards, table_cards, iters=20000)
+        self.assertAlmostEqual(win_prob, enumerate_equity(hero_cards, table_cards), delta=2)
+
+    def test_enumeration(self):
+        # the board plays, both players have the royal flush and split the pot
+        self.assertEqual(enumerate_equity(['2c', '3d'], ['As', 'Ks', 'Qs', 'Js', 'Ts']), 50)
+        # the nuts on the river wins against every hand
+        self.assertEqual(enumerate_equity(['As', 'Ks'], ['Qs', 'Js', 'Ts', '2d', '3c']), 100)
+
+    def test_engine_matches_enumeration(self):
+        engine = EquityEngine()
+        hands = [(['Ah', 'Kh'], ['2c', '7d', 'Th', 'Jh']),
+                 (['9c', '9d'], ['2c', '7d', 'Th', 'Jh', 'Qs'])]
+        for hero_cards, table_cards in hands:
+            with self.subTest("TestEquity Engine differs from enumeration", hero_cards=hero_cards):
+                self.assertEqual(engine.equity(hero_cards, table_cards), enumerate_equity(hero_cards, table_cards))
+        # the same hand with renamed suits is taken from the cache
+        self.assertEqual(engine.equity(['As', 'Ks'], ['2c', '7d', 'Ts', 'Js']),
+                         enumerate_equity(['Ah', 'Kh'], ['2c', '7d', 'Th', 'Jh']))
+        self.assertEqual(len(engine.cache), 2)
+
+    def test_ranges_of_any_hand_are_enumerated(self):
+        engine = EquityEngine()
+        self.assertTrue(engine.is_exact(['2c', '7d', 'Th', 'Jh'], ranges=[None]))
+        self.assertFalse(engine.is_exact(['2c', '7d', 'Th', 'Jh'], ranges=['AA']))
+        with mock.patch('scripts.equity.simulate_equity', side_effect=AssertionError('simulated')):
+            self.assertEqual(engine.equity(['9c', '9d'], ['2c', '7d', 'Th', 'Jh', 'Qs'], ranges=[None]),
+                             enumerate_equity(['9c', '9d'], ['2c', '7d', 'Th', 'Jh', 'Qs']))
+
+    def test_cache_is_shared_between_threads(self):
+        engine = EquityEngine(cache_size=1)
+        hero_cards, table_cards = ['Ah', 'Kh'], ['2c', '7d', 'Th', 'Jh']
+        engine.remember(engine.cache_key(hero_cards, table_cards), 60.0)
+        other_key = engine.cache_key(hero_cards, ['2c', '7d', 'Th', 'Jc'])
+
+        class EvictingCache(OrderedDict):
+            """
+            another thread remembers a result and evicts the looked up key in the middle of the lookup
+            """
+            thread = None
+
+            def move_to_end(self, key, last=True):
+                super().move_to_end(key, last)
+                if self.thread is None:
+                    self.thread = threading.Thread(target=engine.remember, args=(other_key, 50.0))
+                    self.thread.start()
+                    self.thread.join(0.2)
+
+        engine.cache = EvictingCache(engine.cache)
+        self.assertEqual(engine.lookup(hero_cards, table_cards), 60.0)
+        engine.cache.thread.join()
+        self.assertEqual(list(engine.cache), [other_key])
+
+    def test_preflop_lookup(self):
+        engine = EquityEngine()
+        win_prob, tie_prob = read_preflop_table()['AA']
+        self.assertEqual(engine.equity(['Ah', 'Ad'], []), round(win_prob + tie_prob / 2, 2))
+        self.assertGreater(engine.equity(['Ah', 'Ad'], []), engine.equity(['7h', '2d'], []))
+        self.assertIsNone(engine.equity([], []))
+
+    def test_simulation_matches_enumeration(self):
+        hero_cards, table_cards = ['Ah', 'Kh'], ['2c', '7d', 'Th', 'Jh']
+        result = simulate_equity(hero_cards, table_cards, target_error=0.5, seed=0)
+        self.assertLessEqual(result.std_error, 0.5)
+        self.assertLess(result.samples, 100000)
+        self.assertAlmostEqual(result.equity, enumerate_equity(hero_cards, table_cards), delta=4 * result.std_error)
+
+    def test_split_pot_between_several_opponents(self):
+        result = simulate_equity(['2c', '3d'], ['As', 'Ks', 'Qs', 'Js', 'Ts'], opponents=3, iters=1000, seed=0)
+        self.assertEqual(result.equity, 25)
+        self.assertEqual(result.std_error, 0)
+
+    def test_ranges(self):
+        # the opponent has only aces, so kings win only with the board
+        result = simulate_equity(['Kh', 'Kd'], [], ranges=['AA'], iters=20000, seed=0)
+        self.assertLess(result.equity, 20)
+        self.assertEqual(simulate_equity(['Kh', 'Kd'], [], ranges=['AsAd'], iters=10, seed=0).samples, 10)
+        with self.assertRaises(ValueError):
+            simulate_equity(['Kh', 'Kd'], [], ranges=['KhKs'], iters=10)
+        with self.assertRaises(ValueError):
+            simulate_equity(['Kh', 'Kd'], [], opponents=2, ranges=['AA'], iters=10)
+
+    def test_ranges_that_cant_be_dealt_together(self):
+        # every range is possible alone, but there is only one hand for two opponents
+        with self.assertRaises(ValueError):
+            simulate_equity(['2c', '3d'], [], opponents=2, ranges=['AsKs', 'AsKs'], iters=1000)
+        with self.assertRaises(ValueError):
+            simulate_equity(['As', 'Ad'], [], opponents=2, ranges=['AA', 'AA'], iters=1000)
+        with self.assertRaises(ValueError):
+            EquityEngine().equity(['As', 'Ad'], [], opponents=2, ranges=['AA', 'AA'])
+        self.assertEqual(simulate_equity(['As', 'Ad'], [], opponents=2, ranges=['AA', None], iters=10).samples, 10)
+
+    def test_more_opponents_less_equity(self):
+        engine = EquityEngine()
+        self.assertGreater(engine.equity(['Ah', 'Ad'], [], opponents=1), engine.equity(['Ah', 'Ad'], [], opponents=4))
+
+
+if __name__ == '__main__':
+    unittest.main()
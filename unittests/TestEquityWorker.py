@@ -0,0 +1,50 @@
+import time
+import unittest
+from scripts.equity import EquityEngine, enumerate_equity
+from scripts.equity_worker import EquityWorker
+
+
+class TestEquityWorker(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.worker = EquityWorker(EquityEngine(iters=40000, target_error=0.1), max_workers=2, chunk_iters=5000)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.worker.shutdown()
+
+    def wait_final(self, state_id, timeout=60):
+        updates = []
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            update = self.worker.latest()
+            if update is not None:
+                self.assertEqual(update.state_id, state_id)
+                updates.append(update)
+                if update.final:
+                    return updates
+            time.sleep(0.01)
+        self.fail('the equity was not calculated in time')
+
+    def test_exact_equity(self):
+        hero_cards, table_cards = ['Ah', 'Kh'], ['2c', '7d', 'Th', 'Jh']
+        updates = self.wait_final(self.worker.submit(hero_cards, table_cards))
+        self.assertEqual(updates[-1].result.equity, enumerate_equity(hero_cards, table_cards))
+
+    def test_progressive_estimate(self):
+        updates = self.wait_final(self.worker.submit(['Ah', 'Ad'], ['2c', '7d', 'Th'], opponents=2))
+        samples = [update.result.samples for update in updates]
+        self.assertEqual(samples, sorted(samples))
+        self.assertEqual(updates[-1].result.samples, 40000)
+
+    def test_new_state_drops_old_jobs(self):
+        old_state_id = self.worker.submit(['Ah', 'Ad'], ['2c', '7d', 'Th'], opponents=3)
+        state_id = self.worker.submit(['Kh', 'Kd'], [])
+        self.assertGreater(state_id, old_state_id)
+        updates = self.wait_final(state_id)
+        self.assertEqual(updates[-1].result.equity, self.worker.engine.equity(['Kh', 'Kd'], []))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+from scripts.frame_diff import RegionChangeDetector
+from scripts.pokerstars_recognition import PokerStarsTableRecognizer
+from scripts.utils import read_config_file, load_images
+
+cfg = read_config_file('../scripts/config.yaml')
+test_cfg = read_config_file('test_config.yaml')
+
+
+class TestFrameDiff(unittest.TestCase):
+
+    def test_unchanged_regions_reuse_result(self):
+        images, _ = load_images(test_cfg['paths']['hero_cards'])
+        detector = RegionChangeDetector(cfg)
+        self.assertEqual(len(detector.update(images[0])), 6)
+        first = detector.cached('hero_cards', PokerStarsTableRecognizer(images[0], cfg).detect_hero_cards)
+        self.assertEqual(detector.update(images[0].copy()), [])
+        second = detector.cached('hero_cards', lambda: self.fail('recognition of an unchanged region'))
+        self.assertIs(first, second)
+        self.assertEqual(detector.stats(), {'hero_cards': (1, 1)})
+
+    def test_changed_region_is_recognized_again(self):
+        images, _ = load_images(test_cfg['paths']['hero_cards'])
+        detector = RegionChangeDetector(cfg)
+        detector.update(images[0])
+        detector.cached('hero_cards', PokerStarsTableRecognizer(images[0], cfg).detect_hero_cards)
+        img = images[0].copy()
+        img[cfg['hero_cards']['y_0'], cfg['hero_cards']['x_0']] += 1
+        self.assertEqual(detector.update(img), ['hero_cards'])
+        detector.cached('hero_cards', PokerStarsTableRecognizer(img, cfg).detect_hero_cards)
+        self.assertEqual(detector.stats(), {'hero_cards': (0, 2)})
+
+    def test_update_of_some_regions(self):
+        images, _ = load_images(test_cfg['paths']['hero_cards'])
+        detector = RegionChangeDetector(cfg)
+        detector.update(images[0])
+        img = images[0].copy()
+        img[cfg['hero_cards']['y_0'], cfg['hero_cards']['x_0']] += 1
+        self.assertEqual(detector.update(img, ('hero_step_define',)), [])
+        self.assertEqual(detector.update(img, ('hero_cards', 'pot')), ['hero_cards'])
+
+
+if __name__ == '__main__':
+    unittest.main()
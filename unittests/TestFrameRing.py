@@ -0,0 +1,87 @@
+import multiprocessing
+import unittest
+import numpy as np
+from scripts.frame_ring import FrameRing
+from scripts.table_session import TableSession
+from scripts.template_bank import TemplateBank
+from scripts.utils import read_config_file, load_images
+from TestTableSession import ImmediateEquityWorker
+
+cfg = read_config_file('../scripts/config.yaml')
+test_cfg = read_config_file('test_config.yaml')
+
+
+def write_frames(ring, count):
+    """
+    writes frames filled with their numbers, runs in another process
+    """
+    for number in range(1, count + 1):
+        ring.write(np.full(ring.shape, number, dtype=np.uint8))
+
+
+class TestFrameRing(unittest.TestCase):
+
+    def setUp(self):
+        self.ring = FrameRing((4, 5, 4))
+
+    def tearDown(self):
+        self.ring.close()
+
+    def test_newest_frame(self):
+        self.assertEqual(self.ring.read(timeout=0), (None, None, None))
+        self.assertEqual(self.ring.write(np.full((4, 5, 4), 1, dtype=np.uint8), capture_time=10.0), 1)
+        seq, frame, capture_time = self.ring.read()
+        self.assertEqual((seq, capture_time), (1, 10.0))
+        self.assertTrue((frame == 1).all())
+        # the frame is a read-only view of the shared memory
+        self.assertTrue(np.shares_memory(frame, self.ring.frames))
+        self.assertFalse(frame.flags.writeable)
+        self.assertEqual(self.ring.read(seq, timeout=0)[0], None)
+
+    def test_slow_reader_skips_to_the_newest_frame(self):
+        seq, frame, _ = self.ring.read(timeout=0)
+        for number in range(1, 11):
+            self.ring.write(np.full((4, 5, 4), number, dtype=np.uint8))
+            if number == 2:
+                seq, frame, _ = self.ring.read()
+        # the pinned frame was not overwritten by the next eight frames
+        self.assertEqual(seq, 2)
+        self.assertTrue((frame == 2).all())
+        seq, frame, _ = self.ring.read(seq)
+        self.assertEqual(seq, 10)
+        self.assertTrue((frame == 10).all())
+        self.assertEqual(self.ring.stats(), {'written': 10, 'read': [2], 'skipped': [7]})
+
+    def test_stop_wakes_up_the_reader(self):
+        self.ring.stop()
+        self.assertEqual(self.ring.read(), (None, None, None))
+
+    def test_too_few_slots(self):
+        with self.assertRaises(ValueError):
+            FrameRing((4, 5, 4), slots=3, readers=2)
+
+    def test_frames_of_another_process(self):
+        process = multiprocessing.Process(target=write_frames, args=(self.ring, 20))
+        process.start()
+        process.join(30)
+        self.assertEqual(process.exitcode, 0)
+        seq, frame, _ = self.ring.read()
+        self.assertEqual(seq, 20)
+        self.assertTrue((frame == 20).all())
+
+    def test_recognition_of_a_view(self):
+        images, file_names = load_images(test_cfg['paths']['hero_step'])
+        image = images[file_names.index('test_image_1.png')]
+        ring = FrameRing(image.shape)
+        ring.write(image)
+        _, frame, _ = ring.read()
+        workers = [ImmediateEquityWorker(), ImmediateEquityWorker()]
+        for worker, img in zip(workers, (frame, image)):
+            TableSession(cfg, TemplateBank.shared(cfg), worker, {'top': 80, 'left': 70}).process(img)
+        self.assertEqual(workers[0].submitted, workers[1].submitted)
+        del frame
+        ring.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+from unittest import mock
+import numpy as np
+from scripts.glyph_cache import GlyphCache
+from scripts.glyph_classifier import GlyphClassifier
+from scripts.pokerstars_recognition import PokerStarsTableRecognizer
+from scripts.template_bank import TemplateBank
+from scripts.utils import read_config_file, load_images
+
+cfg = read_config_file('../scripts/config.yaml')
+test_cfg = read_config_file('test_config.yaml')
+
+
+class TestGlyphCache(unittest.TestCase):
+
+    def test_cards_of_the_next_frame_are_not_classified(self):
+        bank = TemplateBank(cfg['paths'])
+        images, file_names = load_images(test_cfg['paths']['hero_cards'])
+        for image, filename in zip(images, file_names):
+            with self.subTest("TestGlyphCache Incorrect cards from the cache", filename=filename):
+                PokerStarsTableRecognizer(image, cfg, bank).detect_hero_cards()
+                with mock.patch.object(GlyphClassifier, 'classify', side_effect=AssertionError('classified again')):
+                    cards = PokerStarsTableRecognizer(image.copy(), cfg, bank).detect_hero_cards()
+                self.assertEqual(cards, test_cfg['hero_cards'][filename])
+        hits, misses = bank.glyph_cache.stats()['hero_cards_suits']
+        self.assertGreaterEqual(hits, misses)
+        self.assertIn('hero_cards_suits: hits=', bank.glyph_cache.report())
+
+    def test_size_cap(self):
+        glyph_cache = GlyphCache(max_size=2)
+        classifier = mock.Mock()
+        classifier.classify.side_effect = lambda imgs: ([str(img[0, 0]) for img in imgs], None)
+        glyphs = [np.full((3, 3), value, dtype=np.uint8) for value in range(3)]
+        self.assertEqual(glyph_cache.classify('suits', classifier, glyphs, glyphs), ['0', '1', '2'])
+        self.assertEqual(len(glyph_cache.namespaces['suits']), 2)
+        # the oldest glyph was dropped, the other two are taken from the cache
+        self.assertEqual(glyph_cache.classify('suits', classifier, glyphs[::-1], glyphs[::-1]), ['2', '1', '0'])
+        self.assertEqual(glyph_cache.stats(), {'suits': (2, 4)})
+        self.assertEqual(glyph_cache.classify('numbers', classifier, glyphs[:1], glyphs[:1]), ['0'])
+        self.assertEqual(glyph_cache.stats()['numbers'], (0, 1))
+        glyph_cache.clear(['suits'])
+        self.assertEqual(list(glyph_cache.namespaces), ['numbers'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+from unittest import mock
+import cv2
+from scripts.glyph_classifier import GlyphClassifier
+from scripts.pokerstars_recognition import PokerStarsTableRecognizer
+from scripts.template_bank import TemplateBank
+from scripts.utils import read_config_file, load_images, table_part_recognition
+
+cfg = read_config_file('../scripts/config.yaml')
+test_cfg = read_config_file('test_config.yaml')
+
+
+class TestGlyphClassifier(unittest.TestCase):
+
+    def collect_glyphs(self):
+        """
+        run the recognizer over the test images and remember every batch of glyphs it classifies
+        """
+        batches = []
+        classify = GlyphClassifier.classify
+
+        def recording_classify(classifier, imgs):
+            labels, margins = classify(classifier, imgs)
+            batches.append((classifier, list(imgs), labels, margins))
+            return labels, margins
+
+        # every glyph is classified, none is taken from the cache
+        glyph_cache = TemplateBank.shared(cfg).glyph_cache
+        glyph_cache.clear()
+        with mock.patch.object(GlyphClassifier, 'classify', recording_classify), \
+                mock.patch.object(glyph_cache, 'max_size', 0):
+            for name in ('hero_cards', 'table_cards', 'total_pot', 'player_bet'):
+                images, _ = load_images(test_cfg['paths'][name])
+                for image in images:
+                    recognizer = PokerStarsTableRecognizer(image, cfg)
+                    if name == 'hero_cards':
+                        recognizer.detect_hero_cards()
+                    elif name == 'table_cards':
+                        recognizer.detect_table_cards()
+                    elif name == 'total_pot':
+                        recognizer.find_total_pot()
+                    else:
+                        players_info = recognizer.get_dealer_button_position()
+                        players_info = recognizer.get_empty_seats(players_info)
+                        players_info = recognizer.get_so_players(players_info)
+                        players_info = recognizer.assign_positions(players_info)
+                        recognizer.find_players_bet(players_info)
+        return batches
+
+    def test_same_result_as_table_part_recognition(self):
+        batches = self.collect_glyphs()
+        bank = TemplateBank.shared(cfg)
+        directories = {id(classifier): name for name, classifier in bank.classifiers.items()}
+        for classifier, imgs, labels, margins in batches:
+            name = directories[id(classifier)]
+            for img, label, margin in zip(imgs, labels, margins):
+                with self.subTest("TestGlyphClassifier Result differs from table_part_recognition", name=name):
+                    self.assertEqual(label, table_part_recognition(img, cfg['paths'][name], classifier.color_of_img))
+                    self.assertGreater(margin, 0)
+
+    def test_templates_are_recognized(self):
+        bank = TemplateBank.shared(cfg)
+        for name in ('hero_cards_numbers', 'table_cards_numbers', 'pot_numbers'):
+            templates = bank[name]
+            imgs = [cv2.cvtColor(templates[key].astype('uint8'), cv2.COLOR_GRAY2BGR) for key in sorted(templates)]
+            labels, _ = bank.classifier(name).classify(imgs)
+            self.assertEqual(labels, sorted(templates))
+
+    def test_empty_batch(self):
+        labels, margins = TemplateBank.shared(cfg).classifier('pot_numbers').classify([])
+        self.assertEqual(labels, [])
+        self.assertEqual(len(margins), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
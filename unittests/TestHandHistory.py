@@ -0,0 +1,82 @@
+import os
+import tempfile
+import unittest
+from scripts.hand_history import HandHistoryStore, HandRecorder, HandRecord, HandPlayer, board_texture
+from scripts.hand_state import HandStateTracker, TableObservation
+
+
+def make_hand(hero_position, equity=None, board=()):
+    players = [HandPlayer('BB', False, 100.0, False), HandPlayer('CO', False, 300.0, True),
+               HandPlayer(hero_position, True, None, None)]
+    return HandRecord(1, 0.0, ['As', 'Kd'], hero_position, list(board), 'flop', 450.0, equity, players)
+
+
+class TestHandHistory(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'hands.sqlite')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_board_texture(self):
+        cases = {(): 'preflop', ('2c', '7h', 'Td'): 'rainbow', ('2c', '7c', 'Tc', 'Ah'): 'monotone',
+                 ('2c', '2h', 'Tc'): 'two_tone_paired'}
+        for board, texture in cases.items():
+            with self.subTest("TestHandHistory Incorrect texture", board=board):
+                self.assertEqual(board_texture(list(board)), texture)
+
+    def test_aggregates(self):
+        store = HandHistoryStore(self.path, batch_size=2)
+        store.append(make_hand('BTN', equity=80.0, board=('2c', '7h', 'Td')))
+        store.append(make_hand('BTN', equity=20.0))
+        store.append(make_hand('SB', equity=25.0, board=('2c', '2h', 'Tc')))
+        store.append(make_hand('CO', board=('2c', '2h', 'Tc')))
+        store.flush()
+        self.assertEqual(store.hands_count(), 4)
+        # hero's bets are not recognized, so only the opponents are counted
+        self.assertEqual(store.vpip_by_position(), {'BB': (0.0, 4), 'CO': (100.0, 4)})
+        self.assertEqual(store.hands_by_equity(buckets=2), [(0.0, 2, 22.5), (50.0, 1, 80.0)])
+        self.assertEqual(store.hands_by_texture()['rainbow'], (1, 80.0))
+        self.assertEqual(store.hands_by_texture()['two_tone_paired'], (2, 25.0))
+        self.assertEqual(store.hands_by_texture()['preflop'], (1, 20.0))
+        store.close()
+
+    def test_hands_are_kept_after_reopening(self):
+        store = HandHistoryStore(self.path)
+        store.append(make_hand('BTN'))
+        store.close()
+        store = HandHistoryStore(self.path)
+        store.append(make_hand('CO'))
+        store.flush()
+        self.assertEqual(store.hand(2)[0][4], 'CO')
+        self.assertEqual(len(store.hand(2)[1]), 3)
+        self.assertEqual(store.vpip_by_position()['BB'], (0.0, 2))
+        store.close()
+
+    def test_recorder(self):
+        store = HandHistoryStore(self.path)
+        tracker = HandStateTracker()
+        recorder = HandRecorder(store, table_id=2)
+        recorder.attach(tracker)
+        tracker.update(TableObservation(True, ['As', 'Kd'], [], '150',
+                                        {'Hero': 'BTN', 'SB': '50', 'BB': '100', 'CO': '300'}))
+        # equity of the flop calculated by the equity worker
+        recorder.state_id = 7
+        recorder.equities[7] = 61.5
+        tracker.update(TableObservation(True, ['As', 'Kd'], ['2c', '7h', 'Td'], '750',
+                                        {'Hero': 'BTN', 'SB': '', 'BB': '', 'CO': ''}))
+        tracker.update(TableObservation(True, [], ['2c', '7h', 'Td']))
+        store.flush()
+        hand, players = store.hand(1)
+        self.assertEqual(hand[1], 2)
+        self.assertEqual(hand[3:5], ('AsKd', 'BTN'))
+        self.assertEqual(hand[5:10], ('2c7hTd', 'rainbow', 'flop', 750.0, 61.5))
+        self.assertEqual(sorted(players), [('BB', 0, 100.0, 0), ('BTN', 1, None, None), ('CO', 0, 300.0, 1),
+                                           ('SB', 0, 50.0, 0)])
+        store.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
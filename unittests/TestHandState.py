@@ -0,0 +1,66 @@
+import unittest
+from scripts.hand_state import HandStateTracker, TableObservation, NewHand, StreetChanged, BoardCardsDealt, \
+    PotChanged, BetChanged, HeroToAct, HeroActed, HandFinished, PlayersChanged, PREFLOP, FLOP, TURN, RIVER, \
+    SHOWDOWN, WAITING
+
+
+class TestHandState(unittest.TestCase):
+
+    def test_hand_to_showdown(self):
+        tracker = HandStateTracker()
+        events = tracker.update(TableObservation(True, ['As', 'Kd'], [], '150', bets={2: '50', 3: '100'}))
+        self.assertEqual(events, [NewHand(1, ['As', 'Kd']), StreetChanged(PREFLOP), PotChanged('150'),
+                                  BetChanged(2, '50'), BetChanged(3, '100'), HeroToAct()])
+        self.assertEqual(tracker.update(TableObservation(False)), [HeroActed()])
+        events = tracker.update(TableObservation(True, ['As', 'Kd'], ['2c', '7h', 'Td'], '300',
+                                                 bets={2: '', 3: ''}))
+        self.assertEqual(events, [BoardCardsDealt(FLOP, ['2c', '7h', 'Td'], ['2c', '7h', 'Td']),
+                                  StreetChanged(FLOP), PotChanged('300'), BetChanged(2, ''), BetChanged(3, ''),
+                                  HeroToAct()])
+        events = tracker.update(TableObservation(True, ['As', 'Kd'], ['2c', '7h', 'Td', 'Ks']))
+        self.assertEqual(events, [BoardCardsDealt(TURN, ['Ks'], ['2c', '7h', 'Td', 'Ks']), StreetChanged(TURN)])
+        tracker.update(TableObservation(True, ['As', 'Kd'], ['2c', '7h', 'Td', 'Ks', '3s']))
+        self.assertEqual(tracker.street, RIVER)
+        events = tracker.update(TableObservation(True, [], ['2c', '7h', 'Td', 'Ks', '3s'],
+                                                 shown_cards={3: ['Qs', 'Js']}))
+        self.assertEqual(events, [StreetChanged(SHOWDOWN), HandFinished(1, SHOWDOWN)])
+        events = tracker.update(TableObservation(True, ['Qh', 'Qc'], []))
+        self.assertEqual(events, [NewHand(2, ['Qh', 'Qc']), StreetChanged(PREFLOP)])
+
+    def test_fold_on_the_river(self):
+        tracker = HandStateTracker()
+        tracker.update(TableObservation(True, ['As', 'Kd'], ['2c', '7h', 'Td', 'Ks', '3s']))
+        # the board stays on the table, but no opponent has shown their cards
+        events = tracker.update(TableObservation(True, [], ['2c', '7h', 'Td', 'Ks', '3s'], shown_cards={}))
+        self.assertEqual(events, [HandFinished(1, RIVER)])
+        self.assertEqual(tracker.street, WAITING)
+
+    def test_fold(self):
+        tracker = HandStateTracker()
+        tracker.update(TableObservation(True, ['As', 'Kd'], ['2c', '7h', 'Td']))
+        self.assertEqual(tracker.update(TableObservation(True, [], ['2c', '7h', 'Td'])), [HandFinished(1, FLOP)])
+        self.assertEqual(tracker.street, WAITING)
+        self.assertEqual(tracker.update(TableObservation(True, [], ['2c', '7h', 'Td', '3s'])), [])
+
+    def test_unchanged_frame_has_no_events(self):
+        tracker = HandStateTracker()
+        observation = TableObservation(True, ['As', 'Kd'], ['2c', '7h', 'Td'], '300', {'Hero': 'BB'}, {2: '50'})
+        tracker.update(observation)
+        self.assertEqual(tracker.update(observation), [])
+        # cards which are being dealt are not a new street
+        self.assertEqual(tracker.update(observation._replace(table_cards=['2c', '7h'])), [])
+        self.assertEqual(tracker.street, FLOP)
+
+    def test_subscribers(self):
+        tracker = HandStateTracker()
+        received = []
+        tracker.subscribe((NewHand, BoardCardsDealt), received.append)
+        tracker.subscribe(PlayersChanged, lambda event: received.append('players'))
+        tracker.update(TableObservation(True, ['As', 'Kd'], [], '150', {'Hero': 'BB'}))
+        tracker.update(TableObservation(True, ['As', 'Kd'], ['2c', '7h', 'Td'], '300', {'Hero': 'BB'}))
+        self.assertEqual(received, [NewHand(1, ['As', 'Kd']), 'players',
+                                    BoardCardsDealt(FLOP, ['2c', '7h', 'Td'], ['2c', '7h', 'Td'])])
+
+
+if __name__ == '__main__':
+    unittest.main()
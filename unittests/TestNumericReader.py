@@ -0,0 +1,47 @@
+import unittest
+from scripts.numeric_reader import NumericReader, parse_amount
+from scripts.pokerstars_recognition import PokerStarsTableRecognizer
+from scripts.template_bank import TemplateBank
+from scripts.utils import read_config_file, load_images
+
+cfg = read_config_file('../scripts/config.yaml')
+test_cfg = read_config_file('test_config.yaml')
+
+
+class TestNumericReader(unittest.TestCase):
+
+    def test_parse_amount(self):
+        cases = {'17,450': 17450.0, '700': 700.0, '1,234,567': 1234567.0, '': None, ',': None}
+        for text, expected in cases.items():
+            with self.subTest("TestNumericReader Incorrect parsing", text=text):
+                self.assertEqual(parse_amount(text), expected)
+
+    def test_total_pot_amount(self):
+        images, file_names = load_images(test_cfg['paths']['total_pot'])
+        for image, filename in zip(images, file_names):
+            with self.subTest("TestNumericReader Incorrect pot in the image", filename=filename):
+                amount = PokerStarsTableRecognizer(image, cfg).read_amounts()['pot']
+                expected = test_cfg['total_pot'][filename]
+                self.assertEqual(amount.text, expected)
+                self.assertEqual(amount.value, float(expected.replace(',', '')))
+                self.assertEqual(len(amount.confidences), len(expected))
+                self.assertTrue((amount.confidences > 0).all())
+
+    def test_regions_are_read_in_one_batch(self):
+        images, file_names = load_images(test_cfg['paths']['player_bet'])
+        image = images[file_names.index('test_image_1.png')]
+        reader = NumericReader(TemplateBank(cfg['paths']).classifier('pot_numbers'))
+        calls = []
+        classify = reader.classifier.classify
+        reader.classifier.classify = lambda imgs: calls.append(len(imgs)) or classify(imgs)
+        # the small blind of the third player
+        bbox = cfg['players_bet'][3]
+        amounts = reader.read({'first': image[bbox[1]:bbox[3], bbox[0]:bbox[2]],
+                               'second': image[bbox[1]:bbox[3], bbox[0]:bbox[2]]})
+        self.assertEqual(calls, [6])
+        self.assertEqual(amounts['first'].value, 700)
+        self.assertEqual(amounts['second'].value, 700)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+import unittest
+from scripts.output_sinks import TableUpdate, LatestUpdates, OutputSink, OutputHub, JsonLinesSink, SocketSink
+
+
+def make_update(table, text):
+    return TableUpdate(table, 0.0, ['As', 'Kd'], [], '150', '65.00%', {'Hero': 'BB'}, text)
+
+
+class SlowSink(OutputSink):
+
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+        self.written = []
+
+    def write(self, update):
+        self.release.wait(5)
+        self.written.append(update.text)
+
+
+class TestOutputSinks(unittest.TestCase):
+
+    def test_sink_without_write(self):
+        class IncompleteSink(OutputSink):
+            pass
+
+        with self.assertRaises(TypeError):
+            IncompleteSink()
+
+    def test_stale_updates_are_dropped(self):
+        updates = LatestUpdates()
+        for text in ('first', 'second', 'third'):
+            updates.put(make_update(1, text))
+        updates.put(make_update(2, 'other table'))
+        self.assertEqual(updates.get(timeout=0).text, 'third')
+        self.assertEqual(updates.get(timeout=0).text, 'other table')
+        self.assertIsNone(updates.get(timeout=0))
+        self.assertEqual(updates.dropped, 2)
+
+    def test_slow_sink_does_not_block(self):
+        sink = SlowSink()
+        hub = OutputHub([sink])
+        hub.start()
+        start = time.monotonic()
+        for number in range(100):
+            hub.publish(make_update(1, str(number)))
+        self.assertLess(time.monotonic() - start, 0.5)
+        sink.release.set()
+        hub.close()
+        # the sink has shown the update it was writing and the newest one
+        self.assertEqual(sink.written[-1], '99')
+        self.assertLessEqual(len(sink.written), 2)
+        self.assertGreaterEqual(hub.dropped()['SlowSink'], 97)
+
+    def test_json_lines(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'updates.jsonl')
+            sink = JsonLinesSink(path)
+            sink.start()
+            sink.publish(make_update(2, 'text'))
+            sink.close()
+            with open(path) as stream:
+                line = json.loads(stream.readline())
+        self.assertEqual(line['table'], 2)
+        self.assertEqual(line['hero_cards'], ['As', 'Kd'])
+        self.assertEqual(line['players_info'], {'Hero': 'BB'})
+
+    def test_socket(self):
+        sink = SocketSink()
+        sink.start()
+        with socket.create_connection(('127.0.0.1', sink.port), timeout=5) as client:
+            # wait until the server has accepted the client
+            for _ in range(100):
+                if sink.clients:
+                    break
+                time.sleep(0.01)
+            sink.publish(make_update(1, 'text'))
+            line = client.makefile().readline()
+        sink.close()
+        self.assertEqual(json.loads(line)['equity'], '65.00%')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+from scripts.pokerstars_recognition import PokerStarsTableRecognizer
+from scripts.profiling import profiler
+from scripts.utils import read_config_file, load_images
+
+cfg = read_config_file('../scripts/config.yaml')
+test_cfg = read_config_file('test_config.yaml')
+
+
+class TestProfiling(unittest.TestCase):
+
+    def setUp(self):
+        profiler.reset()
+
+    def tearDown(self):
+        profiler.disable()
+        profiler.reset()
+
+    def recognize_frames(self):
+        images, _ = load_images(test_cfg['paths']['total_pot'])
+        for image in images[:3]:
+            recognizer = PokerStarsTableRecognizer(image, cfg)
+            recognizer.find_total_pot()
+            recognizer.get_dealer_button_position()
+            profiler.end_frame()
+
+    def test_disabled_profiler_records_nothing(self):
+        self.recognize_frames()
+        self.assertEqual(profiler.summary(), {})
+        self.assertEqual(profiler.frames_count, 0)
+
+    def test_calls_and_comparisons_per_frame(self):
+        profiler.enable()
+        self.recognize_frames()
+        summary = profiler.summary()
+        self.assertEqual(profiler.frames_count, 3)
+        self.assertEqual(summary['recognizer.find_total_pot']['calls'], 1)
+        self.assertEqual(summary['recognizer.find_dealer_button']['calls'], 1)
+        self.assertGreaterEqual(summary['utils.find_by_template']['calls'], 2)
+        self.assertEqual(summary['utils.find_by_template']['comparisons'], summary['utils.find_by_template']['calls'])
+        self.assertGreater(summary['glyph_classifier.classify']['comparisons'], 0)
+        self.assertGreater(summary['recognizer.get_dealer_button_position']['ms'], 0)
+        text = profiler.prometheus_text()
+        self.assertIn('pokervision_frames_total 3', text)
+        self.assertIn('pokervision_calls_total{function="recognizer.find_total_pot"} 3', text)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import json
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from scripts.equity import EquityEngine
+from scripts.replay import replay, read_frames, STAGES
+from scripts.utils import read_config_file
+
+cfg = read_config_file('../scripts/config.yaml')
+test_cfg = read_config_file('test_config.yaml')
+
+
+class TestReplay(unittest.TestCase):
+
+    def test_every_stage_is_measured(self):
+        report = replay(read_frames(test_cfg['paths']['player_bet']), cfg, use_cache=False,
+                        equity_engine=EquityEngine(iters=2000, target_error=None))
+        self.assertEqual(report['frames'], 10)
+        self.assertEqual(set(report['stages']), set(STAGES))
+        self.assertEqual(report['stages']['frame']['count'], 10)
+        self.assertEqual(report['stages']['hero_step']['count'], 10)
+        for stage in STAGES:
+            with self.subTest("TestReplay Stage was not measured", stage=stage):
+                self.assertGreater(report['stages'][stage]['count'], 0)
+                self.assertLessEqual(report['stages'][stage]['p50_ms'], report['stages'][stage]['p99_ms'])
+                # every computed stage of the graph of TableSession is measured
+                if stage in report['graph']:
+                    self.assertEqual(report['stages'][stage]['count'], report['graph'][stage]['misses'])
+        self.assertGreater(report['fps'], 0)
+        self.assertGreater(report['peak_memory_mb'], 0)
+        json.dumps(report)
+
+    def test_parallel_stages(self):
+        frames = list(read_frames(test_cfg['paths']['player_bet']))[:3]
+        sequential = replay(frames, cfg, equity_engine=EquityEngine(iters=2000))
+        with ThreadPoolExecutor(4) as stage_pool:
+            parallel = replay(frames, cfg, equity_engine=EquityEngine(iters=2000), stage_executor=stage_pool)
+        self.assertEqual(parallel['graph'], sequential['graph'])
+
+    def test_unchanged_frames_are_skipped(self):
+        frames = list(read_frames(test_cfg['paths']['hero_cards']))[:1] * 3
+        report = replay(frames, cfg, equity_engine=EquityEngine(iters=2000))
+        self.assertEqual(report['frames'], 3)
+        self.assertEqual(report['regions']['hero_step_define'], {'hits': 2, 'misses': 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
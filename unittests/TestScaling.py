@@ -0,0 +1,97 @@
+import unittest
+from unittest import mock
+import cv2
+import numpy as np
+from scripts import scaling
+from scripts.pokerstars_recognition import PokerStarsTableRecognizer
+from scripts.scaling import TableScaler, calibrate_scale, scale_config
+from scripts.template_bank import TemplateBank
+from scripts.utils import read_config_file, load_images
+from TestCaptureScheduler import FakeClock
+
+cfg = read_config_file('../scripts/config.yaml')
+test_cfg = read_config_file('test_config.yaml')
+
+
+def resize(img, scale):
+    return cv2.resize(img, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR)
+
+
+class TestScaling(unittest.TestCase):
+
+    def test_scale_config(self):
+        scaled_cfg = scale_config(cfg, 0.5)
+        self.assertEqual(scaled_cfg['table_size'], {'width': 545, 'height': 450})
+        self.assertEqual(scaled_cfg['hero_cards']['separator_2'], round(cfg['hero_cards']['separator_2'] * 0.5))
+        self.assertEqual(scaled_cfg['players_bet'][2], [140, 228, 190, 240])
+        self.assertEqual(scaled_cfg['paths'], cfg['paths'])
+        self.assertEqual(cfg['table_size'], {'width': 1090, 'height': 900})
+
+    def test_scaled_templates(self):
+        bank = TemplateBank(cfg['paths'])
+        scaled_bank = bank.scaled(0.5)
+        self.assertIs(bank.scaled(0.5), scaled_bank)
+        self.assertIs(bank.scaled(1.0), bank)
+        height, width = bank['pot_image'].shape
+        self.assertEqual(scaled_bank['pot_image'].shape, (round(height * 0.5), round(width * 0.5)))
+
+    def test_calibrate_scale(self):
+        bank = TemplateBank.shared(cfg)
+        images, file_names = load_images(test_cfg['paths']['total_pot'])
+        for image, filename in zip(images, file_names):
+            for scale in (0.8, 0.9, 1.2):
+                with self.subTest("TestScaling Incorrect scale of the image", filename=filename, scale=scale):
+                    self.assertEqual(calibrate_scale(resize(image, scale), cfg, bank)[0], scale)
+
+    def test_scaler_calibrates_once(self):
+        images, _ = load_images(test_cfg['paths']['total_pot'])
+        scaler = TableScaler(cfg, TemplateBank.shared(cfg))
+        self.assertIs(scaler.table(images[0]), scaler.native)
+        with mock.patch.object(scaling, 'calibrate_scale', wraps=calibrate_scale) as calibrate:
+            first = scaler.table(resize(images[0], 1.2))
+            second = scaler.table(resize(images[1], 1.2))
+        self.assertEqual(calibrate.call_count, 1)
+        self.assertIs(first, second)
+        self.assertEqual(first.scale, 1.2)
+        self.assertEqual(first.layout.scale, 1.2)
+
+    def test_failed_calibration_is_not_repeated_on_every_frame(self):
+        images, _ = load_images(test_cfg['paths']['total_pot'])
+        clock = FakeClock()
+        scaler = TableScaler(cfg, TemplateBank.shared(cfg), retry_interval=5, clock=clock)
+        # a table without the pot label
+        img = np.zeros_like(resize(images[0], 1.2))
+        calls = []
+        with mock.patch.object(scaling, 'calibrate_scale', wraps=calibrate_scale) as calibrate:
+            for now, hero_to_act in ((0, False), (1, False), (2, True), (3, True), (4, False), (7, False),
+                                     (7.5, False)):
+                clock.now = now
+                table = scaler.table(img, hero_to_act)
+                calls.append(calibrate.call_count)
+        # the first frame, the first frame where hero is to act and the frame after retry_interval
+        self.assertEqual(calls, [1, 1, 2, 2, 2, 3, 3])
+        self.assertEqual(table.scale, 1.2)
+        with mock.patch.object(scaling, 'calibrate_scale', wraps=calibrate_scale) as calibrate:
+            clock.now = 8
+            self.assertEqual(scaler.table(resize(images[0], 1.2), True).scale, 1.2)
+            scaler.table(img)
+        self.assertEqual(calibrate.call_count, 1)
+
+    def test_recognition_of_resized_tables(self):
+        scaler = TableScaler(cfg, TemplateBank.shared(cfg))
+        for name, method in (('hero_step', 'detect_hero_step'), ('hero_cards', 'detect_hero_cards'),
+                             ('table_cards', 'detect_table_cards'), ('total_pot', 'find_total_pot'),
+                             ('dealer_button_position', 'get_dealer_button_position')):
+            images, file_names = load_images(test_cfg['paths'][name])
+            for image, filename in zip(images, file_names):
+                for scale in (0.8, 1.2):
+                    with self.subTest("TestScaling Incorrect detection in the resized image", name=name,
+                                      filename=filename, scale=scale):
+                        img = resize(image, scale)
+                        table = scaler.table(img)
+                        recognizer = PokerStarsTableRecognizer(img, table.layout, table.templates)
+                        self.assertEqual(getattr(recognizer, method)(), test_cfg[name][filename])
+
+
+if __name__ == '__main__':
+    unittest.main()
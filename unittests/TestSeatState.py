@@ -0,0 +1,49 @@
+import unittest
+from scripts.pokerstars_recognition import PokerStarsTableRecognizer
+from scripts.seat_state import SeatStateCache, SeatStatus, OCCUPIED, EMPTY, SITTING_OUT
+from scripts.utils import read_config_file, load_images
+
+cfg = read_config_file('../scripts/config.yaml')
+test_cfg = read_config_file('test_config.yaml')
+
+FLAG_STATES = {'-': EMPTY, '-so-': SITTING_OUT}
+
+
+class TestSeatState(unittest.TestCase):
+
+    def test_seats_state(self):
+        images, file_names = load_images(test_cfg['paths']['player_position'])
+        for image, filename in zip(images, file_names):
+            with self.subTest("TestSeatState Incorrect seat state in the image", filename=filename):
+                seats_state = PokerStarsTableRecognizer(image, cfg).get_seats_state()
+                self.assertEqual(sorted(seats_state), [1, 2, 3, 4, 5, 6])
+                for player, position in test_cfg['player_position'][filename].items():
+                    status = seats_state[player]
+                    self.assertIsInstance(status, SeatStatus)
+                    self.assertEqual(status.state, FLAG_STATES.get(position, OCCUPIED))
+                    self.assertTrue(0 <= status.confidence <= 1)
+
+    def test_unchanged_seats_are_not_classified_again(self):
+        images, _ = load_images(test_cfg['paths']['player_position'])
+        seat_cache = SeatStateCache()
+        first = PokerStarsTableRecognizer(images[0], cfg, seat_cache=seat_cache).get_seats_state()
+        self.assertEqual((seat_cache.hits, seat_cache.misses), (0, 6))
+        img = images[0].copy()
+        bbox = cfg['players_coordinates'][2]
+        img[bbox[1], bbox[0]] += 1
+        second = PokerStarsTableRecognizer(img, cfg, seat_cache=seat_cache).get_seats_state()
+        self.assertEqual((seat_cache.hits, seat_cache.misses), (5, 7))
+        self.assertEqual(first, second)
+
+    def test_seats_are_classified_once_per_frame(self):
+        images, _ = load_images(test_cfg['paths']['player_position'])
+        seat_cache = SeatStateCache()
+        recognizer = PokerStarsTableRecognizer(images[0], cfg, seat_cache=seat_cache)
+        players_info = recognizer.get_dealer_button_position()
+        players_info = recognizer.get_empty_seats(players_info)
+        recognizer.get_so_players(players_info)
+        self.assertEqual((seat_cache.hits, seat_cache.misses), (0, 6))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from scripts.frame_diff import RegionChangeDetector
+from scripts.stage_graph import Stage, StageGraph, stage_levels
+from scripts.table_session import TableSession, FrameResult
+from scripts.template_bank import TemplateBank
+from scripts.utils import read_config_file, load_images
+from TestTableSession import ImmediateEquityWorker
+
+cfg = read_config_file('../scripts/config.yaml')
+test_cfg = read_config_file('test_config.yaml')
+
+
+class TestStageGraph(unittest.TestCase):
+
+    def test_levels(self):
+        stages = [Stage('players', None, inputs=('seats', 'button')), Stage('seats', None), Stage('button', None)]
+        self.assertEqual([[stage.name for stage in level] for level in stage_levels(stages)],
+                         [['seats', 'button'], ['players']])
+        with self.assertRaises(ValueError):
+            stage_levels([Stage('first', None, inputs=('second',)), Stage('second', None, inputs=('first',))])
+        with self.assertRaises(ValueError):
+            stage_levels([Stage('first', None, inputs=('missing',))])
+
+    def test_stage_is_recomputed_when_its_input_changes(self):
+        images, _ = load_images(test_cfg['paths']['hero_cards'])
+        detector = RegionChangeDetector(cfg)
+        calls = []
+        stages = [Stage('cards', lambda img: calls.append('cards') or img[0, 0].tolist(), regions=('hero_cards',)),
+                  Stage('pot', lambda img: calls.append('pot') or 'pot', regions=('pot',)),
+                  Stage('text', lambda img, cards: calls.append('text') or str(cards), inputs=('cards',))]
+        graph = StageGraph(stages, detector)
+        detector.update(images[0])
+        graph.run(images[0])
+        detector.update(images[0])
+        self.assertEqual(graph.run(images[0])[1], [])
+        img = images[0].copy()
+        img[cfg['hero_cards']['y_0'], cfg['hero_cards']['x_0']] += 1
+        detector.update(img)
+        results, recomputed = graph.run(img)
+        self.assertEqual(recomputed, ['cards', 'text'])
+        self.assertEqual(results['text'], str(img[0, 0].tolist()))
+        self.assertEqual(calls, ['cards', 'pot', 'text', 'cards', 'text'])
+        self.assertEqual(graph.stats()['pot'], (2, 1))
+
+    def test_independent_stages_run_in_parallel(self):
+        images, _ = load_images(test_cfg['paths']['hero_cards'])
+        detector = RegionChangeDetector(cfg)
+        detector.update(images[0])
+        # both stages wait for each other, so they finish only if they run at the same time
+        barrier = threading.Barrier(2, timeout=5)
+        stages = [Stage('first', lambda img: barrier.wait() is not None, regions=('hero_cards',)),
+                  Stage('second', lambda img: barrier.wait() is not None, regions=('pot',))]
+        with ThreadPoolExecutor(2) as executor:
+            results, _ = StageGraph(stages, detector, executor).run(images[0])
+        self.assertEqual(results, {'first': True, 'second': True})
+
+    def test_frame_result(self):
+        images, file_names = load_images(test_cfg['paths']['hero_step'])
+        image = images[file_names.index('test_image_1.png')]
+        with ThreadPoolExecutor(4) as executor:
+            session = TableSession(cfg, TemplateBank.shared(cfg), ImmediateEquityWorker(), stage_executor=executor)
+            frame = session.recognize(image)
+            self.assertIsInstance(frame, FrameResult)
+            self.assertTrue(frame.hero_step)
+            self.assertEqual(len(frame.hero_cards), 2)
+            self.assertEqual(sorted(frame.seats), [1, 2, 3, 4, 5, 6])
+            self.assertEqual(frame.players_info['Hero'], session.recognize(image.copy()).players_info['Hero'])
+            self.assertEqual(session.recognize(image.copy()).recomputed, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
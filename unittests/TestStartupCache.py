@@ -0,0 +1,81 @@
+import mmap
+import os
+import tempfile
+import unittest
+from unittest import mock
+import numpy as np
+import yaml
+from scripts import startup_cache
+from scripts.startup_cache import load_startup
+from scripts.template_bank import TemplateBank
+from scripts.utils import read_config_file
+
+cfg = read_config_file('../scripts/config.yaml')
+
+
+def is_memory_mapped(array):
+    while array is not None:
+        if isinstance(array, mmap.mmap):
+            return True
+        array = getattr(array, 'base', None)
+    return False
+
+
+class TestStartupCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.config_path = os.path.join(self.directory.name, 'config.yaml')
+        self.cache_path = os.path.join(self.directory.name, 'cache', 'startup.npz')
+        with open(self.config_path, 'w') as stream:
+            yaml.safe_dump({'paths': cfg['paths'], 'table_size': {1: 1090}}, stream)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_paths_are_relative_to_the_config(self):
+        self.assertEqual(cfg['paths']['pot_image'],
+                         os.path.join(os.path.abspath('../scripts'), '../images_templates/pot/pot.png'))
+
+    def test_templates_are_memory_mapped(self):
+        config, bank = load_startup(self.config_path, self.cache_path)
+        with mock.patch.object(startup_cache, 'read_config_file', side_effect=AssertionError('config parsed')):
+            cached_config, cached_bank = load_startup(self.config_path, self.cache_path)
+        self.assertEqual(cached_config, config)
+        self.assertEqual(cached_config['table_size'], {1: 1090})
+        self.assertEqual(sorted(cached_bank.templates), sorted(bank.templates))
+        suits = cached_bank['hero_cards_suits']
+        self.assertEqual(sorted(suits), sorted(bank['hero_cards_suits']))
+        for name in suits:
+            np.testing.assert_array_equal(suits[name], bank['hero_cards_suits'][name])
+        self.assertTrue(is_memory_mapped(cached_bank['pot_image']))
+        self.assertFalse(is_memory_mapped(bank['pot_image']))
+        self.assertEqual(cached_bank['pot_image'].dtype, np.uint8)
+        self.assertEqual(cached_bank.classifier('pot_numbers').names, TemplateBank.shared(cfg).classifier(
+            'pot_numbers').names)
+
+    def test_changed_config_is_read_again(self):
+        load_startup(self.config_path, self.cache_path)
+        stat = os.stat(self.config_path)
+        os.utime(self.config_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        with mock.patch.object(startup_cache, 'read_config_file', wraps=read_config_file) as read:
+            load_startup(self.config_path, self.cache_path)
+            load_startup(self.config_path, self.cache_path)
+        self.assertEqual(read.call_count, 1)
+
+    def test_broken_cache_is_written_again(self):
+        os.makedirs(os.path.dirname(self.cache_path))
+        for meta in (None, b'not a pickle', b'\x80\x04'):
+            arrays = {'pot_image': np.zeros((2, 2), dtype=np.uint8)}
+            if meta is not None:
+                arrays['__meta__'] = np.frombuffer(meta, dtype=np.uint8)
+            np.savez(self.cache_path, **arrays)
+            with self.subTest("TestStartupCache Broken cache is used", meta=meta):
+                self.assertEqual(startup_cache.read_startup_cache(self.cache_path, self.config_path), (None, None))
+                config, bank = load_startup(self.config_path, self.cache_path)
+                self.assertEqual(config['table_size'], {1: 1090})
+                self.assertEqual(startup_cache.read_startup_cache(self.cache_path, self.config_path)[0], config)
+
+
+if __name__ == '__main__':
+    unittest.main()
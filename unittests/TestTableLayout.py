@@ -0,0 +1,72 @@
+import copy
+import unittest
+import numpy as np
+from scripts.pokerstars_recognition import PokerStarsTableRecognizer
+from scripts import table_layout
+from scripts.table_layout import TableLayout, compile_layout, LAYOUT_CACHE_SIZE
+from scripts.utils import read_config_file, load_images
+
+cfg = read_config_file('../scripts/config.yaml')
+test_cfg = read_config_file('test_config.yaml')
+
+
+class TestTableLayout(unittest.TestCase):
+
+    def test_compiled_regions(self):
+        layout = TableLayout(cfg)
+        self.assertEqual(layout.hero_cards_roi, (slice(cfg['hero_cards']['y_0'], cfg['hero_cards']['y_1']),
+                                                 slice(cfg['hero_cards']['x_0'], cfg['hero_cards']['x_1'])))
+        self.assertTrue(np.array_equal(layout.table_cards_separators, [72, 144, 218, 290, 363]))
+        self.assertEqual(layout.players_bet[2], (279, 457, 379, 480))
+        self.assertEqual(layout.players_bet_roi[2], (slice(457, 480), slice(279, 379)))
+
+    def test_layout_is_immutable(self):
+        layout = TableLayout(cfg)
+        with self.assertRaises(AttributeError):
+            layout.width = 100
+        with self.assertRaises(AttributeError):
+            layout.extra = 1
+        with self.assertRaises(TypeError):
+            layout.players_bet[2] = (0, 0, 1, 1)
+        with self.assertRaises(ValueError):
+            layout.hero_cards_separators[0] = 1
+
+    def test_invalid_config(self):
+        outside = copy.deepcopy(cfg)
+        outside['pot']['x_1'] = cfg['table_size']['width'] + 1
+        unordered = copy.deepcopy(cfg)
+        unordered['table_cards']['separator_3'] = 100
+        for name, config in (('outside', outside), ('unordered', unordered)):
+            with self.subTest("TestTableLayout Invalid config is accepted", name=name):
+                with self.assertRaises(ValueError):
+                    TableLayout(config)
+
+    def test_several_layouts(self):
+        other_cfg = copy.deepcopy(cfg)
+        other_cfg['table_size'] = {'width': 2180, 'height': 1800}
+        self.assertIs(compile_layout(cfg), compile_layout(cfg))
+        self.assertIsNot(compile_layout(cfg), compile_layout(other_cfg))
+        self.assertEqual(compile_layout(other_cfg).width, 2180)
+        self.assertEqual(compile_layout(cfg).width, cfg['table_size']['width'])
+
+    def test_cache_of_layouts_is_bounded(self):
+        first_layout = compile_layout(cfg)
+        configs = [copy.deepcopy(cfg) for _ in range(LAYOUT_CACHE_SIZE)]
+        for config in configs:
+            compile_layout(config)
+        self.assertEqual(len(table_layout._compiled), LAYOUT_CACHE_SIZE)
+        # the oldest config was dropped, the recent ones are still compiled once
+        self.assertIsNot(compile_layout(cfg), first_layout)
+        self.assertIs(compile_layout(configs[-1]), compile_layout(configs[-1]))
+
+    def test_recognizer_with_layout(self):
+        layout = TableLayout(cfg)
+        images, file_names = load_images(test_cfg['paths']['table_cards'])
+        for image, filename in zip(images, file_names):
+            with self.subTest("TestTableLayout Incorrect detection in the image", filename=filename):
+                self.assertEqual(PokerStarsTableRecognizer(image, layout).detect_table_cards(),
+                                 test_cfg['table_cards'][filename])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,4 +1,5 @@
 import unittest
+import cv2
 from scripts.pokerstars_recognition import PokerStarsTableRecognizer
 from scripts.utils import read_config_file, load_images
 
@@ -43,6 +44,25 @@ class TestTableRecognition(unittest.TestCase):
                 recognizer = PokerStarsTableRecognizer(image, cfg)
                 self.assertEqual(recognizer.get_dealer_button_position(), test_cfg['dealer_button_position'][filename])
 
+    def test_dealer_button_with_previous_player(self):
+        images, file_names = load_images(test_cfg['paths']['dealer_button_position'])
+        for image, filename in zip(images, file_names):
+            for previous_player in range(1, 7):
+                with self.subTest("TestDealerButtonPrior Incorrect detection in the image", filename=filename,
+                                  previous_player=previous_player):
+                    recognizer = PokerStarsTableRecognizer(image, cfg)
+                    self.assertEqual(recognizer.get_dealer_button_position(previous_player),
+                                     test_cfg['dealer_button_position'][filename])
+                    self.assertGreaterEqual(recognizer.dealer_button_score, cfg['dealer_button']['min_score'])
+
+    def test_dealer_button_not_found(self):
+        images, _ = load_images(test_cfg['paths']['dealer_button_position'])
+        image = images[0].copy()
+        image[:] = 40
+        recognizer = PokerStarsTableRecognizer(image, cfg)
+        recognizer.get_dealer_button_position()
+        self.assertLess(recognizer.dealer_button_score, cfg['dealer_button']['min_score'])
+
     def test_player_position(self):
         images, file_names = load_images(test_cfg['paths']['player_position'])
         for image, filename in zip(images, file_names):
@@ -64,6 +84,26 @@ class TestTableRecognition(unittest.TestCase):
                 players_info = recognizer.assign_positions(players_info)
                 self.assertEqual(recognizer.find_players_bet(players_info), test_cfg['player_bet'][filename])
 
+    def test_bgra_frames(self):
+        for name in ('hero_step', 'hero_cards', 'table_cards', 'total_pot', 'player_bet'):
+            images, file_names = load_images(test_cfg['paths'][name])
+            for image, filename in zip(images, file_names):
+                with self.subTest("TestBGRAFrames Incorrect detection in the image", name=name, filename=filename):
+                    bgr_recognizer = PokerStarsTableRecognizer(image, cfg)
+                    bgra_recognizer = PokerStarsTableRecognizer(cv2.cvtColor(image, cv2.COLOR_BGR2BGRA), cfg)
+                    self.assertEqual(bgra_recognizer.detect_hero_step(), bgr_recognizer.detect_hero_step())
+                    if name != 'hero_step':
+                        self.assertEqual(bgra_recognizer.detect_hero_cards(), bgr_recognizer.detect_hero_cards())
+                        self.assertEqual(bgra_recognizer.detect_table_cards(), bgr_recognizer.detect_table_cards())
+                        self.assertEqual(bgra_recognizer.find_total_pot(), bgr_recognizer.find_total_pot())
+                    if name == 'player_bet':
+                        players_info = bgra_recognizer.get_dealer_button_position()
+                        players_info = bgra_recognizer.get_empty_seats(players_info)
+                        players_info = bgra_recognizer.get_so_players(players_info)
+                        players_info = bgra_recognizer.assign_positions(players_info)
+                        self.assertEqual(bgra_recognizer.find_players_bet(players_info),
+                                         test_cfg['player_bet'][filename])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,143 @@
+import threading
+import unittest
+from unittest import mock
+import numpy as np
+from scripts.equity import EquityResult
+from scripts.equity_worker import EquityUpdate
+from scripts.frame_ring import FrameRing
+from scripts.grab_table import table_rect, screen_area, capture_loop
+from scripts.hand_state import NewHand, HeroToAct, BoardCardsDealt, StreetChanged, HandFinished, FLOP, TURN, \
+    RIVER, SHOWDOWN
+from scripts.pokerstars_recognition import PokerStarsTableRecognizer
+from scripts.table_session import TableSession
+from scripts.template_bank import TemplateBank
+from scripts.utils import read_config_file, load_images
+
+cfg = read_config_file('../scripts/config.yaml')
+test_cfg = read_config_file('test_config.yaml')
+
+
+class ImmediateEquityWorker:
+    """
+    equity worker that answers at once with a fixed equity
+    """
+
+    def __init__(self):
+        self.state_id = 0
+        self.submitted = []
+        self.update = None
+
+    def submit(self, hero_cards, table_cards, opponents=1, ranges=None):
+        self.state_id += 1
+        self.submitted.append((hero_cards, table_cards, opponents))
+        self.update = EquityUpdate(self.state_id, EquityResult(50.0, 0.0, 0), True)
+        return self.state_id
+
+    def latest(self):
+        update, self.update = self.update, None
+        return update
+
+
+class TestTableSession(unittest.TestCase):
+
+    def test_table_rect(self):
+        self.assertEqual(table_rect(cfg, {'top': 80, 'left': 70}),
+                         {'top': 80, 'left': 70, 'width': 1090, 'height': 900})
+        self.assertEqual(table_rect(cfg, {'top': 0, 'left': 1200, 'width': 545, 'height': 450}),
+                         {'top': 0, 'left': 1200, 'width': 545, 'height': 450})
+
+    def test_screen_area(self):
+        rects = [table_rect(cfg, {'top': 80, 'left': 70}), table_rect(cfg, {'top': 0, 'left': 1200})]
+        self.assertEqual(screen_area(rects), {'top': 0, 'left': 70, 'width': 2220, 'height': 980})
+
+    def test_one_grab_for_all_due_tables(self):
+        rects = [{'top': 10, 'left': 20, 'width': 5, 'height': 4}, {'top': 12, 'left': 30, 'width': 5, 'height': 4}]
+        rings = [FrameRing((4, 5, 4)) for _ in rects]
+        screen = np.arange(6 * 15 * 4, dtype=np.uint32).astype(np.uint8).reshape(6, 15, 4)
+        stop = threading.Event()
+        with mock.patch('scripts.grab_table.ScreenCapture') as screen_capture, \
+                mock.patch('scripts.grab_table.signal.signal'):
+            screen_capture.return_value.grab.side_effect = lambda: stop.set() or screen
+            capture_loop(rects, rings, [False, False], {}, stop)
+        screen_capture.assert_called_once_with({'top': 10, 'left': 20, 'width': 15, 'height': 6})
+        self.assertEqual(screen_capture.return_value.grab.call_count, 1)
+        for ring, view in zip(rings, (screen[0:4, 0:5], screen[2:6, 10:15])):
+            seq, frame, _ = ring.read(timeout=0)
+            self.assertEqual(seq, 1)
+            self.assertTrue((frame == view).all())
+            del frame
+            ring.close()
+
+    def test_new_state_is_shown_once(self):
+        images, file_names = load_images(test_cfg['paths']['hero_step'])
+        image = images[file_names.index('test_image_1.png')]
+        worker = ImmediateEquityWorker()
+        session = TableSession(cfg, TemplateBank.shared(cfg), worker, {'top': 80, 'left': 70})
+        session.process(image)
+        session.process(image.copy())
+        self.assertEqual(len(worker.submitted), 1)
+        text = session.next_text()
+        self.assertIn('Equity: 50.00%', text)
+        self.assertIsNone(session.next_text())
+        self.assertIsNone(session.next_update(1))
+
+    def test_update_for_the_sinks(self):
+        images, file_names = load_images(test_cfg['paths']['hero_step'])
+        image = images[file_names.index('test_image_1.png')]
+        session = TableSession(cfg, TemplateBank.shared(cfg), ImmediateEquityWorker(), {'top': 80, 'left': 70})
+        session.process(image)
+        update = session.next_update(3)
+        self.assertEqual(update.table, 3)
+        self.assertEqual(update.equity, '50.00%')
+        self.assertEqual(update.hero_cards, session.tracker.hero_cards)
+        self.assertIn('Equity: 50.00%', update.text)
+
+    def test_events_of_the_frame(self):
+        images, file_names = load_images(test_cfg['paths']['hero_step'])
+        image = images[file_names.index('test_image_1.png')]
+        session = TableSession(cfg, TemplateBank.shared(cfg), ImmediateEquityWorker(), {'top': 80, 'left': 70})
+        events = session.process(image)
+        self.assertIsInstance(events[0], NewHand)
+        self.assertIn(HeroToAct(), events)
+        self.assertEqual(session.process(image.copy()), [])
+
+    def test_river_while_hero_is_not_to_act(self):
+        # one hand that is played to the river without a frame where hero is to act
+        script = [(['Ah', 'Kd'], [], '1.5'), (['Ah', 'Kd'], ['2c', '3d', '4h'], '5'),
+                  (['Ah', 'Kd'], ['2c', '3d', '4h', '5s'], '10'), (['Ah', 'Kd'], ['2c', '3d', '4h', '5s', '6s'], '20'),
+                  ([], ['2c', '3d', '4h', '5s', '6s'], '20')]
+        regions = {name: (cfg[name]['y_0'], cfg[name]['x_0']) for name in ('hero_cards', 'table_cards', 'pot')}
+
+        def scripted(name, position):
+            # the number of the frame is written into the first pixel of the region
+            return lambda recognizer: script[recognizer.img[regions[name]][0]][position]
+
+        frames = []
+        for number in range(len(script)):
+            frame = np.zeros((cfg['table_size']['height'], cfg['table_size']['width'], 3), dtype=np.uint8)
+            for point in regions.values():
+                frame[point] = number
+            frames.append(frame)
+        worker = ImmediateEquityWorker()
+        session = TableSession(cfg, TemplateBank.shared(cfg), worker, {'top': 80, 'left': 70})
+        events = []
+        with mock.patch.object(PokerStarsTableRecognizer, 'detect_hero_step', autospec=True, return_value=False), \
+                mock.patch.object(PokerStarsTableRecognizer, 'detect_hero_cards', scripted('hero_cards', 0)), \
+                mock.patch.object(PokerStarsTableRecognizer, 'detect_table_cards', scripted('table_cards', 1)), \
+                mock.patch.object(PokerStarsTableRecognizer, 'find_total_pot', scripted('pot', 2)):
+            for frame in frames:
+                events += session.process(frame)
+        self.assertEqual(events[0], NewHand(1, ['Ah', 'Kd']))
+        self.assertEqual([event.street for event in events if isinstance(event, BoardCardsDealt)],
+                         [FLOP, TURN, RIVER])
+        # the cards of the opponents are not recognized, so a showdown can't be told from a fold on the river
+        self.assertEqual(events[-1], HandFinished(1, RIVER))
+        self.assertNotIn(StreetChanged(SHOWDOWN), events)
+        self.assertEqual(session.tracker.total_pot, '20')
+        # the opponents are not known yet, so there is nothing to calculate
+        self.assertEqual(worker.submitted, [])
+        self.assertIn('Pot: 20', session.next_update(1).text)
+
+
+if __name__ == '__main__':
+    unittest.main()
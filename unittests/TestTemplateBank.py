@@ -0,0 +1,33 @@
+import unittest
+import cv2
+import numpy as np
+from scripts.template_bank import TemplateBank
+from scripts.utils import read_config_file
+
+cfg = read_config_file('../scripts/config.yaml')
+
+
+class TestTemplateBank(unittest.TestCase):
+
+    def test_shared_bank(self):
+        self.assertIs(TemplateBank.shared(cfg), TemplateBank.shared(cfg))
+
+    def test_templates_format(self):
+        bank = TemplateBank.shared(cfg)
+        self.assertEqual(sorted(bank['hero_cards_suits']), ['c', 'd', 'h', 's'])
+        self.assertEqual(bank['hero_cards_suits']['c'].ndim, 3)
+        self.assertEqual(bank['pot_numbers']['0'].ndim, 2)
+        self.assertEqual(bank['pot_numbers']['0'].dtype, np.float32)
+        self.assertEqual(bank['dealer_button'].dtype, np.uint8)
+        self.assertEqual(bank['dealer_button'].ndim, 2)
+
+    def test_reload(self):
+        bank = TemplateBank(cfg['paths'])
+        bank.templates['pot_numbers'] = {}
+        bank.reload(['pot_numbers'])
+        self.assertEqual(len(bank['pot_numbers']), 11)
+        self.assertTrue(np.array_equal(bank['pot_image'], cv2.imread(cfg['paths']['pot_image'], 0)))
+
+
+if __name__ == '__main__':
+    unittest.main()